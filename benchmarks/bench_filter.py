@@ -0,0 +1,92 @@
+"""
+Measures the keyword filter: cost per danmaku against the size of the keyword list,
+for the automaton and for a naive scan testing every keyword in turn.
+Also reports how long building the automaton takes, which is what a reload costs the source thread's executor.
+
+Run from the repository root:
+    python -m benchmarks.bench_filter
+"""
+import random
+import time
+from typing import Any
+
+from benchmarks.common import print_json
+
+from src.danmaku_filter import DanmakuFilter, FILTER_BLOCK, FILTER_MASK, normalize_for_matching
+
+LIST_SIZES: tuple[int, ...] = (100, 1000, 10000, 50000)
+MESSAGE_COUNT: int = 20000
+NAIVE_MESSAGE_COUNT: int = 500 # The naive scan is too slow to run on every message with large lists
+KEYWORD_SHARE: float = 0.05
+ALPHABET: str = "abcdefghijklmnopqrstuvwxyz的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年"
+
+
+def keyword_list(size: int, generator: random.Random) -> list[tuple[str, str]]:
+    """
+    Builds random keywords of 4 to 8 characters, one in ten masked and the others blocked.
+    """
+    return [("".join(generator.choice(ALPHABET) for _ in range(generator.randint(4, 8))),
+             FILTER_MASK if i % 10 == 0 else FILTER_BLOCK) for i in range(size)]
+
+
+def messages(count: int, keywords: list[tuple[str, str]], generator: random.Random) -> list[str]:
+    """
+    Builds random danmaku texts of 5 to 40 characters, one in twenty containing a keyword.
+    """
+    texts = []
+    for _ in range(count):
+        text = "".join(generator.choice(ALPHABET + " ") for _ in range(generator.randint(5, 40)))
+        if generator.random() < KEYWORD_SHARE:
+            position = generator.randint(0, len(text))
+            text = text[:position] + generator.choice(keywords)[0] + text[position:]
+        texts.append(text)
+    return texts
+
+
+def measure(size: int) -> dict[str, Any]:
+    """
+    Filters messages with a list of the given size, then a subset of them with the naive scan.
+
+    Returns:
+        dict[str, Any]: Build time and microseconds per danmaku of both methods.
+    """
+    keywords = keyword_list(size, random.Random(size))
+    texts = messages(MESSAGE_COUNT, keywords, random.Random(0))
+    start = time.perf_counter()
+    keyword_filter = DanmakuFilter(keywords=keywords)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    blocked = 0
+    start = time.perf_counter()
+    for text in texts:
+        if keyword_filter.check(text) is None:
+            blocked += 1
+    automaton_us = (time.perf_counter() - start) / len(texts) * 1e6
+
+    normalized = [keyword for keyword, _ in keywords]
+    start = time.perf_counter()
+    for text in texts[:NAIVE_MESSAGE_COUNT]:
+        text = normalize_for_matching(text)
+        [keyword for keyword in normalized if keyword in text] # Every keyword is needed, to mask or to allow
+    naive_us = (time.perf_counter() - start) / NAIVE_MESSAGE_COUNT * 1e6
+
+    return {
+        "build_ms": round(build_ms, 1),
+        "us_per_message": round(automaton_us, 2),
+        "naive_us_per_message": round(naive_us, 2),
+        "blocked_share": round(blocked / len(texts), 3),
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures every list size.
+
+    Returns:
+        dict[str, Any]: Results keyed by list size.
+    """
+    return {f"keywords_{size}": measure(size) for size in LIST_SIZES}
+
+
+if __name__ == '__main__':
+    print_json(run())
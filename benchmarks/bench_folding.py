@@ -0,0 +1,101 @@
+"""
+Measures spam folding: the same spam-heavy stream goes through DanmakuSource.handle_message
+with and without a DanmakuFolder, and the admitted danmakus are rendered by the canvas renderer.
+Reports how many items reach the screen and the resulting frame cost.
+
+Run from the repository root:
+    python -m benchmarks.bench_folding
+"""
+import json
+import random
+import time
+from typing import Any
+
+from benchmarks.common import DenseLanes, application, percentile, print_json, process_events_for
+
+from PyQt5.QtWidgets import QApplication
+
+from src.danmaku_admission import DanmakuAdmission
+from src.danmaku_folding import DanmakuFolder
+from src.danmaku_registry import danmaku_registry
+from src.danmaku_source import DanmakuSource, ConnectionStats
+from benchmarks.bench_frames import TimedManager, WIDTH, HEIGHT
+
+MESSAGE_COUNT: int = 5000
+SPAM_TEXTS: tuple[str, ...] = ("666", "233", "2333", "哈哈哈哈", "[doge]", "awsl", "Nice!", "nice !")
+SPAM_SHARE: float = 0.95
+DURATION_S: float = 2.0
+
+
+def spam_stream(message_count: int = MESSAGE_COUNT) -> list[str]:
+    """
+    Builds a stream where most messages repeat a handful of texts, with stray variations.
+    """
+    generator = random.Random(42)
+    messages = []
+    for i in range(message_count):
+        if generator.random() < SPAM_SHARE:
+            text = generator.choice(SPAM_TEXTS) * generator.choice((1, 1, 2))
+        else:
+            text = f"comment {i}"
+        messages.append(json.dumps({"text": text}))
+    return messages
+
+
+def measure(messages: list[str], folder: DanmakuFolder | None) -> dict[str, Any]:
+    """
+    Ingests the stream, then renders what was admitted for DURATION_S seconds.
+    """
+    source = DanmakuSource(admission=DanmakuAdmission(max_pending=len(messages), max_on_screen=None), folder=folder)
+    stats = ConnectionStats("bench")
+    start = time.perf_counter()
+    for message in messages:
+        source.handle_message(message, stats)
+    ingest_s = time.perf_counter() - start
+    models = source.admission.drain()
+    updates = folder.drain_updates() if folder is not None else []
+    for model, count in updates:
+        model.fold_count = count
+
+    manager = TimedManager()
+    manager.resize(WIDTH, HEIGHT)
+    manager.show()
+    manager.display_area_ratio = 1.0
+    manager.lanes = DenseLanes(WIDTH, HEIGHT // manager.lane_height)
+    for model in models:
+        model.speed = 20 # Keep everything on screen during the measurement
+    manager.add_danmaku_batch(models)
+    process_events_for(DURATION_S)
+    costs_ms = [cost * 1000 for cost in manager.frame_costs]
+    for model in models:
+        danmaku_registry.recall(model.danmaku_id)
+    manager.frame_timer.stop()
+    manager.deleteLater()
+    QApplication.processEvents()
+    return {
+        "items_on_screen": len(models),
+        "ingest_us_per_msg": round(ingest_s / len(messages) * 1e6, 2),
+        "frame_p50_ms": round(percentile(costs_ms, 0.5), 3),
+        "frame_p99_ms": round(percentile(costs_ms, 0.99), 3),
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Compares the spam stream with and without folding.
+
+    Returns:
+        dict[str, Any]: Items on screen, ingest cost and frame cost for both.
+    """
+    application()
+    messages = spam_stream()
+    return {
+        "messages": len(messages),
+        "spam_share": SPAM_SHARE,
+        "unfolded": measure(messages, None),
+        "folded": measure(messages, DanmakuFolder()),
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
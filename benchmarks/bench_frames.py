@@ -0,0 +1,95 @@
+"""
+Runs the canvas renderer in a real event loop at fixed densities and reports
+frame time (frame update plus paint) and frames delivered late by the frame timer.
+
+Run from the repository root:
+    python -m benchmarks.bench_frames
+"""
+import time
+from typing import Any
+
+from benchmarks.common import DenseLanes, application, percentile, print_json, process_events_for
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPaintEvent
+
+from src.danmaku_manager import DanmakuManager, FRAME_INTERVAL_MS
+from src.danmaku_model import DanmakuModel
+from src.danmaku_registry import danmaku_registry
+
+DENSITIES: tuple[int, ...] = (100, 500, 2000)
+DURATION_S: float = 3.0
+WIDTH: int = 1920
+HEIGHT: int = 1080
+# A frame counts as dropped when it starts more than 1.5 intervals after the previous one
+DROPPED_FRAME_FACTOR: float = 1.5
+
+
+class TimedManager(DanmakuManager):
+    """
+    DanmakuManager recording when each frame starts and how long updating and painting take.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.frame_starts: list[float] = []
+        self.frame_costs: list[float] = []
+
+    def _on_frame(self) -> None:
+        start = time.perf_counter()
+        self.frame_starts.append(start)
+        super()._on_frame()
+        self.frame_costs.append(time.perf_counter() - start)
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        start = time.perf_counter()
+        super().paintEvent(event)
+        if self.frame_costs:
+            self.frame_costs[-1] += time.perf_counter() - start
+
+
+def measure(density: int) -> dict[str, float]:
+    """
+    Keeps density danmakus on screen for DURATION_S seconds.
+
+    Returns:
+        dict[str, float]: Frame cost percentiles, frames rendered and frames dropped.
+    """
+    manager = TimedManager()
+    manager.resize(WIDTH, HEIGHT)
+    manager.show()
+    manager.display_area_ratio = 1.0
+    manager.lanes = DenseLanes(WIDTH, HEIGHT // manager.lane_height)
+    # Slow enough that nothing leaves the screen during the measurement
+    models = [DanmakuModel(text=f"danmaku {i % 200}", speed=20) for i in range(density)]
+    manager.add_danmaku_batch(models)
+    process_events_for(DURATION_S)
+
+    intervals = [b - a for a, b in zip(manager.frame_starts, manager.frame_starts[1:])]
+    dropped = sum(1 for interval in intervals if interval * 1000 > FRAME_INTERVAL_MS * DROPPED_FRAME_FACTOR)
+    costs_ms = [cost * 1000 for cost in manager.frame_costs]
+    for model in models:
+        danmaku_registry.recall(model.danmaku_id)
+    manager.frame_timer.stop()
+    manager.deleteLater()
+    QApplication.processEvents()
+    return {
+        "frames": len(manager.frame_starts),
+        "dropped_frames": dropped,
+        "frame_p50_ms": round(percentile(costs_ms, 0.5), 3),
+        "frame_p99_ms": round(percentile(costs_ms, 0.99), 3),
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures every density of DENSITIES.
+
+    Returns:
+        dict[str, Any]: Frame statistics per density.
+    """
+    application()
+    return {str(density): measure(density) for density in DENSITIES}
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,121 @@
+"""
+Measures the persistent history log: sustained write throughput of the background writer,
+the cost of append() on the calling (GUI) thread, lookups by ID and time, paging, search,
+the longest step of a search spread over event loop turns as the panel runs it, and reopening a large log.
+
+Run from the repository root:
+    python -m benchmarks.bench_history
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Any
+
+from benchmarks.common import percentile, print_json
+
+from main import HISTORY_SCAN_BLOCKS
+from src.danmaku_history import DanmakuHistoryLog
+from src.danmaku_model import DanmakuModel
+
+ENTRIES: int = 200000
+BATCH_SIZE: int = 50
+LOOKUPS: int = 200
+PAGE_SIZE: int = 50
+# One message in this many contains the searched word
+SEARCH_RARITY: int = 1000
+TIMEOUT_S: float = 120
+
+
+def models() -> list[DanmakuModel]:
+    """
+    Builds ENTRIES danmakus of typical length, some carrying the searched word.
+    """
+    generator = random.Random(0)
+    return [DanmakuModel(text=f"弹幕 {i} " + ("needle" if i % SEARCH_RARITY == 0 else "x" * generator.randint(4, 30)),
+                         color=generator.choice(("#FFFFFF", "#FF0000", "#00FF00")))
+            for i in range(ENTRIES)]
+
+
+def lookup_ms(call: Any, arguments: list[Any]) -> dict[str, float]:
+    """
+    Times one call per argument.
+    """
+    durations = []
+    for argument in arguments:
+        start = time.perf_counter()
+        call(argument)
+        durations.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(percentile(durations, 0.5), 3), "p99_ms": round(percentile(durations, 0.99), 3)}
+
+
+def run() -> dict[str, Any]:
+    """
+    Writes ENTRIES danmakus in batches, then measures lookups and reopening.
+
+    Returns:
+        dict[str, Any]: Write throughput, append cost and lookup latencies.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "history.mwdh")
+    try:
+        danmakus = models()
+        log = DanmakuHistoryLog(path)
+        append_us = []
+        start = time.perf_counter()
+        for i in range(0, ENTRIES, BATCH_SIZE):
+            append_start = time.perf_counter()
+            log.append(danmakus[i:i + BATCH_SIZE])
+            append_us.append((time.perf_counter() - append_start) * 1e6)
+        queued = time.perf_counter() - start
+        log.flush(TIMEOUT_S)
+        written = time.perf_counter() - start
+        size = os.path.getsize(path)
+        result: dict[str, Any] = {
+            "entries": ENTRIES,
+            "file_mb": round(size / 1e6, 1),
+            "index_kb": round(os.path.getsize(log.index_path) / 1e3, 1),
+            "append_p50_us": round(percentile(append_us, 0.5), 2),
+            "append_p99_us": round(percentile(append_us, 0.99), 2),
+            "queue_s": round(queued, 3),
+            "write_s": round(written, 3),
+            "entries_per_s": round(ENTRIES / written),
+            "mb_per_s": round(size / 1e6 / written, 1),
+            "syncs": log.syncs,
+        }
+
+        generator = random.Random(1)
+        ids = [danmakus[generator.randrange(ENTRIES)].danmaku_id for _ in range(LOOKUPS)]
+        first_time, last_time = log.read(0, 1)[0].logged_at, log.read(ENTRIES - 1, 1)[0].logged_at
+        times = [generator.uniform(first_time, last_time) for _ in range(LOOKUPS)]
+        positions = [generator.randrange(ENTRIES) for _ in range(LOOKUPS)]
+        result["find_id"] = lookup_ms(log.find_id, ids)
+        result["find_time"] = lookup_ms(log.find_time, times)
+        result["page"] = lookup_ms(lambda before: log.read_before(before, PAGE_SIZE), positions)
+        search_start = time.perf_counter()
+        found = log.read_before(None, ENTRIES, "NEEDLE")
+        result["search_all_ms"] = round((time.perf_counter() - search_start) * 1000, 1)
+        result["search_found"] = len(found)
+        steps: list[float] = []
+        position, stepped = None, 0
+        while position != 0:
+            step_start = time.perf_counter()
+            entries, position = log.scan_before(position, ENTRIES, "NEEDLE", HISTORY_SCAN_BLOCKS)
+            steps.append((time.perf_counter() - step_start) * 1000)
+            stepped += len(entries)
+        result["search_steps"] = len(steps)
+        result["search_step_max_ms"] = round(max(steps), 2)
+        result["search_step_found"] = stepped
+        log.close()
+
+        reopen_start = time.perf_counter()
+        DanmakuHistoryLog(path).close()
+        result["reopen_ms"] = round((time.perf_counter() - reopen_start) * 1000, 1)
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    print_json(run())
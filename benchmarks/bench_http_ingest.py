@@ -0,0 +1,129 @@
+"""
+Measures the HTTP NDJSON ingest endpoint against a local DanmakuSource: 100k danmakus posted
+in one request, streamed with chunked transfer encoding, and split into several requests on one
+kept-alive connection, compared to the same danmakus sent as one WebSocket frame each.
+Throughput is counted from the first byte sent until the last danmaku reaches the GUI thread.
+
+Run from the repository root:
+    python -m benchmarks.bench_http_ingest
+"""
+import http.client
+import json
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+from benchmarks.common import application, print_json
+from benchmarks.bench_ws_ingest import measure as measure_websocket
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from src.danmaku_admission import DanmakuAdmission
+from src.danmaku_signal import danmaku_signal
+from src.danmaku_source import DanmakuSource
+
+PORT: int = 32110
+HTTP_PORT: int = 32111
+MESSAGE_COUNT: int = 100000
+KEEP_ALIVE_REQUESTS: int = 100
+CHUNK_LINES: int = 1000 # Lines per chunk of the streamed request
+TIMEOUT_S: float = 120
+
+
+def ndjson_lines() -> list[bytes]:
+    """
+    Returns MESSAGE_COUNT danmakus, one JSON line each.
+    """
+    return [json.dumps({"text": f"danmaku {i}", "color": "#66ccff"}).encode("utf-8") + b"\n"
+            for i in range(MESSAGE_COUNT)]
+
+
+def deliver(send: Callable[[], None]) -> float:
+    """
+    Runs a sender in a thread and waits until MESSAGE_COUNT danmakus have reached the GUI thread.
+
+    Args:
+        send (Callable[[], None]): Sends the danmakus.
+
+    Returns:
+        float: Delivered danmakus per second.
+    """
+    loop = QEventLoop()
+    received = 0
+
+    def on_batch(models: list) -> None:
+        nonlocal received
+        received += len(models)
+        if received >= MESSAGE_COUNT:
+            loop.quit()
+
+    danmaku_signal.danmaku_signal_add_batch.connect(on_batch)
+    QTimer.singleShot(int(TIMEOUT_S * 1000), loop.quit)
+    start = time.perf_counter()
+    sender = threading.Thread(target=send, daemon=True)
+    sender.start()
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+    sender.join()
+    danmaku_signal.danmaku_signal_add_batch.disconnect(on_batch)
+    return received / elapsed
+
+
+def post(requests: list[bytes | Iterator[bytes]], responses: list[dict[str, Any]]) -> None:
+    """
+    Posts every body on one connection, collecting the counts answered for each.
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", HTTP_PORT, timeout=TIMEOUT_S)
+    for body in requests:
+        connection.request("POST", "/danmaku", body=body, encode_chunked=not isinstance(body, bytes),
+                           headers={"Content-Type": "application/x-ndjson"})
+        responses.append(json.loads(connection.getresponse().read()))
+    connection.close()
+
+
+def measure(requests: list[bytes | Iterator[bytes]]) -> dict[str, Any]:
+    """
+    Posts the requests on one connection and reports throughput and the counts answered.
+    """
+    responses: list[dict[str, Any]] = []
+    rate = deliver(lambda: post(requests, responses))
+    return {
+        "requests": len(requests),
+        "msgs_per_s": round(rate),
+        "accepted": sum(answer.get("accepted", 0) for answer in responses),
+        "rejected": sum(answer.get("rejected", 0) for answer in responses),
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures one request, one streamed request, kept-alive requests and WebSocket frames against one source.
+
+    Returns:
+        dict[str, Any]: Delivered danmakus per second for each way of sending.
+    """
+    application()
+    # No rate or on-screen limit: this measures the ingest path, not the admission policy
+    source = DanmakuSource(port=PORT, http_port=HTTP_PORT,
+                           admission=DanmakuAdmission(max_pending=MESSAGE_COUNT, max_on_screen=None))
+    source.start()
+    time.sleep(0.5) # Let the servers start listening
+    lines = ndjson_lines()
+    per_request = MESSAGE_COUNT // KEEP_ALIVE_REQUESTS
+    try:
+        return {
+            "messages": MESSAGE_COUNT,
+            "one_request": measure([b"".join(lines)]),
+            "chunked_request": measure([iter([b"".join(lines[i:i + CHUNK_LINES])
+                                              for i in range(0, MESSAGE_COUNT, CHUNK_LINES)])]),
+            "keep_alive_requests": measure([b"".join(lines[i:i + per_request])
+                                            for i in range(0, MESSAGE_COUNT, per_request)]),
+            "websocket_frames_msgs_per_s": round(measure_websocket(source, 1, MESSAGE_COUNT)),
+        }
+    finally:
+        source.stop()
+        source.wait(3000)
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,107 @@
+"""
+Compares the delivery rate of danmakus from a source thread to the GUI thread,
+emitting one signal per message versus one batch per frame through DanmakuBatcher.
+
+Run from the repository root:
+    python -m benchmarks.bench_ingest
+"""
+import threading
+import time
+from typing import Any
+
+from benchmarks.common import application, print_json
+
+from PyQt5.QtCore import QObject, QEventLoop
+
+from src.danmaku_batcher import DanmakuBatcher
+from src.danmaku_model import DanmakuModel
+from src.danmaku_signal import danmaku_signal
+
+MESSAGE_COUNT: int = 100000
+
+
+class Receiver(QObject):
+    """
+    Counts the danmakus delivered to the GUI thread and stops the event loop once all have arrived.
+    """
+    def __init__(self, expected: int, loop: QEventLoop) -> None:
+        super().__init__()
+        self.expected: int = expected
+        self.received: int = 0
+        self.loop: QEventLoop = loop
+
+    def on_add(self, model: DanmakuModel) -> None:
+        self._count(1)
+
+    def on_add_batch(self, models: list[DanmakuModel]) -> None:
+        self._count(len(models))
+
+    def _count(self, count: int) -> None:
+        self.received += count
+        if self.received >= self.expected:
+            self.loop.quit()
+
+
+def measure(batched: bool, message_count: int = MESSAGE_COUNT) -> float:
+    """
+    Measures how many messages per second reach the GUI thread.
+
+    Args:
+        batched (bool): Deliver through DanmakuBatcher instead of one signal per message.
+        message_count (int, optional): The number of messages to deliver. Defaults to MESSAGE_COUNT.
+
+    Returns:
+        float: Delivered messages per second.
+    """
+    models = [DanmakuModel(text=f"danmaku {i}") for i in range(message_count)]
+    loop = QEventLoop()
+    receiver = Receiver(message_count, loop)
+    danmaku_signal.danmaku_signal_add.connect(receiver.on_add)
+    danmaku_signal.danmaku_signal_add_batch.connect(receiver.on_add_batch)
+
+    def produce() -> None:
+        if batched:
+            batcher = DanmakuBatcher()
+            stop_event = threading.Event()
+            flusher = threading.Thread(target=batcher.run, args=(stop_event,), daemon=True)
+            flusher.start()
+            for model in models:
+                batcher.add(model)
+            stop_event.set()
+            flusher.join()
+        else:
+            for model in models:
+                danmaku_signal.danmaku_signal_add.emit(model)
+
+    start = time.perf_counter()
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+    producer.join()
+
+    danmaku_signal.danmaku_signal_add.disconnect(receiver.on_add)
+    danmaku_signal.danmaku_signal_add_batch.disconnect(receiver.on_add_batch)
+    return message_count / elapsed
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures both delivery strategies.
+
+    Returns:
+        dict[str, Any]: Messages per second for each strategy and the speedup of batching.
+    """
+    application()
+    per_message = measure(batched=False)
+    batched = measure(batched=True)
+    return {
+        "messages": MESSAGE_COUNT,
+        "per_message_msgs_per_s": round(per_message),
+        "batched_msgs_per_s": round(batched),
+        "speedup": round(batched / per_message, 2),
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
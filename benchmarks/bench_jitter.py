@@ -0,0 +1,107 @@
+"""
+Measures the jitter buffer on a simulated bursty relay: viewers send danmakus at a steady random rate,
+the relay forwards them in bursts every few seconds, shuffled within each burst.
+Playback is simulated frame by frame without Qt, with and without the buffer, and reports
+how evenly danmakus reach the frames, how many are out of order, and the cost per danmaku.
+
+Run from the repository root:
+    python -m benchmarks.bench_jitter
+"""
+import random
+import time
+from typing import Any
+
+from benchmarks.common import percentile, print_json
+
+from src.danmaku_jitter import DanmakuJitterBuffer
+from src.danmaku_model import DanmakuModel
+
+RATE: float = 150 # Danmakus sent per second
+DURATION_S: float = 30
+BURST_INTERVAL_S: float = 2
+TRANSIT_S: float = 0.08 # Base relay delay, plus up to the same again of random jitter
+FRAME_S: float = 1 / 60
+LATENCIES: tuple[float, ...] = (0.5, 2.5)
+
+
+def arrivals(generator: random.Random) -> list[tuple[float, DanmakuModel]]:
+    """
+    Builds the stream as received: (local arrival time, danmaku), ordered by arrival.
+    Sender and local clocks are offset by an arbitrary constant.
+    """
+    clock_offset = 1_700_000_000.0
+    stream = []
+    sent = 0.0
+    while True:
+        sent += generator.expovariate(RATE)
+        if sent >= DURATION_S:
+            break
+        burst = (int(sent / BURST_INTERVAL_S) + 1) * BURST_INTERVAL_S
+        arrival = burst + TRANSIT_S + generator.uniform(0, TRANSIT_S)
+        stream.append((arrival, DanmakuModel(text="danmaku", sent_at=clock_offset + sent)))
+    stream.sort(key=lambda entry: entry[0])
+    return stream
+
+
+def play(stream: list[tuple[float, DanmakuModel]], buffer: DanmakuJitterBuffer | None) -> dict[str, Any]:
+    """
+    Feeds the stream frame by frame and counts the danmakus released in every frame.
+
+    Returns:
+        dict[str, Any]: Frame statistics over the steady part of the stream, disorder and cost.
+    """
+    per_frame: list[int] = []
+    order: list[float] = []
+    max_depth = 0
+    cost = 0.0
+    index = 0
+    frame_time = 0.0
+    end = stream[-1][0] + (buffer.latency if buffer is not None else 0) + 2 * BURST_INTERVAL_S
+    while frame_time < end:
+        frame_time += FRAME_S
+        released: list[DanmakuModel] = []
+        start = time.perf_counter()
+        while index < len(stream) and stream[index][0] <= frame_time:
+            arrival, model = stream[index]
+            released.extend(buffer.push(model, arrival) if buffer is not None else (model,))
+            index += 1
+        if buffer is not None:
+            released.extend(buffer.release(frame_time))
+            max_depth = max(max_depth, buffer.depth)
+        cost += time.perf_counter() - start
+        per_frame.append(len(released))
+        order.extend(model.sent_at for model in released)
+
+    # Skip the first burst interval and the tail, where the stream starts and drains
+    first = int((BURST_INTERVAL_S + 1) / FRAME_S)
+    steady = per_frame[first:first + int((DURATION_S - 2 * BURST_INTERVAL_S) / FRAME_S)]
+    result: dict[str, Any] = {
+        "empty_frame_share": round(sum(1 for count in steady if count == 0) / len(steady), 3),
+        "frame_p99": percentile([float(count) for count in steady], 0.99),
+        "frame_max": max(steady),
+        "out_of_order": sum(1 for previous, current in zip(order, order[1:]) if current < previous),
+        "us_per_danmaku": round(cost / len(stream) * 1e6, 2),
+    }
+    if buffer is not None:
+        stats = buffer.stats()
+        result.update(max_depth=max_depth, late=stats["late"],
+                      max_lateness_ms=round(stats["max_lateness"] * 1000, 1))
+    return result
+
+
+def run() -> dict[str, Any]:
+    """
+    Plays the same stream without buffer and with every latency of LATENCIES.
+
+    Returns:
+        dict[str, Any]: Results keyed by configuration.
+    """
+    stream = arrivals(random.Random(7))
+    results: dict[str, Any] = {"danmakus": len(stream), "unbuffered": play(stream, None)}
+    for latency in LATENCIES:
+        results[f"latency_{latency}s"] = play(stream, DanmakuJitterBuffer(latency))
+    return results
+
+
+if __name__ == '__main__':
+    print_json(run())
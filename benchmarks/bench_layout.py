@@ -0,0 +1,91 @@
+"""
+Measures the cost of add_danmaku and of recalling a danmaku as the number of
+active danmakus grows.
+
+Run from the repository root:
+    python -m benchmarks.bench_layout
+"""
+import time
+from typing import Any
+
+from benchmarks.common import DenseLanes, application, percentile, print_json
+
+from PyQt5.QtWidgets import QApplication
+
+from src.danmaku_manager import DanmakuManager
+from src.danmaku_model import DanmakuModel
+from src.danmaku_registry import danmaku_registry
+from src.danmaku_signal import danmaku_signal
+
+ACTIVE_COUNTS: tuple[int, ...] = (0, 1000, 5000, 20000)
+SAMPLES: int = 500
+WIDTH: int = 1920
+HEIGHT: int = 1080
+
+
+def make_manager(active_count: int) -> tuple[DanmakuManager, list[DanmakuModel]]:
+    """
+    Builds a canvas manager already displaying active_count slow danmakus.
+    """
+    manager = DanmakuManager()
+    manager.resize(WIDTH, HEIGHT)
+    manager.show()
+    manager.display_area_ratio = 1.0
+    manager.lanes = DenseLanes(WIDTH, HEIGHT // manager.lane_height)
+    models = [DanmakuModel(text=f"danmaku {i % 100}", speed=10) for i in range(active_count)]
+    manager.add_danmaku_batch(models)
+    return manager, models
+
+
+def measure(active_count: int) -> dict[str, float]:
+    """
+    Measures add_danmaku and recall latency with active_count danmakus on screen.
+
+    Returns:
+        dict[str, float]: Median and 99th percentile of both operations in microseconds.
+    """
+    manager, models = make_manager(active_count)
+    add_times: list[float] = []
+    added: list[DanmakuModel] = []
+    for i in range(SAMPLES):
+        model = DanmakuModel(text=f"danmaku {i % 100}", speed=10)
+        start = time.perf_counter()
+        manager.add_danmaku(model)
+        add_times.append((time.perf_counter() - start) * 1e6)
+        added.append(model)
+
+    # Recall goes through the signal, exactly as the control panel does
+    danmaku_signal.danmaku_signal_delete.connect(danmaku_registry.recall)
+    recall_times: list[float] = []
+    for model in added:
+        start = time.perf_counter()
+        danmaku_signal.danmaku_signal_delete.emit(model.danmaku_id)
+        recall_times.append((time.perf_counter() - start) * 1e6)
+    danmaku_signal.danmaku_signal_delete.disconnect(danmaku_registry.recall)
+
+    for model in models:
+        danmaku_registry.recall(model.danmaku_id)
+    manager.frame_timer.stop()
+    manager.deleteLater()
+    QApplication.processEvents()
+    return {
+        "add_p50_us": round(percentile(add_times, 0.5), 2),
+        "add_p99_us": round(percentile(add_times, 0.99), 2),
+        "recall_p50_us": round(percentile(recall_times, 0.5), 2),
+        "recall_p99_us": round(percentile(recall_times, 0.99), 2),
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures every density of ACTIVE_COUNTS.
+
+    Returns:
+        dict[str, Any]: Latencies per active danmaku count.
+    """
+    application()
+    return {str(count): measure(count) for count in ACTIVE_COUNTS}
+
+
+if __name__ == '__main__':
+    print_json(run())
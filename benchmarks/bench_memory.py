@@ -0,0 +1,63 @@
+"""
+Pushes danmakus through the control panel list and a canvas manager, the way
+MainWindow does, and samples the resident memory of the process.
+
+Run from the repository root:
+    python -m benchmarks.bench_memory
+"""
+import gc
+from typing import Any
+
+from benchmarks.common import application, print_json, process_events_for, rss_bytes
+
+from src.danmaku_lanes import LANE_FULL_DROP
+from src.danmaku_list_model import DanmakuListModel
+from src.danmaku_manager import DanmakuManager
+from src.danmaku_model import DanmakuModel
+from src.danmaku_pixmap_cache import danmaku_pixmap_cache
+
+MESSAGE_COUNT: int = 200000
+BATCH_SIZE: int = 1000
+SAMPLE_EVERY: int = 50000
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures resident memory after every SAMPLE_EVERY messages.
+
+    Returns:
+        dict[str, Any]: Baseline RSS and RSS growth per checkpoint, in bytes. Part of the growth is the
+        pixmap cache filling up to its budget, which is reported next to it.
+    """
+    application()
+    list_model = DanmakuListModel()
+    manager = DanmakuManager(lane_full_policy=LANE_FULL_DROP)
+    manager.resize(1920, 1080)
+    manager.show()
+    process_events_for(0.1)
+    gc.collect()
+    baseline = rss_bytes()
+
+    samples: dict[str, int] = {}
+    cache_samples: dict[str, int] = {}
+    for sent in range(0, MESSAGE_COUNT, BATCH_SIZE):
+        batch = [DanmakuModel(text=f"danmaku {sent + i}", speed=3000) for i in range(BATCH_SIZE)]
+        list_model.append_batch(batch)
+        manager.add_danmaku_batch(batch)
+        process_events_for(0.001)
+        if (sent + BATCH_SIZE) % SAMPLE_EVERY == 0:
+            gc.collect()
+            samples[str(sent + BATCH_SIZE)] = rss_bytes() - baseline
+            cache_samples[str(sent + BATCH_SIZE)] = danmaku_pixmap_cache.current_bytes
+
+    manager.frame_timer.stop()
+    return {
+        "baseline_rss_bytes": baseline,
+        "rss_growth_bytes": samples,
+        "pixmap_cache_bytes": cache_samples,
+        "list_rows": list_model.rowCount(),
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
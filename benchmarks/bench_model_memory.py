@@ -0,0 +1,80 @@
+"""
+Reports how many bytes each retained DanmakuModel costs, compared with a plain
+__dict__-based model carrying a UUID string ID (the previous representation).
+
+Run from the repository root:
+    python -m benchmarks.bench_model_memory
+"""
+import gc
+import json
+import tracemalloc
+import uuid
+from typing import Callable, Any
+
+from benchmarks.common import print_json
+from src.danmaku_model import DanmakuModel
+
+MESSAGE_COUNT: int = 100000
+
+
+class DictDanmakuModel:
+    """
+    Reference model with a per-instance __dict__ and a UUID string ID.
+    """
+    def __init__(self, text: str, color: str = "#FFFFFF", size: int = 20, speed: int = 300,
+                 font_family: str = "Microsoft YaHei", font_weight: int = 50, font_style: int = 0,
+                 text_decoration: str = "") -> None:
+        self.text = text
+        self.color = color
+        self.size = size
+        self.speed = speed
+        self.font_family = font_family
+        self.font_weight = font_weight
+        self.font_style = font_style
+        self.text_decoration = text_decoration
+        self.danmaku_id = str(uuid.uuid4())
+
+
+def bytes_per_message(factory: Callable[..., Any], message_count: int = MESSAGE_COUNT) -> float:
+    """
+    Measures the memory retained per model, including its text and field strings.
+
+    Args:
+        factory (Callable[..., Any]): The model class to instantiate.
+        message_count (int, optional): The number of models to retain. Defaults to MESSAGE_COUNT.
+
+    Returns:
+        float: Retained bytes per model.
+    """
+    messages = [json.dumps({"text": f"danmaku {i}", "color": "#66ccff", "fontFamily": "Microsoft YaHei"})
+                for i in range(message_count)]
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    retained = []
+    for message in messages:
+        # Every decoded message carries fresh string objects, as it does in DanmakuSource
+        parsed = json.loads(message)
+        retained.append(factory(parsed["text"], color=parsed["color"], font_family=parsed["fontFamily"]))
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del retained
+    return used / message_count
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures both model representations.
+
+    Returns:
+        dict[str, Any]: Retained bytes per message for each representation.
+    """
+    return {
+        "messages": MESSAGE_COUNT,
+        "dict_model_bytes_per_message": round(bytes_per_message(DictDanmakuModel), 1),
+        "danmaku_model_bytes_per_message": round(bytes_per_message(DanmakuModel), 1),
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,94 @@
+"""
+Measures display item pooling under churn: short-lived danmakus arrive every frame for a few seconds,
+with the pool enabled and disabled (high-water mark 0), in both render modes.
+Reports items created, the reuse ratio and the cost of adding a batch.
+
+Run from the repository root:
+    python -m benchmarks.bench_pool
+"""
+import time
+from typing import Any
+
+from benchmarks.common import DenseLanes, application, percentile, print_json
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from src.danmaku_manager import DanmakuManager, RENDER_MODE_CANVAS, RENDER_MODE_WIDGET
+from src.danmaku_model import DanmakuModel
+from src.danmaku_pool import DanmakuItemPool
+
+DURATION_S: float = 3.0
+BATCH_SIZE: int = 20
+WIDTH: int = 600
+HEIGHT: int = 800
+SPEED: int = 3000 # Pixels per second, each danmaku lives for about a quarter of a second
+
+
+def measure(render_mode: str, pooled: bool) -> dict[str, Any]:
+    """
+    Feeds one batch of danmakus per frame for DURATION_S seconds.
+
+    Returns:
+        dict[str, Any]: Pool counters and batch cost percentiles.
+    """
+    manager = DanmakuManager(render_mode)
+    manager.resize(WIDTH, HEIGHT)
+    manager.show()
+    manager.display_area_ratio = 1.0
+    manager.lanes = DenseLanes(WIDTH, HEIGHT // manager.lane_height)
+    if not pooled:
+        manager.item_pool = DanmakuItemPool(destroy=manager.item_pool.destroy, low_water=0, high_water=0)
+
+    costs_ms: list[float] = []
+    counter = 0
+
+    def feed() -> None:
+        nonlocal counter
+        models = [DanmakuModel(text=f"danmaku {(counter + i) % 50}", speed=SPEED) for i in range(BATCH_SIZE)]
+        counter += BATCH_SIZE
+        start = time.perf_counter()
+        manager.add_danmaku_batch(models)
+        costs_ms.append((time.perf_counter() - start) * 1000)
+
+    loop = QEventLoop()
+    feeder = QTimer()
+    feeder.setInterval(16)
+    feeder.timeout.connect(feed)
+    feeder.start()
+    QTimer.singleShot(int(DURATION_S * 1000), loop.quit)
+    loop.exec_()
+    feeder.stop()
+
+    stats = manager.item_pool.stats()
+    manager.frame_timer.stop()
+    manager.deleteLater()
+    QApplication.processEvents()
+    return {
+        "danmakus": counter,
+        "created": stats["created"],
+        "reuse_ratio": stats["reuse_ratio"],
+        "batch_p50_ms": round(percentile(costs_ms, 0.5), 3),
+        "batch_p99_ms": round(percentile(costs_ms, 0.99), 3),
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Compares pooled and unpooled items in both render modes.
+
+    Returns:
+        dict[str, Any]: Results keyed by render mode, then pooled or unpooled.
+    """
+    application()
+    return {
+        render_mode: {
+            "unpooled": measure(render_mode, False),
+            "pooled": measure(render_mode, True),
+        }
+        for render_mode in (RENDER_MODE_CANVAS, RENDER_MODE_WIDGET)
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,101 @@
+"""
+Measures bulk recalls of danmakus on screen: the time the recall itself takes on the GUI thread,
+the next frame dropping the recalled items, and hiding their rows in the control panel list,
+which MainWindow spreads over event loop turns of LIST_REMOVAL_CHUNK rows, against the budget of one frame.
+
+Run from the repository root:
+    python -m benchmarks.bench_recall
+"""
+import time
+from typing import Any, Callable
+
+from benchmarks.common import DenseLanes, application, print_json
+
+from PyQt5.QtWidgets import QListView
+
+from main import LIST_REMOVAL_CHUNK
+from src.danmaku_list_model import DanmakuListModel
+from src.danmaku_manager import DanmakuManager, FRAME_INTERVAL_MS
+from src.danmaku_model import DanmakuModel
+from src.danmaku_recall import RecallPredicate
+from src.danmaku_registry import danmaku_registry
+
+ON_SCREEN: int = 5000
+SENDERS: int = 100 # The sender recall removes one danmaku in this many
+ROUNDS: int = 5
+WIDTH: int = 1920
+HEIGHT: int = 1080
+
+
+def measure(predicate: Callable[[], RecallPredicate]) -> dict[str, float]:
+    """
+    Fills a manager and the panel list with ON_SCREEN danmakus, then recalls those selected by a predicate.
+
+    Args:
+        predicate (Callable[[], RecallPredicate]): Builds the predicate once the danmakus are on screen.
+
+    Returns:
+        dict[str, float]: Danmakus removed and the best time of the recall, the next frame, the whole list update
+        and its longest chunk, in ms. The recall and the next frame together should fit in one frame.
+    """
+    timings: dict[str, list[float]] = {"recall_ms": [], "frame_ms": [], "list_ms": [], "list_chunk_ms": []}
+    removed = 0
+    for _ in range(ROUNDS):
+        manager = DanmakuManager()
+        manager.resize(WIDTH, HEIGHT)
+        manager.lanes = DenseLanes(WIDTH, manager.lanes.lane_count)
+        list_model = DanmakuListModel(ON_SCREEN)
+        list_view = QListView()
+        list_view.setModel(list_model)
+        models = [DanmakuModel(text=f"弹幕 {i % 50}", sender=f"viewer{i % SENDERS}") for i in range(ON_SCREEN)]
+        manager.add_danmaku_batch(models)
+        list_model.append_batch(models)
+
+        start = time.perf_counter()
+        recalled = danmaku_registry.recall_matching(predicate())
+        timings["recall_ms"].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        manager._on_frame()
+        timings["frame_ms"].append((time.perf_counter() - start) * 1000)
+        chunks = []
+        for first in range(0, len(recalled), LIST_REMOVAL_CHUNK):
+            start = time.perf_counter()
+            for danmaku_id in recalled[first:first + LIST_REMOVAL_CHUNK]:
+                row = list_model.remove(danmaku_id)
+                if row >= 0:
+                    list_view.setRowHidden(row, True)
+            chunks.append((time.perf_counter() - start) * 1000)
+        timings["list_ms"].append(sum(chunks))
+        timings["list_chunk_ms"].append(max(chunks, default=0))
+        removed = len(recalled)
+
+        danmaku_registry.recall_matching(RecallPredicate(all=True))
+        manager.frame_timer.stop()
+        manager.deleteLater()
+        list_view.deleteLater()
+    result: dict[str, float] = {"removed": removed}
+    result.update((name, round(min(values), 2)) for name, values in timings.items())
+    result["screen_ms"] = round(result["recall_ms"] + result["frame_ms"], 2)
+    return result
+
+
+def run() -> dict[str, Any]:
+    """
+    Recalls everything, one sender (indexed), a contained text (scanned) and a time window.
+
+    Returns:
+        dict[str, Any]: Timings per predicate and the frame budget they are compared to.
+    """
+    application()
+    return {
+        "on_screen": ON_SCREEN,
+        "frame_budget_ms": FRAME_INTERVAL_MS,
+        "all": measure(lambda: RecallPredicate(all=True)),
+        "sender": measure(lambda: RecallPredicate(sender="viewer7")),
+        "contains": measure(lambda: RecallPredicate(contains="弹幕 4")),
+        "since": measure(lambda: RecallPredicate(since=time.monotonic() - 60)),
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
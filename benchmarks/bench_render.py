@@ -0,0 +1,87 @@
+"""
+Compares the frame time of the canvas renderer with the per-widget renderer.
+
+Run from the repository root:
+    python -m benchmarks.bench_render
+"""
+import time
+from typing import Any
+
+from benchmarks.common import DenseLanes, application, print_json
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import Qt, QAbstractAnimation
+
+from src.danmaku_manager import DanmakuManager, RENDER_MODE_CANVAS, RENDER_MODE_WIDGET
+from src.danmaku_model import DanmakuModel
+from src.danmaku_widget import DanmakuWidget
+
+ITEM_COUNTS: tuple[int, ...] = (100, 1000, 5000)
+FRAMES: int = 30
+WIDTH: int = 1920
+HEIGHT: int = 1080
+
+
+def measure_frame_time(render_mode: str, item_count: int) -> float:
+    """
+    Measures the average time needed to produce one frame with the given number of danmakus.
+
+    Args:
+        render_mode (str): The render mode of the DanmakuManager.
+        item_count (int): The number of danmakus on screen.
+
+    Returns:
+        float: The average frame time in milliseconds.
+    """
+    manager = DanmakuManager(render_mode)
+    manager.resize(WIDTH, HEIGHT)
+    manager.show()
+    manager.display_area_ratio = 1.0
+    manager.lanes = DenseLanes(WIDTH, HEIGHT // manager.lane_height)
+    manager.add_danmaku_batch([DanmakuModel(text=f"danmaku {i}") for i in range(item_count)])
+    QApplication.processEvents()
+
+    widgets = manager.findChildren(DanmakuWidget)
+    image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    elapsed = 0.0
+    for frame in range(FRAMES):
+        image.fill(Qt.transparent)
+        start = time.perf_counter()
+        # Advance one frame, the same way the frame timer or the animations would
+        if render_mode == RENDER_MODE_CANVAS:
+            manager._on_frame()
+        else:
+            for widget in widgets:
+                if widget.animation and widget.animation.state() == QAbstractAnimation.Running:
+                    widget.animation.setCurrentTime(frame * 16)
+        painter = QPainter(image)
+        manager.render(painter)
+        painter.end()
+        elapsed += time.perf_counter() - start
+
+    manager.frame_timer.stop()
+    manager.deleteLater()
+    QApplication.processEvents()
+    return elapsed / FRAMES * 1000
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures both render modes at every density of ITEM_COUNTS.
+
+    Returns:
+        dict[str, Any]: Average frame time in milliseconds per render mode and item count.
+    """
+    application()
+    return {
+        str(count): {
+            RENDER_MODE_CANVAS: round(measure_frame_time(RENDER_MODE_CANVAS, count), 3),
+            RENDER_MODE_WIDGET: round(measure_frame_time(RENDER_MODE_WIDGET, count), 3),
+        }
+        for count in ITEM_COUNTS
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
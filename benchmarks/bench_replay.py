@@ -0,0 +1,117 @@
+"""
+Measures the record-and-replay tools: messages per second the recorder appends,
+and messages per second a recording replayed at full speed delivers through a local DanmakuSource.
+The recording also holds bulk recalls, which must reach the GUI thread as recalls, not as empty danmakus.
+
+Run from the repository root:
+    python -m benchmarks.bench_replay
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any
+
+from benchmarks.common import application, print_json
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from src.danmaku_admission import DanmakuAdmission
+from src.danmaku_recording import DanmakuRecorder
+from src.danmaku_replay import replay, DEFAULT_MAX_SPEED_BULK_SIZE
+from src.danmaku_signal import danmaku_signal
+from src.danmaku_source import DanmakuSource
+
+PORT: int = 32101
+MESSAGE_COUNT: int = 200000
+RECALL_EVERY: int = 50000 # A recorded bulk recall after this many danmakus
+TIMEOUT_S: float = 120
+
+
+def record(path: str, message_count: int = MESSAGE_COUNT) -> float:
+    """
+    Writes a synthetic recording of single-danmaku messages, with a bulk recall every RECALL_EVERY of them.
+
+    Returns:
+        float: Recorded messages per second.
+    """
+    messages = []
+    for i in range(message_count):
+        if i % RECALL_EVERY == RECALL_EVERY - 1:
+            messages.append(json.dumps({"type": "recall", "text": "never sent"})) # Well before the last danmaku
+        messages.append(json.dumps({"text": f"danmaku {i}", "color": "#66ccff"}))
+    recorder = DanmakuRecorder(path)
+    start = time.perf_counter()
+    for message in messages:
+        recorder.record(message)
+    recorder.close()
+    return len(messages) / (time.perf_counter() - start)
+
+
+def run() -> dict[str, Any]:
+    """
+    Records synthetic traffic, then replays it as fast as possible into a source.
+
+    Returns:
+        dict[str, Any]: Recording rate, replay send rate and delivered rate.
+    """
+    application()
+    path = os.path.join(tempfile.mkdtemp(), "bench.mwdr")
+    record_rate = record(path)
+
+    # No rate or on-screen limit: this measures the replay client and the ingest path
+    source = DanmakuSource(port=PORT, admission=DanmakuAdmission(max_pending=MESSAGE_COUNT, max_on_screen=None))
+    source.start()
+    time.sleep(0.5) # Let the server start listening
+
+    loop = QEventLoop()
+    received = 0
+    empty = 0
+    recalls = 0
+
+    def on_batch(models: list) -> None:
+        nonlocal received, empty
+        received += len(models)
+        empty += sum(1 for model in models if not model.text)
+        if received >= MESSAGE_COUNT:
+            loop.quit()
+
+    def on_recall(request: Any) -> None:
+        nonlocal recalls
+        recalls += 1
+
+    replay_result: dict[str, Any] = {}
+
+    def send() -> None:
+        replay_result.update(asyncio.run(replay(path, f"ws://127.0.0.1:{PORT}", None, DEFAULT_MAX_SPEED_BULK_SIZE)))
+
+    danmaku_signal.danmaku_signal_add_batch.connect(on_batch)
+    danmaku_signal.danmaku_signal_recall.connect(on_recall)
+    QTimer.singleShot(int(TIMEOUT_S * 1000), loop.quit)
+    start = time.perf_counter()
+    sender = threading.Thread(target=send, daemon=True)
+    sender.start()
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+    sender.join()
+    danmaku_signal.danmaku_signal_add_batch.disconnect(on_batch)
+    danmaku_signal.danmaku_signal_recall.disconnect(on_recall)
+    source.stop()
+    source.wait(3000)
+    os.remove(path)
+    return {
+        "messages": MESSAGE_COUNT,
+        "record_msgs_per_s": round(record_rate),
+        "replay_send_msgs_per_s": replay_result.get("msgs_per_s", 0),
+        "delivered_msgs_per_s": round(received / elapsed),
+        "delivered": received,
+        "recalls_recorded": MESSAGE_COUNT // RECALL_EVERY,
+        "recalls_replayed": recalls,
+        "empty_danmakus": empty,
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
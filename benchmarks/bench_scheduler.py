@@ -0,0 +1,136 @@
+"""
+Measures batch sending: many concurrent batches with short random delays, sent either by chaining
+one QTimer.singleShot closure per danmaku, as the control panel used to, or by the DanmakuScheduler.
+Reports the CPU time spent, the lateness of sends and the number of delivery calls.
+
+Run from the repository root:
+    python -m benchmarks.bench_scheduler
+"""
+import random
+import time
+from collections import deque
+from typing import Any, Callable
+
+from benchmarks.common import application, percentile, print_json
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from src.danmaku_model import DanmakuModel
+from src.danmaku_scheduler import DanmakuScheduler, DelayDistribution, uniform_delay
+
+BATCHES: int = 2000
+BATCH_SIZE: int = 10
+MAX_DELAY_S: float = 0.2
+TIMEOUT_S: float = 60
+
+
+def run_until(done: Callable[[], bool]) -> None:
+    """
+    Runs the event loop until done() is true or TIMEOUT_S passes.
+    """
+    loop = QEventLoop()
+    checker = QTimer()
+    checker.setInterval(5)
+    checker.timeout.connect(lambda: done() and loop.quit())
+    checker.start()
+    QTimer.singleShot(int(TIMEOUT_S * 1000), loop.quit)
+    loop.exec_()
+    checker.stop()
+
+
+def chained_timers() -> tuple[list[float], int]:
+    """
+    Sends every batch with one chained single-shot timer per danmaku.
+
+    Returns:
+        tuple[list[float], int]: Lateness of every send in seconds, and the number of delivery calls.
+    """
+    generator = random.Random(0)
+    lateness: list[float] = []
+
+    def send_next(remaining: int, due: float) -> None:
+        lateness.append(time.monotonic() - due)
+        DanmakuModel(text="batch")
+        if remaining > 1:
+            delay = generator.uniform(0, MAX_DELAY_S)
+            next_due = time.monotonic() + delay
+            QTimer.singleShot(int(delay * 1000), lambda: send_next(remaining - 1, next_due))
+
+    now = time.monotonic()
+    for _ in range(BATCHES):
+        QTimer.singleShot(0, lambda: send_next(BATCH_SIZE, now))
+    run_until(lambda: len(lateness) >= BATCHES * BATCH_SIZE)
+    return lateness, len(lateness)
+
+
+def scheduler() -> tuple[list[float], int]:
+    """
+    Sends every batch through one DanmakuScheduler.
+
+    Returns:
+        tuple[list[float], int]: Lateness of every send in seconds, and the number of delivery calls.
+    """
+    danmaku_scheduler = DanmakuScheduler(seed=0)
+    uniform = uniform_delay(0, MAX_DELAY_S)
+    lateness: list[float] = []
+    deliveries = 0
+    # Due times of the sends of every batch not delivered yet, keyed by the batch text
+    dues: dict[str, deque[float]] = {}
+
+    def recording_delay(text: str) -> DelayDistribution:
+        def draw(generator: random.Random) -> float:
+            delay = uniform(generator)
+            dues[text].append(dues[text][-1] + delay)
+            return delay
+        return draw
+
+    def on_due(models: list[DanmakuModel]) -> None:
+        nonlocal deliveries
+        deliveries += 1
+        now = time.monotonic()
+        lateness.extend(now - dues[model.text].popleft() for model in models)
+
+    danmaku_scheduler.danmakus_due.connect(on_due)
+    for i in range(BATCHES):
+        text = str(i)
+        dues[text] = deque([time.monotonic()])
+        danmaku_scheduler.schedule_batch(text, BATCH_SIZE, delay=recording_delay(text))
+    run_until(lambda: len(lateness) >= BATCHES * BATCH_SIZE)
+    return lateness, deliveries
+
+
+def measure(method: Callable[[], tuple[list[float], int]]) -> dict[str, Any]:
+    """
+    Runs one method and reports its cost.
+    """
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    lateness, deliveries = method()
+    return {
+        "sent": len(lateness),
+        "deliveries": deliveries,
+        "wall_s": round(time.perf_counter() - start, 2),
+        "cpu_s": round(time.process_time() - cpu_start, 3),
+        "lateness_p50_ms": round(percentile(lateness, 0.5) * 1000, 2),
+        "lateness_p99_ms": round(percentile(lateness, 0.99) * 1000, 2),
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Compares both methods on the same load.
+
+    Returns:
+        dict[str, Any]: Results keyed by method.
+    """
+    application()
+    return {
+        "batches": BATCHES,
+        "batch_size": BATCH_SIZE,
+        "chained_timers": measure(chained_timers),
+        "scheduler": measure(scheduler),
+    }
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,112 @@
+"""
+Measures the CPU cost of driving several screens from a steady stream of danmakus:
+one DanmakuManager per screen, as every window used to lay out its own danmakus,
+against one manager shared by DanmakuViews on the other screens.
+
+Run from the repository root:
+    python -m benchmarks.bench_screens
+"""
+import time
+from typing import Any
+
+from benchmarks.common import DenseLanes, application, print_json, process_events_for
+
+from PyQt5.QtWidgets import QApplication, QWidget
+from PyQt5.QtCore import QTimer
+
+from src.danmaku_manager import DanmakuManager
+from src.danmaku_model import DanmakuModel
+from src.danmaku_registry import danmaku_registry
+from src.danmaku_view import DanmakuView, ScreenView
+
+SCREEN_COUNTS: tuple[int, ...] = (1, 2, 3, 4)
+DURATION_S: float = 4.0
+WIDTH: int = 1920
+HEIGHT: int = 1080
+# Danmakus added per feed tick and ticks per second; at the speed below about 200 are on screen
+FEED_BATCH: int = 3
+FEED_INTERVAL_MS: int = 50
+SPEED: int = 600
+
+
+def manager() -> DanmakuManager:
+    """
+    Returns a shown full-screen manager whose lanes, in the default display area, always have room.
+    """
+    danmaku_manager = DanmakuManager()
+    danmaku_manager.resize(WIDTH, HEIGHT)
+    danmaku_manager.show()
+    danmaku_manager.lanes = DenseLanes(WIDTH, danmaku_manager.lanes.lane_count)
+    return danmaku_manager
+
+
+def measure(screens: int, shared: bool) -> dict[str, float]:
+    """
+    Feeds the same stream to the given number of screens for DURATION_S seconds.
+
+    Args:
+        screens (int): The number of screens.
+        shared (bool): Whether the screens share one manager through views.
+
+    Returns:
+        dict[str, float]: CPU seconds spent and danmakus shown on the first screen at the end.
+    """
+    managers = [manager()]
+    widgets: list[QWidget] = list(managers)
+    for _ in range(screens - 1):
+        if shared:
+            view = DanmakuView(managers[0], ScreenView())
+            view.resize(WIDTH, HEIGHT)
+            view.show()
+            widgets.append(view)
+        else:
+            managers.append(manager())
+            widgets.append(managers[-1])
+    models: list[DanmakuModel] = []
+
+    def feed() -> None:
+        batch = [DanmakuModel(text=f"danmaku {len(models) + i}", speed=SPEED) for i in range(FEED_BATCH)]
+        models.extend(batch)
+        for danmaku_manager in managers:
+            danmaku_manager.add_danmaku_batch(batch)
+
+    feeder = QTimer()
+    feeder.setInterval(FEED_INTERVAL_MS)
+    feeder.timeout.connect(feed)
+    feeder.start()
+    process_events_for(1.0) # Reach the steady state before measuring
+    cpu_start = time.process_time()
+    process_events_for(DURATION_S)
+    cpu = time.process_time() - cpu_start
+    feeder.stop()
+    shown = managers[0].displayed_count
+
+    for model in models:
+        danmaku_registry.recall(model.danmaku_id)
+    for widget in widgets:
+        widget.hide()
+        widget.deleteLater()
+    for danmaku_manager in managers:
+        danmaku_manager.frame_timer.stop()
+    QApplication.processEvents()
+    return {"cpu_s": round(cpu, 3), "shown": shown}
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures both layouts for every count of SCREEN_COUNTS.
+
+    Returns:
+        dict[str, Any]: CPU seconds per layout and screen count, and the CPU growth from one screen to the most.
+    """
+    application()
+    results: dict[str, Any] = {}
+    for layout, shared in (("separate", False), ("shared", True)):
+        results[layout] = {str(screens): measure(screens, shared) for screens in SCREEN_COUNTS}
+        first, last = results[layout][str(SCREEN_COUNTS[0])], results[layout][str(SCREEN_COUNTS[-1])]
+        results[layout]["growth"] = round(last["cpu_s"] / first["cpu_s"], 2) if first["cpu_s"] else None
+    return results
+
+
+if __name__ == '__main__':
+    print_json(run())
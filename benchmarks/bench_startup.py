@@ -0,0 +1,148 @@
+"""
+Measures cold start of the control panel, each run in a fresh interpreter:
+time to import main.py, to the first paint of the panel, to the overlays being created
+and to the WebSocket server accepting connections, plus an import time breakdown of main.py.
+Also lists the slow modules main.py is meant to defer, if importing it loaded them anyway.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+from benchmarks.common import print_json
+
+from src.danmaku_source import DEFAULT_PORT
+
+REPEATS: int = 5
+TOP_IMPORTS: int = 8
+# Loaded by the deferred startup steps, importing main.py should not load them
+DEFERRED_MODULES: tuple[str, ...] = ("websockets", "asyncio", "http.server", "PyHotKey", "src.danmaku_source")
+
+# Runs in a fresh interpreter and prints the milestones, in milliseconds since its first line
+CHILD_SCRIPT: str = """
+import time
+start = time.perf_counter()
+import json, socket, sys, threading
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEvent, QObject
+app = QApplication(sys.argv)
+marks = {"qt_application": time.perf_counter()}
+import main
+marks["import_main"] = time.perf_counter()
+port = int(sys.argv[1])
+deferred = [name for name in sys.argv[2:] if name in sys.modules]
+
+class FirstPaint(QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint:
+            marks.setdefault("first_paint", time.perf_counter())
+        return False
+
+def wait_for_server():
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.1).close()
+        except OSError:
+            time.sleep(0.001)
+            continue
+        marks["server_listening"] = time.perf_counter()
+        return
+
+threading.Thread(target=wait_for_server, daemon=True).start()
+window = main.MainWindow()
+marks["panel_created"] = time.perf_counter()
+paint_filter = FirstPaint()
+window.installEventFilter(paint_filter)
+window.show()
+screen_count = QApplication.desktop().screenCount()
+while time.perf_counter() - start < 30 and not (
+        "first_paint" in marks and "server_listening" in marks and "overlays_created" in marks):
+    app.processEvents()
+    if len(window.danmaku_windows) == screen_count:
+        marks.setdefault("overlays_created", time.perf_counter())
+    time.sleep(0.0005)
+window.close()
+print(json.dumps({"marks": {name: (mark - start) * 1000 for name, mark in marks.items()}, "deferred_loaded": deferred}))
+"""
+
+IMPORT_TIME_LINE: re.Pattern = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def environment() -> dict[str, str]:
+    """
+    Returns the environment of the child interpreters: headless, with the repository importable.
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (os.getcwd(), env.get("PYTHONPATH"))))
+    return env
+
+
+def milestones() -> dict[str, Any]:
+    """
+    Starts the control panel REPEATS times and keeps the median of every milestone.
+
+    Returns:
+        dict[str, Any]: Median milliseconds per milestone, and the deferred modules loaded by importing main.py.
+    """
+    runs = []
+    for _ in range(REPEATS):
+        completed = subprocess.run([sys.executable, "-c", CHILD_SCRIPT, str(DEFAULT_PORT), *DEFERRED_MODULES], env=environment(),
+                                   capture_output=True, text=True, check=True)
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    names = runs[0]["marks"].keys()
+    return {
+        "ms": {name: round(statistics.median(run["marks"].get(name, float("nan")) for run in runs), 1) for name in names},
+        "deferred_loaded": runs[0]["deferred_loaded"],
+    }
+
+
+def import_breakdown() -> dict[str, Any]:
+    """
+    Imports main.py with -X importtime and attributes the time to its direct imports.
+    A module shared by several imports is charged to the first one.
+
+    Returns:
+        dict[str, Any]: Total milliseconds and the slowest direct imports.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], env=environment(),
+                               capture_output=True, text=True, check=True)
+    direct: dict[str, float] = {}
+    total = main_ms = 0.0
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        depth = (len(match.group(3)) - 1) // 2
+        if depth == 0:
+            total += cumulative_ms
+            if match.group(4) == "main":
+                main_ms = cumulative_ms
+        elif depth == 1:
+            direct[match.group(4)] = cumulative_ms
+    slowest = sorted(direct.items(), key=lambda entry: entry[1], reverse=True)[:TOP_IMPORTS]
+    return {
+        "main_ms": round(main_ms, 1),
+        "interpreter_total_ms": round(total, 1),
+        "slowest_direct_imports_ms": {name: round(ms, 1) for name, ms in slowest},
+    }
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures startup milestones and the import breakdown.
+
+    Returns:
+        dict[str, Any]: Milestones and import times.
+    """
+    return {"milestones": milestones(), "imports": import_breakdown()}
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,104 @@
+"""
+Measures ingest throughput with the WebSocket server in the GUI process and with worker processes.
+Several replay clients, each in its own process, send single-danmaku frames at full speed;
+the rate is counted from the first frame until the last danmaku reaches the GUI thread.
+Scaling with workers needs as many free cores as workers plus clients.
+
+Run from the repository root:
+    python -m benchmarks.bench_workers
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from benchmarks.common import application, print_json
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from src.danmaku_admission import DanmakuAdmission
+from src.danmaku_recording import DanmakuRecorder
+from src.danmaku_signal import danmaku_signal
+from src.danmaku_source import DanmakuSource
+
+PORT: int = 32102
+CLIENTS: int = 4
+MESSAGES_PER_CLIENT: int = 25000
+WORKER_COUNTS: tuple[int, ...] = (0, 1, 2, 4)
+TIMEOUT_S: float = 180
+
+
+def write_recording(path: str) -> None:
+    """
+    Writes the recording every client replays.
+    """
+    recorder = DanmakuRecorder(path)
+    for i in range(MESSAGES_PER_CLIENT):
+        recorder.record(json.dumps({"text": f"danmaku {i}", "color": "#66ccff", "size": 24}))
+    recorder.close()
+
+
+def measure(path: str, workers: int) -> float:
+    """
+    Replays the recording from CLIENTS processes into a source with the given number of workers.
+
+    Returns:
+        float: Delivered danmakus per second.
+    """
+    expected = CLIENTS * MESSAGES_PER_CLIENT
+    source = DanmakuSource(port=PORT, workers=workers,
+                           admission=DanmakuAdmission(max_pending=expected, max_on_screen=None))
+    source.start()
+    time.sleep(2 if workers else 0.5) # Let the server, or every worker, start listening
+
+    loop = QEventLoop()
+    received = 0
+
+    def on_batch(models: list) -> None:
+        nonlocal received
+        received += len(models)
+        if received >= expected:
+            loop.quit()
+
+    danmaku_signal.danmaku_signal_add_batch.connect(on_batch)
+    QTimer.singleShot(int(TIMEOUT_S * 1000), loop.quit)
+    start = time.perf_counter()
+    clients = [subprocess.Popen([sys.executable, "-m", "src.danmaku_replay", path, "--uri", f"ws://127.0.0.1:{PORT}",
+                                 "--speed", "max", "--bulk", "1"], stdout=subprocess.DEVNULL)
+               for _ in range(CLIENTS)]
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.wait()
+    danmaku_signal.danmaku_signal_add_batch.disconnect(on_batch)
+    source.stop()
+    source.wait(5000)
+    return received / elapsed
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures every worker count against the same load.
+
+    Returns:
+        dict[str, Any]: Delivered danmakus per second, keyed by worker count.
+    """
+    application()
+    path = os.path.join(tempfile.mkdtemp(), "workers.mwdr")
+    write_recording(path)
+    try:
+        return {
+            "clients": CLIENTS,
+            "messages": CLIENTS * MESSAGES_PER_CLIENT,
+            "cpu_count": os.cpu_count(),
+            "msgs_per_s": {f"workers_{workers}": round(measure(path, workers)) for workers in WORKER_COUNTS},
+        }
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,97 @@
+"""
+Measures WebSocket ingest throughput against a local DanmakuSource: messages per second
+from the first frame sent until the last danmaku reaches the GUI thread,
+for one danmaku per frame and for bulk frames.
+
+Run from the repository root:
+    python -m benchmarks.bench_ws_ingest
+"""
+import json
+import threading
+import time
+from typing import Any
+
+from benchmarks.common import application, print_json
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from websockets.sync.client import connect
+
+from src.danmaku_admission import DanmakuAdmission
+from src.danmaku_signal import danmaku_signal
+from src.danmaku_source import DanmakuSource
+
+PORT: int = 32100
+MESSAGE_COUNT: int = 50000
+BULK_SIZE: int = 500
+TIMEOUT_S: float = 120
+
+
+def measure(source: DanmakuSource, bulk_size: int, message_count: int = MESSAGE_COUNT) -> float:
+    """
+    Sends danmakus to the source and waits until all of them have been delivered.
+
+    Args:
+        source (DanmakuSource): The running source.
+        bulk_size (int): Danmakus per WebSocket frame, 1 sends plain objects.
+        message_count (int, optional): The number of danmakus to send. Defaults to MESSAGE_COUNT.
+
+    Returns:
+        float: Delivered danmakus per second.
+    """
+    payload = [{"text": f"danmaku {i}", "color": "#66ccff"} for i in range(message_count)]
+    if bulk_size == 1:
+        frames = [json.dumps(entry) for entry in payload]
+    else:
+        frames = [json.dumps(payload[i:i + bulk_size]) for i in range(0, message_count, bulk_size)]
+
+    loop = QEventLoop()
+    received = 0
+
+    def on_batch(models: list) -> None:
+        nonlocal received
+        received += len(models)
+        if received >= message_count:
+            loop.quit()
+
+    def send() -> None:
+        with connect(f"ws://127.0.0.1:{source.port}", max_size=None) as websocket:
+            for frame in frames:
+                websocket.send(frame)
+
+    danmaku_signal.danmaku_signal_add_batch.connect(on_batch)
+    QTimer.singleShot(int(TIMEOUT_S * 1000), loop.quit)
+    start = time.perf_counter()
+    sender = threading.Thread(target=send, daemon=True)
+    sender.start()
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+    sender.join()
+    danmaku_signal.danmaku_signal_add_batch.disconnect(on_batch)
+    return received / elapsed
+
+
+def run() -> dict[str, Any]:
+    """
+    Measures single-object and bulk frames against one source.
+
+    Returns:
+        dict[str, Any]: Delivered danmakus per second for each framing.
+    """
+    application()
+    # No rate or on-screen limit: this measures the ingest path, not the admission policy
+    source = DanmakuSource(port=PORT, admission=DanmakuAdmission(max_pending=MESSAGE_COUNT, max_on_screen=None))
+    source.start()
+    time.sleep(0.5) # Let the server start listening
+    try:
+        return {
+            "messages": MESSAGE_COUNT,
+            "single_frame_msgs_per_s": round(measure(source, 1)),
+            f"bulk_{BULK_SIZE}_msgs_per_s": round(measure(source, BULK_SIZE)),
+        }
+    finally:
+        source.stop()
+        source.wait(3000)
+
+
+if __name__ == '__main__':
+    print_json(run())
@@ -0,0 +1,101 @@
+"""
+Helpers shared by the benchmarks: headless Qt setup, machine information and JSON output.
+Every benchmark module exposes run() -> dict and prints its result as JSON when run directly.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any
+
+# Benchmarks always run headless, also on machines with a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEventLoop, QTimer, QT_VERSION_STR, PYQT_VERSION_STR
+
+from src.danmaku_lanes import LaneAllocator
+
+
+class DenseLanes(LaneAllocator):
+    """
+    Lane allocator that always finds a lane, so a benchmark can reach densities
+    the collision-free allocator would never allow on one screen.
+    """
+    def allocate(self, width: int, speed: float, now: float, lanes_needed: int = 1) -> int | None:
+        self._next = (getattr(self, "_next", -1) + 1) % max(1, self.lane_count - lanes_needed + 1)
+        return self._next
+
+
+_application: QApplication | None = None
+
+
+def application() -> QApplication:
+    """
+    Returns the running QApplication, creating it on first use and keeping it alive.
+    """
+    global _application
+    if _application is None:
+        _application = QApplication.instance() or QApplication(sys.argv)
+    return _application
+
+
+def process_events_for(seconds: float) -> None:
+    """
+    Runs the Qt event loop for the given time.
+    """
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+
+
+def rss_bytes() -> int:
+    """
+    Returns the resident set size of this process in bytes, or 0 where it cannot be read.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Returns the given percentile (0..1) of a list of values using the nearest-rank method.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def metadata() -> dict[str, Any]:
+    """
+    Describes the machine and the revision the benchmarks ran on, so results can be compared.
+    """
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                  text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+    return {
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "qpa_platform": os.environ.get("QT_QPA_PLATFORM", ""),
+    }
+
+
+def print_json(results: dict[str, Any]) -> None:
+    """
+    Prints benchmark results as indented JSON.
+    """
+    json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+    print()
@@ -0,0 +1,104 @@
+"""
+Runs the whole benchmark suite headless and writes one JSON document,
+so results can be compared between releases.
+
+Run from the repository root:
+    python -m benchmarks.run_all --output bench_output.json
+    python -m benchmarks.run_all --only bench_frames bench_layout
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from benchmarks.common import metadata
+
+BENCHMARKS: tuple[str, ...] = (
+    "bench_startup",
+    "bench_ws_ingest",
+    "bench_http_ingest",
+    "bench_replay",
+    "bench_history",
+    "bench_workers",
+    "bench_ingest",
+    "bench_layout",
+    "bench_frames",
+    "bench_render",
+    "bench_screens",
+    "bench_recall",
+    "bench_folding",
+    "bench_filter",
+    "bench_jitter",
+    "bench_pool",
+    "bench_scheduler",
+    "bench_memory",
+    "bench_model_memory",
+    "stress_lanes",
+    "soak_display",
+)
+
+
+# Runs one benchmark and stores its result in the file named by the first argument
+CHILD_SCRIPT: str = "import json, sys, importlib; json.dump(importlib.import_module(sys.argv[2]).run(), open(sys.argv[1], 'w'))"
+
+
+def run_isolated(name: str) -> dict[str, Any]:
+    """
+    Runs one benchmark in a fresh interpreter, so memory and Qt state of one cannot skew another.
+
+    Args:
+        name (str): Module of the benchmarks package to run.
+
+    Returns:
+        dict[str, Any]: The result of the benchmark, or an error description.
+    """
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        completed = subprocess.run([sys.executable, "-c", CHILD_SCRIPT, result_path, f"benchmarks.{name}"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            return {"error": completed.stderr[-4000:]}
+        with open(result_path, encoding="utf-8") as result_file:
+            return json.load(result_file)
+    finally:
+        os.remove(result_path)
+
+
+def run_all(names: tuple[str, ...] = BENCHMARKS) -> dict[str, Any]:
+    """
+    Runs the named benchmarks one after another, each in its own process.
+    A failing benchmark is reported in the document instead of aborting the suite.
+
+    Args:
+        names (tuple[str, ...], optional): Modules of the benchmarks package to run. Defaults to BENCHMARKS.
+
+    Returns:
+        dict[str, Any]: Metadata and the results of every benchmark.
+    """
+    document: dict[str, Any] = {"metadata": metadata(), "results": {}}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        document["results"][name] = run_isolated(name)
+        document["results"][name + "_seconds"] = round(time.perf_counter() - start, 2)
+    return document
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the headless danmaku benchmark suite.")
+    parser.add_argument("--output", help="Write the JSON document to this file instead of stdout.")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Run only these benchmarks.")
+    arguments = parser.parse_args()
+
+    document = run_all(tuple(arguments.only) if arguments.only else BENCHMARKS)
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,283 @@
+"""
+Soak test of the display lifecycle: feeds danmakus at a steady rate over WebSocket through
+DanmakuSource into a MainWindow and its DanmakuManagers, recalling some of them by ID and by
+sender along the way, and samples over time the resident memory, the live QObjects per class,
+the receivers of every danmaku_signal signal and the sizes of the bookkeeping structures.
+
+Once the warm-up is over every series must level off. A series whose lowest value in the last
+third of the run is above its highest value in the first third, by more than its tolerance,
+keeps growing and is reported as a leak; run directly, the test then exits with a non-zero status.
+The default run is short enough for the suite; leaks of a few objects per hour need a long one.
+
+Run from the repository root:
+    python -m benchmarks.soak_display
+    python -m benchmarks.soak_display --duration 3600 --rate 2000 --render-mode widget
+"""
+import argparse
+import contextlib
+import gc
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+from benchmarks.common import application, print_json, process_events_for, rss_bytes
+
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+from websockets.sync.client import connect
+
+import main
+from src.danmaku_manager import RENDER_MODE_CANVAS, RENDER_MODE_WIDGET
+from src.danmaku_quality import danmaku_quality_governor
+from src.danmaku_registry import danmaku_registry
+from src.danmaku_signal import DanmakuSignal, danmaku_signal
+from src.danmaku_source import DEFAULT_PORT
+
+DURATION_S: float = 40 # Per render mode in the suite
+WARMUP_S: float = 15 # Samples taken before are reported but not judged
+SAMPLE_INTERVAL_S: float = 2
+RATE: float = 1000 # Danmakus sent per second
+MAX_ON_SCREEN: int = 2000 # Admission cap per screen, as set with DANMAKU_MAX_ON_SCREEN
+SEND_INTERVAL_S: float = 0.05 # One bulk frame per interval
+SPEED: int = 1500 # Fast danmakus leave the screen, and free their items, within about a second
+SENDERS: int = 50
+RECALL_INTERVAL_S: float = 5 # A bulk recall of one sender this often
+DELETE_INTERVAL_MS: int = 200 # A recall of the newest listed danmaku by ID this often
+# Growth tolerated between the first and the last third of a series: the larger of an absolute
+# and a relative margin, so that counts swinging with the traffic are not taken for leaks.
+# Signal receivers do not depend on the traffic, so any growth of theirs is reported
+RSS_SLACK_BYTES: int = 16 << 20
+COUNT_SLACK: int = 32
+RELATIVE_SLACK: float = 0.1
+
+
+def signal_names() -> list[str]:
+    """
+    Returns the names of the signals declared by DanmakuSignal.
+    """
+    return sorted(name for name, value in vars(DanmakuSignal).items() if isinstance(value, pyqtSignal))
+
+
+def count_qobjects(roots: list[QObject]) -> Counter[str]:
+    """
+    Counts the QObjects in the trees of the given roots by class, as seen by Qt.
+    """
+    counts: Counter[str] = Counter()
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        counts[obj.metaObject().className()] += 1
+        stack.extend(obj.children())
+    return counts
+
+
+def count_wrappers() -> Counter[str]:
+    """
+    Counts the Python wrappers of QObjects by type, which also finds objects without a parent.
+    """
+    return Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, QObject))
+
+
+def sample(window: "main.MainWindow") -> dict[str, float]:
+    """
+    Takes one sample of every series.
+
+    Args:
+        window (main.MainWindow): The panel under test.
+
+    Returns:
+        dict[str, float]: The value of each series, keyed by its name.
+    """
+    gc.collect()
+    values: dict[str, float] = {
+        "rss_bytes": rss_bytes(),
+        "python_objects": len(gc.get_objects()),
+        "registry_ids": len(danmaku_registry),
+        "list_rows": window.danmaku_list_model.rowCount(),
+        "list_tombstones": window.danmaku_list_model.tombstones,
+    }
+    app = application()
+    roots = [app, danmaku_signal, danmaku_quality_governor, *app.topLevelWidgets()]
+    values.update((f"qobjects.{name}", count) for name, count in count_qobjects(roots).items())
+    values.update((f"wrappers.{name}", count) for name, count in count_wrappers().items())
+    values.update((f"receivers.{name}", danmaku_signal.receivers(getattr(danmaku_signal, name)))
+                  for name in signal_names())
+    return values
+
+
+def growing(samples: list[dict[str, float]]) -> list[str]:
+    """
+    Finds the series that keep growing: the lowest value of the last third of the samples
+    is above the highest value of the first third plus the tolerance of the series.
+
+    Args:
+        samples (list[dict[str, float]]): Samples taken after the warm-up, oldest first.
+
+    Returns:
+        list[str]: The names of the growing series.
+    """
+    third = len(samples) // 3
+    if third == 0:
+        return []
+    names = set().union(*samples)
+    leaks = []
+    for name in sorted(names):
+        first = max(values.get(name, 0) for values in samples[:third])
+        last = min(values.get(name, 0) for values in samples[-third:])
+        if name.startswith("receivers."):
+            slack = 0.0
+        else:
+            slack = max(RSS_SLACK_BYTES if name == "rss_bytes" else COUNT_SLACK, first * RELATIVE_SLACK)
+        if last > first + slack:
+            leaks.append(name)
+    return leaks
+
+
+def feed(stop: threading.Event, rate: float, counts: Counter[str]) -> None:
+    """
+    Sends danmakus in bulk frames at a steady rate, and a recall of one sender every RECALL_INTERVAL_S,
+    until stopped. The replies to the recalls are read so they never pile up.
+    """
+    per_frame = max(1, round(rate * SEND_INTERVAL_S))
+    with connect(f"ws://127.0.0.1:{DEFAULT_PORT}", max_size=None) as websocket:
+        start = next_recall = time.monotonic()
+        frames = 0
+        while not stop.is_set():
+            first = counts["sent"]
+            websocket.send(json.dumps([{"text": f"soak {i}", "speed": SPEED, "sender": f"viewer{i % SENDERS}"}
+                                       for i in range(first, first + per_frame)]))
+            counts["sent"] += per_frame
+            if time.monotonic() >= next_recall:
+                websocket.send(json.dumps({"type": "recall", "sender": f"viewer{counts['recalls'] % SENDERS}"}))
+                counts["recalls"] += 1
+                next_recall += RECALL_INTERVAL_S
+            try:
+                while True:
+                    websocket.recv(timeout=0)
+            except TimeoutError:
+                pass
+            frames += 1
+            # Paced against the start, so a slow send is caught up instead of lowering the rate
+            stop.wait(max(0.0, start + frames * SEND_INTERVAL_S - time.monotonic()))
+
+
+def soak(render_mode: str, duration: float, rate: float, warmup: float,
+         interval: float = SAMPLE_INTERVAL_S, max_on_screen: int | None = MAX_ON_SCREEN) -> dict[str, Any]:
+    """
+    Runs one MainWindow under a steady load and judges the series sampled after the warm-up.
+
+    Args:
+        render_mode (str): RENDER_MODE_CANVAS or RENDER_MODE_WIDGET.
+        duration (float): Seconds the danmakus are sent for, warm-up included.
+        rate (float): Danmakus sent per second.
+        warmup (float): Seconds at the start whose samples are not judged.
+        interval (float, optional): Seconds between two samples. Defaults to SAMPLE_INTERVAL_S.
+        max_on_screen (int | None, optional): Live danmakus admitted per window. Defaults to MAX_ON_SCREEN.
+
+    Returns:
+        dict[str, Any]: Traffic counts, the first, last and highest value of each series and the growing ones.
+
+    Raises:
+        ValueError: If warmup leaves fewer than three samples to judge.
+    """
+    if (duration - warmup) / interval < 3:
+        raise ValueError("The run must last at least three sample intervals after the warm-up.")
+    application()
+    window = main.MainWindow(render_mode=render_mode, max_on_screen=max_on_screen)
+    window.show()
+    window.start_services()
+    process_events_for(0.5) # Let the server start listening
+
+    counts: Counter[str] = Counter()
+
+    def on_batch(models: list) -> None:
+        counts["delivered"] += len(models)
+
+    def delete_newest() -> None:
+        model = window.danmaku_list_model
+        danmaku_id = model.data(model.index(model.rowCount() - 1), Qt.UserRole)
+        if danmaku_id is not None:
+            danmaku_signal.danmaku_signal_delete.emit(danmaku_id)
+            counts["deleted"] += 1
+
+    samples: list[tuple[float, dict[str, float]]] = []
+    start = time.monotonic()
+
+    def take_sample() -> None:
+        samples.append((time.monotonic() - start, sample(window)))
+
+    danmaku_signal.danmaku_signal_add_batch.connect(on_batch)
+    delete_timer = QTimer()
+    delete_timer.timeout.connect(delete_newest)
+    delete_timer.start(DELETE_INTERVAL_MS)
+    sample_timer = QTimer()
+    sample_timer.timeout.connect(take_sample)
+    take_sample()
+    sample_timer.start(int(interval * 1000))
+
+    stop = threading.Event()
+    feeder = threading.Thread(target=feed, args=(stop, rate, counts), daemon=True)
+    feeder.start()
+    process_events_for(duration)
+    stop.set()
+    feeder.join()
+    sample_timer.stop()
+    delete_timer.stop()
+    danmaku_signal.danmaku_signal_add_batch.disconnect(on_batch)
+    elapsed = time.monotonic() - start
+
+    window.close()
+    window.deleteLater()
+    process_events_for(0.5)
+
+    judged = [values for at, values in samples if at >= warmup]
+    series = {}
+    for name in sorted(set().union(*(values for _, values in samples))):
+        values = [sampled.get(name, 0) for _, sampled in samples]
+        series[name] = {"start": values[0], "end": values[-1], "max": max(values)}
+    return {
+        "render_mode": render_mode,
+        "duration_s": round(elapsed, 1),
+        "rate": rate,
+        "sent": counts["sent"],
+        "delivered": counts["delivered"],
+        "delivered_per_s": round(counts["delivered"] / elapsed),
+        "deleted": counts["deleted"],
+        "sender_recalls": counts["recalls"],
+        "samples": len(samples),
+        "judged_samples": len(judged),
+        "series": series,
+        "growing": growing(judged),
+    }
+
+
+def run(render_modes: tuple[str, ...] = (RENDER_MODE_CANVAS, RENDER_MODE_WIDGET), duration: float = DURATION_S,
+        rate: float = RATE, warmup: float = WARMUP_S) -> dict[str, Any]:
+    """
+    Soaks the display in each render mode, one after the other.
+
+    Returns:
+        dict[str, Any]: The result of each render mode and every growing series, prefixed by its mode.
+    """
+    # The panel logs what it does; keep stdout for the JSON result
+    with contextlib.redirect_stdout(sys.stderr):
+        results: dict[str, Any] = {mode: soak(mode, duration, rate, warmup) for mode in render_modes}
+    results["growing"] = [f"{mode}:{name}" for mode in render_modes for name in results[mode]["growing"]]
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Soak the danmaku display and detect growing resources.")
+    parser.add_argument("--duration", type=float, default=DURATION_S, help="Seconds per render mode.")
+    parser.add_argument("--rate", type=float, default=RATE, help="Danmakus sent per second.")
+    parser.add_argument("--warmup", type=float, default=WARMUP_S, help="Seconds before samples are judged.")
+    parser.add_argument("--render-mode", choices=(RENDER_MODE_CANVAS, RENDER_MODE_WIDGET), action="append",
+                        help="Render mode to soak, may be repeated. Defaults to both.")
+    arguments = parser.parse_args()
+
+    results = run(tuple(arguments.render_mode or (RENDER_MODE_CANVAS, RENDER_MODE_WIDGET)),
+                  arguments.duration, arguments.rate, arguments.warmup)
+    print_json(results)
+    sys.exit(1 if results["growing"] else 0)
@@ -0,0 +1,100 @@
+"""
+Stress test of LaneAllocator: places a large number of danmakus with random widths,
+speeds and heights, then proves analytically that no two of them ever overlap.
+Exits with a non-zero status if an overlap is found.
+
+Run from the repository root:
+    python -m benchmarks.stress_lanes
+"""
+import random
+import sys
+import time
+from typing import Any
+
+from benchmarks.common import print_json
+from src.danmaku_lanes import LaneAllocator
+
+CANVAS_WIDTH: int = 1920
+LANE_COUNT: int = 40
+DANMAKU_COUNT: int = 100000
+ARRIVAL_RATE: float = 25 # Danmakus offered per simulated second
+
+
+class Placed:
+    """
+    A danmaku placed by the allocator, with everything needed to know where it is at any time.
+    """
+    def __init__(self, lane: int, lanes_needed: int, start: float, width: int, speed: float) -> None:
+        self.lane: int = lane
+        self.lanes_needed: int = lanes_needed
+        self.start: float = start
+        self.width: int = width
+        self.speed: float = speed
+        self.exit: float = start + (CANVAS_WIDTH + width) / speed
+
+    def x_at(self, now: float) -> float:
+        return CANVAS_WIDTH - self.speed * (now - self.start)
+
+
+def overlaps(first: Placed, second: Placed) -> bool:
+    """
+    Checks whether a later danmaku ever touches an earlier one while both are on the canvas.
+    The distance between them is linear in time, so checking both ends of the shared interval suffices.
+    """
+    begin, end = second.start, min(first.exit, second.exit)
+    if begin >= end:
+        return False
+    return any(second.x_at(now) < first.x_at(now) + first.width - 1e-6 for now in (begin, end))
+
+
+def run(seed: int = 0) -> dict[str, Any]:
+    """
+    Runs the simulation.
+
+    Returns:
+        dict[str, Any]: Placed and dropped danmakus, overlapping pairs and allocation cost.
+    """
+    rng = random.Random(seed)
+    allocator = LaneAllocator(CANVAS_WIDTH, LANE_COUNT, gap=0)
+    lanes: list[list[Placed]] = [[] for _ in range(LANE_COUNT)]
+    now = 0.0
+    placed = dropped = 0
+    allocate_time = 0.0
+    for _ in range(DANMAKU_COUNT):
+        now += rng.expovariate(ARRIVAL_RATE)
+        width = rng.randint(20, 900)
+        speed = rng.uniform(80, 900)
+        lanes_needed = 1 if rng.random() < 0.9 else rng.randint(2, 3)
+        begin = time.perf_counter()
+        lane = allocator.allocate(width, speed, now, lanes_needed)
+        allocate_time += time.perf_counter() - begin
+        if lane is None:
+            dropped += 1
+            continue
+        placed += 1
+        item = Placed(lane, lanes_needed, now, width, speed)
+        for covered in range(lane, lane + lanes_needed):
+            lanes[covered].append(item)
+
+    overlapping = 0
+    for lane_items in lanes:
+        # Items of a lane are in start order; compare each one with every earlier item still on screen
+        live: list[Placed] = []
+        for item in lane_items:
+            live = [other for other in live if other.exit > item.start]
+            overlapping += sum(overlaps(other, item) for other in live)
+            live.append(item)
+
+    return {
+        "offered": DANMAKU_COUNT,
+        "placed": placed,
+        "dropped": dropped,
+        "overlapping_pairs": overlapping,
+        "allocation_us": round(allocate_time / DANMAKU_COUNT * 1e6, 3),
+    }
+
+
+if __name__ == '__main__':
+    results = run()
+    print_json(results)
+    sys.exit(1 if results["overlapping_pairs"] else 0)
@@ -1,26 +1,130 @@
 import sys
+
+# src.danmaku_workers.WORKER_ARGUMENT, spelled out so that a GUI start does not import the worker and websockets
+if __name__ == '__main__' and sys.argv[1:2] == ["--danmaku-ingest-worker"]:
+    # A frozen build runs its ingest workers by starting itself again; they are dispatched before Qt is loaded
+    from src.danmaku_workers import main as run_ingest_worker
+    run_ingest_worker(sys.argv[2:])
+    sys.exit(0)
+
+import os
+import time
 import collections.abc
-import random
+from collections import deque
+from typing import Callable, TYPE_CHECKING
 
 from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QHBoxLayout, QVBoxLayout, QWidget, QLineEdit, QLabel
-from PyQt5.QtWidgets import QListWidget, QListWidgetItem
+from PyQt5.QtWidgets import QListView, QAbstractItemView, QComboBox
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QCloseEvent # Added for type hinting
+from PyQt5.QtGui import QCloseEvent, QPaintEvent # Added for type hinting
 
 from src.danmaku_window import DanmakuWindow
-from src.danmaku_source import DanmakuSource
+from src.danmaku_manager import DanmakuManager, RENDER_MODE_CANVAS
+from src.danmaku_view import ScreenView, VIEW_SEPARATE, parse_screen_views
+from src.danmaku_recording import DanmakuRecorder
+from src.danmaku_folding import DanmakuFolder
+from src.danmaku_filter import DanmakuFilter
+from src.danmaku_jitter import DanmakuJitterBuffer
+from src.danmaku_history import DanmakuHistoryLog, HistoryEntry
 from src.danmaku_model import DanmakuModel
+from src.danmaku_recall import RecallPredicate, RecallReply
 from src.danmaku_signal import danmaku_signal
+from src.danmaku_registry import danmaku_registry
+from src.danmaku_list_model import DanmakuListModel, DEFAULT_HISTORY_CAPACITY
+from src.danmaku_metrics import danmaku_metrics
+from src.danmaku_pixmap_cache import danmaku_pixmap_cache
+from src.danmaku_quality import danmaku_quality_governor, QualityLevel
+from src.danmaku_scheduler import DanmakuScheduler
 
-from PyHotKey import Key, keyboard
+if TYPE_CHECKING: # Imported when the server starts, websockets and asyncio are slow to import
+    from src.danmaku_source import DanmakuSource
 
 collections.Iterable = collections.abc.Iterable
 
+# Interval at which the live danmaku count is reported to the admission stage
+ADMISSION_REPORT_INTERVAL_MS: int = 50
+
+# Scrolling the danmaku list to the bottom is coalesced to at most once per frame
+LIST_SCROLL_INTERVAL_MS: int = 16
+
+# Batch progress in the panel is refreshed at most this often
+BATCH_PROGRESS_INTERVAL_MS: int = 200
+
+# Seconds of danmakus removed by the "recent" bulk recall of the panel
+RECENT_RECALL_SECONDS: float = 30
+# Rows of recalled danmakus hidden in the list per event loop turn; a bulk recall clears the screens
+# within a frame and the list over the next turns, as hiding a row alone costs a few microseconds
+LIST_REMOVAL_CHUNK: int = 500
+# Hidden rows in the list after which it is compacted; each one slows down every later append a little,
+# while compacting costs a few milliseconds and scrolls the list back to the bottom
+LIST_COMPACT_TOMBSTONES: int = 500
+
+# Setting this environment variable to a port enables metrics, served there and shown in the panel
+METRICS_PORT_ENV: str = "DANMAKU_METRICS_PORT"
+STATS_REFRESH_INTERVAL_MS: int = 1000
+
+# Setting this environment variable to a port accepts NDJSON danmakus POSTed there, see src/danmaku_http.py
+HTTP_PORT_ENV: str = "DANMAKU_HTTP_PORT"
+
+# Setting this environment variable to a number caps the danmakus live on each screen; the server holds back the rest
+MAX_ON_SCREEN_ENV: str = "DANMAKU_MAX_ON_SCREEN"
+
+# Setting this environment variable to a file path records every received message there, see src/danmaku_replay.py
+RECORD_PATH_ENV: str = "DANMAKU_RECORD_PATH"
+
+# Setting this environment variable to a frame time in milliseconds, such as 16.6, lowers the rendering quality
+# while frames run over it; src.danmaku_quality.DEFAULT_FRAME_BUDGET_MS is one frame at 60 frames per second
+FRAME_BUDGET_ENV: str = "DANMAKU_FRAME_BUDGET_MS"
+
+# Setting this environment variable to a number of seconds folds repeated danmakus within that window
+FOLD_WINDOW_ENV: str = "DANMAKU_FOLD_WINDOW"
+
+# Setting this environment variable to a number of processes moves WebSocket serving and parsing out of the GUI process
+INGEST_WORKERS_ENV: str = "DANMAKU_INGEST_WORKERS"
+
+# Setting this environment variable to a keyword file blocks or masks matching danmakus, see src/danmaku_filter.py
+KEYWORD_PATH_ENV: str = "DANMAKU_KEYWORD_PATH"
+
+# Setting this environment variable to a number of seconds holds timestamped danmakus that long to smooth out bursty relays
+JITTER_LATENCY_ENV: str = "DANMAKU_JITTER_LATENCY"
+
+# Setting this environment variable to a file path keeps every displayed danmaku there, browsable from the panel
+HISTORY_PATH_ENV: str = "DANMAKU_HISTORY_PATH"
+HISTORY_PAGE_SIZE: int = 50
+# Blocks of the history log searched per event loop turn; a search with few matches goes on over the next turns,
+# as reading and matching a block costs a few milliseconds
+HISTORY_SCAN_BLOCKS: int = 2
+
+# Per-screen view settings such as "1:share=0.5,max=200;2:separate", see src/danmaku_view.py.
+# Screens not listed mirror the layout of screen 0
+SCREEN_VIEWS_ENV: str = "DANMAKU_SCREEN_VIEWS"
+
 class MainWindow(QMainWindow):
-    def __init__(self) -> None:
+    def __init__(self, history_capacity: int = DEFAULT_HISTORY_CAPACITY, metrics_port: int | None = None,
+                 record_path: str | None = None, fold_window: float | None = None,
+                 frame_budget_ms: float | None = None, ingest_workers: int = 0,
+                 keyword_path: str | None = None, jitter_latency: float | None = None,
+                 screen_views: dict[int, ScreenView] | None = None, history_path: str | None = None,
+                 render_mode: str = RENDER_MODE_CANVAS, http_port: int | None = None,
+                 max_on_screen: int | None = None) -> None:
         """
         Initializes the main window of the Danmaku Control Panel.
         Sets up the UI elements, layout, styles, and connects signals.
+
+        Args:
+            history_capacity (int, optional): Maximum number of danmakus kept in the list. Defaults to DEFAULT_HISTORY_CAPACITY.
+            metrics_port (int | None, optional): Port serving Prometheus metrics; None leaves metrics disabled. Defaults to None.
+            record_path (str | None, optional): File recording every received message; None records nothing. Defaults to None.
+            fold_window (float | None, optional): Seconds during which repeated danmakus are folded into one; None disables folding. Defaults to None.
+            frame_budget_ms (float | None, optional): Frame time above which rendering quality is lowered; None keeps full quality. Defaults to None.
+            ingest_workers (int, optional): Worker processes serving WebSocket clients, 0 serves them in a thread of this process. Defaults to 0.
+            keyword_path (str | None, optional): Keyword file of the moderation filter, reloaded when edited; None disables filtering. Defaults to None.
+            jitter_latency (float | None, optional): Seconds timestamped danmakus are held to smooth bursts; None shows them on arrival. Defaults to None.
+            screen_views (dict[int, ScreenView] | None, optional): View settings keyed by screen index; screens without one mirror screen 0. Defaults to None.
+            history_path (str | None, optional): File logging every displayed danmaku, paged and searched from the panel; None keeps no history. Defaults to None.
+            render_mode (str, optional): Render mode of the danmaku windows; only canvas mode layouts are shared between screens. Defaults to RENDER_MODE_CANVAS.
+            http_port (int | None, optional): Port of the HTTP NDJSON ingest endpoint; None leaves it disabled. Defaults to None.
+            max_on_screen (int | None, optional): Danmakus live on each screen beyond which the server holds back the next ones; None for no limit. Defaults to None.
         """
         super().__init__()
         self.setWindowTitle("弹幕控制面板")
@@ -59,7 +163,7 @@ class MainWindow(QMainWindow):
                 color: #333333;
                 font-weight: bold;
             }
-            QListWidget {
+            QListView {
                 border: 1px solid #dcdcdc;
                 border-radius: 4px;
                 background-color: #ffffff;
@@ -67,14 +171,12 @@ class MainWindow(QMainWindow):
             }
         """)
 
-        screen_count = QApplication.desktop().screenCount()
+        if frame_budget_ms is not None:
+            danmaku_quality_governor.enable(frame_budget_ms)
+
+        # Created by create_danmaku_windows once the panel is shown
         self.danmaku_windows: list[DanmakuWindow] = []
-        for i in range(screen_count):
-            danmaku_window = DanmakuWindow(i)
-            self.danmaku_windows.append(danmaku_window)
-        
         self.danmaku_windows_visible: bool = True
-        self.danmaku_list_items: dict[str, QListWidgetItem] = {}  # Stores mapping from danmaku ID to list item
 
         main_widget = QWidget()
         main_layout = QVBoxLayout(main_widget)
@@ -113,22 +215,128 @@ class MainWindow(QMainWindow):
         send_button.setShortcut("Ctrl+Enter")
         send_button.setStyleSheet("background-color: #2196F3;")
         main_layout.addWidget(send_button)
+
+        # Batches being sent, with their progress; they can be paused or cancelled together
+        self.danmaku_scheduler = DanmakuScheduler(self)
+        self.danmaku_scheduler.danmakus_due.connect(self.display_danmaku_batch)
+        self.batch_progress_timer = QTimer(self)
+        self.batch_progress_timer.setSingleShot(True)
+        self.batch_progress_timer.setInterval(BATCH_PROGRESS_INTERVAL_MS)
+        self.batch_progress_timer.timeout.connect(self.show_batch_progress)
+        self.danmaku_scheduler.batch_progress.connect(self.schedule_batch_progress)
+        self.batches_paused: bool = False
+        batch_control_layout = QHBoxLayout()
+        self.batch_progress_label = QLabel()
+        self.batch_progress_label.setStyleSheet("color: #555; font-size: 12px; font-weight: normal;")
+        self.pause_batches_button = QPushButton("暂停")
+        self.pause_batches_button.clicked.connect(self.toggle_batches_paused)
+        cancel_batches_button = QPushButton("取消发送")
+        cancel_batches_button.setStyleSheet("background-color: #f44336;")
+        cancel_batches_button.clicked.connect(self.cancel_batches)
+        batch_control_layout.addWidget(self.batch_progress_label, 1)
+        batch_control_layout.addWidget(self.pause_batches_button)
+        batch_control_layout.addWidget(cancel_batches_button)
+        main_layout.addLayout(batch_control_layout)
+        self.show_batch_progress()
         
         # Add danmaku list label
         danmaku_list_label = QLabel("弹幕列表：")
         main_layout.addWidget(danmaku_list_label)
         
-        # Add danmaku list widget
-        self.danmaku_list = QListWidget()
+        # Add danmaku list view, backed by a bounded model indexed by danmaku ID
+        self.danmaku_list_model = DanmakuListModel(history_capacity, self)
+        self.danmaku_list = QListView()
+        self.danmaku_list.setModel(self.danmaku_list_model)
+        self.danmaku_list.setUniformItemSizes(True)  # Lets the view skip measuring every row
         self.danmaku_list.setMinimumHeight(100)
-        self.danmaku_list.setSelectionMode(QListWidget.SingleSelection)
+        self.danmaku_list.setSelectionMode(QAbstractItemView.SingleSelection)
         main_layout.addWidget(self.danmaku_list)
+
+        self.list_scroll_timer = QTimer(self)
+        self.list_scroll_timer.setSingleShot(True)
+        self.list_scroll_timer.setInterval(LIST_SCROLL_INTERVAL_MS)
+        self.list_scroll_timer.timeout.connect(self.danmaku_list.scrollToBottom)
         
         # Add recall button
         recall_button = QPushButton("撤回选中弹幕")
         recall_button.clicked.connect(self.recall_selected_danmaku)
         recall_button.setStyleSheet("background-color: #FF9800;")
         main_layout.addWidget(recall_button)
+
+        # Bulk recall of every danmaku matching a text or a sender, received recently, or all of them
+        bulk_recall_layout = QHBoxLayout()
+        self.recall_field = QComboBox()
+        self.recall_field.addItem("包含文本", "contains")
+        self.recall_field.addItem("完全相同", "text")
+        self.recall_field.addItem("发送者", "sender")
+        self.recall_input = QLineEdit()
+        self.recall_input.setPlaceholderText("批量撤回的文本或发送者")
+        self.recall_input.returnPressed.connect(self.recall_from_panel)
+        bulk_recall_button = QPushButton("批量撤回")
+        bulk_recall_button.clicked.connect(self.recall_from_panel)
+        bulk_recall_button.setStyleSheet("background-color: #FF9800;")
+        recent_recall_button = QPushButton(f"撤回最近{RECENT_RECALL_SECONDS:.0f}秒")
+        recent_recall_button.clicked.connect(self.recall_recent)
+        recall_all_button = QPushButton("全部撤回")
+        recall_all_button.clicked.connect(self.recall_all)
+        recall_all_button.setStyleSheet("background-color: #f44336;")
+        bulk_recall_layout.addWidget(self.recall_field)
+        bulk_recall_layout.addWidget(self.recall_input, 1)
+        bulk_recall_layout.addWidget(bulk_recall_button)
+        bulk_recall_layout.addWidget(recent_recall_button)
+        bulk_recall_layout.addWidget(recall_all_button)
+        main_layout.addLayout(bulk_recall_layout)
+        self._list_removals: deque[int] = deque()
+        self.list_removal_timer = QTimer(self)
+        self.list_removal_timer.setSingleShot(True)
+        self.list_removal_timer.setInterval(0)
+        self.list_removal_timer.timeout.connect(self.remove_recalled_from_list)
+        self.recall_result_label = QLabel()
+        self.recall_result_label.setStyleSheet("color: #555; font-size: 12px; font-weight: normal;")
+        main_layout.addWidget(self.recall_result_label)
+
+        # Persistent history, read page by page from the log; only shown while a history log is open
+        self.history_log: DanmakuHistoryLog | None = None
+        self.history_panel = QWidget()
+        history_layout = QVBoxLayout(self.history_panel)
+        history_layout.setContentsMargins(0, 0, 0, 0)
+        history_search_layout = QHBoxLayout()
+        self.history_label = QLabel("历史记录：")
+        self.history_search_input = QLineEdit()
+        self.history_search_input.setPlaceholderText("搜索历史弹幕")
+        self.history_search_input.returnPressed.connect(self.search_history)
+        newer_history_button = QPushButton("较新")
+        newer_history_button.clicked.connect(self.show_newer_history)
+        older_history_button = QPushButton("较旧")
+        older_history_button.clicked.connect(self.show_older_history)
+        history_search_layout.addWidget(self.history_label)
+        history_search_layout.addWidget(self.history_search_input, 1)
+        history_search_layout.addWidget(newer_history_button)
+        history_search_layout.addWidget(older_history_button)
+        history_layout.addLayout(history_search_layout)
+        self.history_list_model = DanmakuListModel(HISTORY_PAGE_SIZE, self)
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_list_model)
+        self.history_list.setUniformItemSizes(True)
+        self.history_list.setMinimumHeight(100)
+        self.history_list.setSelectionMode(QAbstractItemView.SingleSelection)
+        history_layout.addWidget(self.history_list)
+        redisplay_button = QPushButton("重新显示选中弹幕")
+        redisplay_button.clicked.connect(self.redisplay_selected_history)
+        history_layout.addWidget(redisplay_button)
+        self.history_panel.setVisible(False)
+        main_layout.addWidget(self.history_panel)
+        # The page shown, newest first, and the positions the newer pages started before
+        self._history_page: list[HistoryEntry] = []
+        self._history_before: int | None = None
+        self._newer_history_pages: list[int | None] = []
+        # The search filling the page and the position it continues before, 0 once it reached the start of the log
+        self._history_query: str = ""
+        self._history_scan_position: int = 0
+        self.history_scan_timer = QTimer(self)
+        self.history_scan_timer.setSingleShot(True)
+        self.history_scan_timer.setInterval(0)
+        self.history_scan_timer.timeout.connect(self.scan_history)
         
         buttons_layout = QHBoxLayout()
         hide_button = QPushButton("隐藏/显示弹幕")
@@ -143,22 +351,155 @@ class MainWindow(QMainWindow):
         buttons_layout.addWidget(exit_button)
         main_layout.addLayout(buttons_layout)
         
+        # Rendering quality chosen by the governor
+        self.quality_label = QLabel()
+        self.quality_label.setStyleSheet("color: #555; font-size: 12px; font-weight: normal;")
+        main_layout.addWidget(self.quality_label)
+        self.quality_label.setVisible(danmaku_quality_governor.enabled)
+        self.show_quality_level(danmaku_quality_governor.level)
+        danmaku_quality_governor.level_changed.connect(self.show_quality_level)
+
+        # Live statistics, only shown while metrics are enabled
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("color: #555; font-size: 12px; font-weight: normal;")
+        self.stats_label.setVisible(False)
+        main_layout.addWidget(self.stats_label)
+        self._last_received: float = 0
+
         shortcut_label = QLabel("快捷键：Ctrl+Enter 发送 | Ctrl+Shift+Q 退出")
         shortcut_label.setStyleSheet("color: #777; font-size: 12px;")
         shortcut_label.setAlignment(Qt.AlignRight)
         main_layout.addWidget(shortcut_label)
         
         self.setCentralWidget(main_widget)
-        
-        self.danmaku_source = DanmakuSource()
-        self.danmaku_source.start()
 
-        keyboard.suppress_hotkey = True
-        keyboard.register_hotkey([Key.ctrl_l,Key.shift_l,"q"],None,self.close_all)
+        # Keep the admission stage informed about the room left on screen, once the server runs
+        self.admission_report_timer = QTimer(self)
+        self.admission_report_timer.setInterval(ADMISSION_REPORT_INTERVAL_MS)
+        self.admission_report_timer.timeout.connect(self.report_on_screen_count)
+
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(STATS_REFRESH_INTERVAL_MS)
+        self.stats_timer.timeout.connect(self.update_stats_panel)
+
+        # The panel is shown first; overlays, server and hotkeys start one per event loop turn after its first paint
+        self.danmaku_source: "DanmakuSource | None" = None
+        self.record_path: str | None = record_path
+        self.fold_window: float | None = fold_window
+        self.ingest_workers: int = ingest_workers
+        self.keyword_path: str | None = keyword_path
+        self.metrics_port: int | None = metrics_port
+        self.jitter_latency: float | None = jitter_latency
+        self.screen_views: dict[int, ScreenView] = screen_views or {}
+        self.history_path: str | None = history_path
+        self.render_mode: str = render_mode
+        self.http_port: int | None = http_port
+        self.max_on_screen: int | None = max_on_screen
+        self._startup_steps: deque[Callable[[], None]] = deque(
+            (self.create_danmaku_windows, self.open_history_log, self.start_danmaku_source, self.register_hotkeys))
+        self._startup_scheduled: bool = False
 
         # Connect signals for adding and removing danmaku
+        # Recalls are looked up by ID in the registry; natural expiry keeps the danmaku in the list
         danmaku_signal.danmaku_signal_add.connect(self.add_danmaku_and_update_list)
+        danmaku_signal.danmaku_signal_add_batch.connect(self.add_danmaku_batch_and_update_list)
+        danmaku_signal.danmaku_signal_delete.connect(danmaku_registry.recall)
         danmaku_signal.danmaku_signal_delete.connect(self.remove_danmaku_from_list)
+        danmaku_signal.danmaku_signal_fold_update.connect(self.update_folded_danmaku)
+        danmaku_signal.danmaku_signal_recall.connect(self.handle_recall_request)
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """
+        Paints the panel and, after its first paint, schedules the deferred startup steps.
+
+        Args:
+            event (QPaintEvent): The paint event.
+        """
+        super().paintEvent(event)
+        if not self._startup_scheduled:
+            self._startup_scheduled = True
+            QTimer.singleShot(0, self._run_next_startup_step)
+
+    def _run_next_startup_step(self) -> None:
+        """
+        Runs one deferred startup step and schedules the next, so the panel keeps repainting in between.
+        """
+        if self._startup_steps:
+            self._startup_steps.popleft()()
+        if self._startup_steps:
+            QTimer.singleShot(0, self._run_next_startup_step)
+
+    def start_services(self) -> None:
+        """
+        Runs every startup step that has not run yet, without waiting for the panel to be painted.
+        """
+        self._startup_scheduled = True
+        while self._startup_steps:
+            self._startup_steps.popleft()()
+
+    def create_danmaku_windows(self) -> None:
+        """
+        Creates one transparent danmaku window per screen.
+        Screen 0 lays the danmakus out; the other screens paint that layout unless their view is separate.
+        """
+        for i in range(QApplication.desktop().screenCount()):
+            screen_view = self.screen_views.get(i, ScreenView())
+            if i == 0 or screen_view.mode == VIEW_SEPARATE or self.render_mode != RENDER_MODE_CANVAS:
+                danmaku_window = DanmakuWindow(i, self.render_mode, screen_view=screen_view)
+            else:
+                danmaku_window = DanmakuWindow(i, self.render_mode, screen_view=screen_view,
+                                               shared_manager=self.danmaku_windows[0].danmaku_manager)
+            if not self.danmaku_windows_visible:
+                danmaku_window.hide()
+            self.danmaku_windows.append(danmaku_window)
+
+    def open_history_log(self) -> None:
+        """
+        Opens the history log, when requested, and shows its newest page.
+        """
+        if not self.history_path:
+            return
+        self.history_log = DanmakuHistoryLog(self.history_path)
+        self.history_panel.setVisible(True)
+        self.show_history_page(None)
+
+    def start_danmaku_source(self) -> None:
+        """
+        Starts the WebSocket server thread and, when requested, the HTTP ingest and metrics endpoints.
+        """
+        from src.danmaku_admission import DanmakuAdmission
+        from src.danmaku_source import DanmakuSource
+
+        self.danmaku_source = DanmakuSource(
+            http_port=self.http_port,
+            admission=DanmakuAdmission(max_on_screen=self.max_on_screen),
+            recorder=DanmakuRecorder(self.record_path) if self.record_path else None,
+            folder=DanmakuFolder(self.fold_window) if self.fold_window else None,
+            workers=self.ingest_workers,
+            keyword_filter=DanmakuFilter(self.keyword_path) if self.keyword_path else None,
+            jitter_buffer=DanmakuJitterBuffer(self.jitter_latency) if self.jitter_latency is not None else None)
+        self.danmaku_source.start()
+        self.admission_report_timer.start()
+        if self.danmaku_source.folder is not None:
+            danmaku_signal.danmaku_signal_finished.connect(self.forget_finished_danmaku)
+
+        if self.metrics_port is not None:
+            danmaku_metrics.start_server(port=self.metrics_port)
+            self.stats_label.setVisible(True)
+            self.stats_timer.start()
+
+    def register_hotkeys(self) -> None:
+        """
+        Registers the global Ctrl+Shift+Q hotkey.
+        PyHotKey is slow to import and needs a display server; without it the panel shortcuts still work.
+        """
+        try:
+            from PyHotKey import Key, keyboard
+        except ImportError as e:
+            print(f"Global hotkeys unavailable: {e}")
+            return
+        keyboard.suppress_hotkey = True
+        keyboard.register_hotkey([Key.ctrl_l,Key.shift_l,"q"],None,self.close_all)
 
     def close_all(self) -> None:
         """
@@ -178,14 +519,26 @@ class MainWindow(QMainWindow):
         for danmaku_window in self.danmaku_windows:
             danmaku_window.close()
         
-        if hasattr(self, 'danmaku_source') and self.danmaku_source.isRunning():
-            self.danmaku_source.quit()
+        self._startup_steps.clear() # Closed before the deferred startup finished
+        if self.danmaku_source is not None and self.danmaku_source.isRunning():
+            self.danmaku_source.stop()
             if not self.danmaku_source.wait(3000): # Wait for 3 seconds
                 self.danmaku_source.terminate() # Force terminate if not quit
                 self.danmaku_source.wait() # Wait for termination
-        
+
+        danmaku_metrics.stop_server()
+        self.history_scan_timer.stop()
+        if self.history_log is not None:
+            self.history_log.close() # Writes and syncs what is still queued
         event.accept()
 
+    @property
+    def danmaku_managers(self) -> list[DanmakuManager]:
+        """
+        The managers laying out danmakus, one per window that does not show a shared layout.
+        """
+        return [window.danmaku_manager for window in self.danmaku_windows if window.owns_manager]
+
     def toggle_danmaku_windows(self) -> None:
         """
         Toggles the visibility of all danmaku windows.
@@ -198,6 +551,61 @@ class MainWindow(QMainWindow):
             else:
                 danmaku_window.hide()
                                  
+    def report_on_screen_count(self) -> None:
+        """
+        Reports the number of live danmakus on the busiest visible window to the admission stage,
+        which uses it to enforce the maximum on-screen count.
+        """
+        active_count = max((danmaku_window.active_count for danmaku_window in self.danmaku_windows
+                            if danmaku_window.isVisible()), default=0)
+        self.danmaku_source.admission.report_on_screen(active_count)
+        if danmaku_metrics.enabled:
+            for danmaku_window in self.danmaku_windows:
+                danmaku_metrics.active_items.set(danmaku_window.active_count, window=str(danmaku_window.screen_index))
+            self.publish_metrics()
+
+    def publish_metrics(self) -> None:
+        """
+        Copies the counters kept by the pixmap cache, the quality governor and the item pools into the metrics.
+        Runs on the GUI thread, which owns that state; the metrics server only renders the published values.
+        """
+        for field, value in danmaku_pixmap_cache.stats().items():
+            danmaku_metrics.pixmap_cache.set(value, field=field)
+        danmaku_metrics.quality_level.set(danmaku_quality_governor.level_index)
+        for danmaku_window in self.danmaku_windows:
+            if not danmaku_window.owns_manager:
+                continue # Counted with the window owning the shared manager
+            for field, value in danmaku_window.danmaku_manager.item_pool.stats().items():
+                danmaku_metrics.item_pool.set(value, window=str(danmaku_window.screen_index), field=field)
+
+    def show_quality_level(self, level: QualityLevel) -> None:
+        """
+        Shows the current rendering quality level in the control panel.
+
+        Args:
+            level (QualityLevel): The current quality level.
+        """
+        self.quality_label.setText(f"渲染质量：{danmaku_quality_governor.level_index} ({level.name})")
+
+    def update_stats_panel(self) -> None:
+        """
+        Refreshes the statistics label from the metrics.
+        """
+        received = danmaku_metrics.messages_received.value()
+        rate = (received - self._last_received) * 1000 / STATS_REFRESH_INTERVAL_MS
+        self._last_received = received
+        rejected = sum(danmaku_metrics.messages_rejected.values.values())
+        active = sum(danmaku_metrics.active_items.values.values())
+        acquired = sum(manager.item_pool.acquired for manager in self.danmaku_managers)
+        reused = sum(manager.item_pool.reused for manager in self.danmaku_managers)
+        self.stats_label.setText(
+            f"接收 {rate:.0f}/s | 拒绝 {rejected:.0f} | 丢弃 {danmaku_metrics.admission_dropped.value():.0f}"
+            f" | 排队 {danmaku_metrics.queue_depth.value():.0f}"
+            f" | 缓冲 {danmaku_metrics.jitter_buffer.value(field='depth'):.0f} | 显示 {active:.0f}"
+            f" | 帧 {danmaku_metrics.frame_duration.mean() * 1000:.1f}ms"
+            f" | 延迟 {danmaku_metrics.signal_to_paint.mean() * 1000:.1f}ms"
+            f" | 复用 {reused / acquired if acquired else 0:.0%}")
+
     def add_danmaku_and_update_list(self, model: DanmakuModel) -> None:
         """
         Adds a danmaku to all visible danmaku windows and updates the central list widget.
@@ -205,55 +613,259 @@ class MainWindow(QMainWindow):
         Args:
             model (DanmakuModel): The danmaku data model to add.
         """
+        self.add_danmaku_batch_and_update_list([model])
+
+    def add_danmaku_batch_and_update_list(self, models: list[DanmakuModel]) -> None:
+        """
+        Displays a batch of received danmakus; those asking for a display delay are handed to the scheduler.
+
+        Args:
+            models (list[DanmakuModel]): The danmaku data models to add.
+        """
+        if any(model.display_delay > 0 for model in models):
+            for model in models:
+                if model.display_delay > 0:
+                    self.danmaku_scheduler.schedule(model, model.display_delay)
+            models = [model for model in models if model.display_delay <= 0]
+            if not models:
+                return
+        self.display_danmaku_batch(models)
+
+    def display_danmaku_batch(self, models: list[DanmakuModel]) -> None:
+        """
+        Adds a batch of danmakus to all visible danmaku windows and updates the central list widget in one pass.
+
+        Args:
+            models (list[DanmakuModel]): The danmaku data models to add.
+        """
         # Add to danmaku windows first
+        shown = False
         for danmaku_window in self.danmaku_windows:
             if danmaku_window.isVisible():
-                 danmaku_window.add_danmaku(model)
+                 danmaku_window.add_danmaku_batch(models)
+                 shown = True
+        if not shown and self.danmaku_source is not None and self.danmaku_source.folder is not None:
+            for model in models:
+                self.danmaku_source.folder.forget(model.danmaku_id) # Copies arriving later are listed on their own
+        if self.history_log is not None:
+            self.history_log.append(models) # Written by the log's own thread
         
-        # Add danmaku to the list
-        item_text = f"{model.danmaku_id}: {model.text}"
-        item = QListWidgetItem(item_text)
-        item.setData(Qt.UserRole, model.danmaku_id)  # Store danmaku ID as user data
-        self.danmaku_list.addItem(item)
-        self.danmaku_list.scrollToBottom()  # Scroll to the bottom
-        
-        # Store the mapping between danmaku ID and list item
-        self.danmaku_list_items[model.danmaku_id] = item
+        # Add danmakus to the list in one pass, the oldest ones are evicted beyond its capacity
+        self.danmaku_list_model.append_batch(models)
+        if not self.list_scroll_timer.isActive():
+            self.list_scroll_timer.start()  # Scroll to the bottom on the next frame
                  
-    def remove_danmaku_from_list(self, danmaku_id: str) -> None:
+    def remove_danmaku_from_list(self, danmaku_id: int) -> None:
         """
         Removes a danmaku from the central list widget based on its ID.
 
         Args:
-            danmaku_id (str): The ID of the danmaku to remove.
-        """
-        # Remove from the list
-        if danmaku_id in self.danmaku_list_items:
-            item = self.danmaku_list_items[danmaku_id]
-            row = self.danmaku_list.row(item)
-            self.danmaku_list.takeItem(row)
-            del self.danmaku_list_items[danmaku_id]
+            danmaku_id (int): The ID of the danmaku to remove.
+        """
+        if self.danmaku_source is not None and self.danmaku_source.folder is not None:
+            self.danmaku_source.folder.forget(danmaku_id) # Copies arriving later show up on their own again
+        # Remove from the list, the row is looked up by ID and hidden in place
+        row = self.danmaku_list_model.remove(danmaku_id)
+        if row >= 0:
+            self.danmaku_list.setRowHidden(row, True)
+            # A bulk recall compacts once its last row is hidden
+            if self.danmaku_list_model.tombstones >= LIST_COMPACT_TOMBSTONES and not self._list_removals:
+                self.danmaku_list_model.compact()
+                self.list_scroll_timer.start()
     
+    def forget_finished_danmaku(self, danmaku_id: int) -> None:
+        """
+        Stops folding into a danmaku that has left every screen or was dropped without being shown,
+        so repeats arriving later show up on their own.
+
+        Args:
+            danmaku_id (int): The ID of the finished danmaku.
+        """
+        self.danmaku_source.folder.forget(danmaku_id)
+
+    def update_folded_danmaku(self, updates: list[tuple[DanmakuModel, int]]) -> None:
+        """
+        Shows the new count of folded danmakus on every screen and in the list.
+
+        Args:
+            updates (list[tuple[DanmakuModel, int]]): The folded danmakus and their new counts.
+        """
+        for model, count in updates:
+            model.fold_count = count
+            danmaku_registry.refresh(model.danmaku_id)
+            self.danmaku_list_model.update(model)
+
     def recall_selected_danmaku(self) -> None:
         """
-        Recalls (removes) the currently selected danmaku from the list.
+        Recalls (removes) the currently selected danmaku from the list and from every screen.
         This emits a signal to trigger the removal process.
         """
-        selected_items = self.danmaku_list.selectedItems()
-        if not selected_items:
+        selected_indexes = self.danmaku_list.selectionModel().selectedIndexes()
+        if not selected_indexes:
             return
             
-        selected_item = selected_items[0]
-        danmaku_id = selected_item.data(Qt.UserRole)
+        selected_index = selected_indexes[0]
+        danmaku_id = selected_index.data(Qt.UserRole)
         if danmaku_id:
             # Emit signal to remove danmaku
             danmaku_signal.danmaku_signal_delete.emit(danmaku_id)
 
+    def recall_matching(self, predicate: RecallPredicate) -> int:
+        """
+        Recalls every danmaku selected by a predicate in one pass, wherever it is: queued in the source thread,
+        scheduled with a delay or in a batch, held for a lane, or on screen.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            int: The number of danmakus removed.
+        """
+        removed = {"queued": self.danmaku_source.recall_queued(predicate) if self.danmaku_source is not None else 0,
+                   "scheduled": self.danmaku_scheduler.recall(predicate)}
+        recalled_ids = set(danmaku_registry.recall_matching(predicate))
+        removed["screen"] = len(recalled_ids)
+        for danmaku_manager in self.danmaku_managers:
+            # A separate screen may still hold a danmaku that another screen shows
+            recalled_ids.update(model.danmaku_id for model in danmaku_manager.recall_held(predicate))
+        removed["held"] = len(recalled_ids) - removed["screen"]
+        self._list_removals.extend(recalled_ids)
+        self.remove_recalled_from_list()
+        if removed["scheduled"]:
+            self.show_batch_progress()
+        if danmaku_metrics.enabled:
+            for stage, count in removed.items():
+                if count:
+                    danmaku_metrics.messages_recalled.inc(count, stage=stage)
+        return sum(removed.values())
+
+    def remove_recalled_from_list(self) -> None:
+        """
+        Removes up to LIST_REMOVAL_CHUNK danmakus of a bulk recall from the list, continuing on the next turn.
+        """
+        for _ in range(min(LIST_REMOVAL_CHUNK, len(self._list_removals))):
+            self.remove_danmaku_from_list(self._list_removals.popleft())
+        if self._list_removals:
+            self.list_removal_timer.start()
+
+    def handle_recall_request(self, request: tuple[RecallPredicate, RecallReply | None]) -> None:
+        """
+        Performs a bulk recall asked for over the WebSocket control channel and answers the client.
+
+        Args:
+            request (tuple[RecallPredicate, RecallReply | None]): The predicate and the reply to call with the count removed.
+        """
+        predicate, reply = request
+        removed = self.recall_matching(predicate)
+        self.show_recall_result(removed)
+        if reply is not None:
+            reply(removed)
+
+    def recall_from_panel(self) -> None:
+        """
+        Recalls every danmaku matching the text or sender typed in the panel.
+        """
+        text = self.recall_input.text().strip()
+        if not text:
+            return
+        self.show_recall_result(self.recall_matching(RecallPredicate(**{self.recall_field.currentData(): text})))
+
+    def recall_recent(self) -> None:
+        """
+        Recalls every danmaku received within the last RECENT_RECALL_SECONDS.
+        """
+        self.show_recall_result(self.recall_matching(RecallPredicate(since=time.monotonic() - RECENT_RECALL_SECONDS)))
+
+    def recall_all(self) -> None:
+        """
+        Recalls every danmaku on screen or still on its way there.
+        """
+        self.show_recall_result(self.recall_matching(RecallPredicate(all=True)))
+
+    def show_recall_result(self, removed: int) -> None:
+        """
+        Shows how many danmakus the last bulk recall removed.
+
+        Args:
+            removed (int): The number of danmakus removed.
+        """
+        self.recall_result_label.setText(f"已撤回 {removed} 条弹幕")
+
+    def show_history_page(self, before: int | None) -> None:
+        """
+        Shows the page of the history ending before a position, newest first, filtered by the search text.
+        The page is filled by scan_history, which searches the log a few blocks per event loop turn.
+
+        Args:
+            before (int | None): The position in the log the page ends before, None for the newest page.
+        """
+        self._history_query = self.history_search_input.text().strip()
+        self._history_page = []
+        self._history_before = before
+        self._history_scan_position = len(self.history_log) if before is None else before
+        self.history_list_model.clear()
+        self.history_scan_timer.stop()
+        self.scan_history()
+
+    def scan_history(self) -> None:
+        """
+        Searches the next HISTORY_SCAN_BLOCKS blocks of the log for the page being shown,
+        continuing on the next turn until the page is full or the start of the log is reached.
+        """
+        entries, self._history_scan_position = self.history_log.scan_before(
+            self._history_scan_position, HISTORY_PAGE_SIZE - len(self._history_page), self._history_query,
+            HISTORY_SCAN_BLOCKS)
+        self._history_page.extend(entries)
+        self.history_list_model.append_batch([entry.model for entry in entries])
+        searching = len(self._history_page) < HISTORY_PAGE_SIZE and self._history_scan_position > 0
+        if searching:
+            self.history_scan_timer.start()
+        found = f"，匹配“{self._history_query}”" if self._history_query else ""
+        progress = "，搜索中…" if searching else ""
+        self.history_label.setText(f"历史记录（共 {len(self.history_log)} 条{found}{progress}）：")
+
+    def search_history(self) -> None:
+        """
+        Shows the newest history page matching the search text.
+        """
+        if self.history_log is None:
+            return
+        self._newer_history_pages.clear()
+        self.show_history_page(None)
+
+    def show_older_history(self) -> None:
+        """
+        Shows the history page preceding the current one.
+        """
+        if self.history_log is None or len(self._history_page) < HISTORY_PAGE_SIZE:
+            return # The current page is the oldest, or still being searched
+        self._newer_history_pages.append(self._history_before)
+        self.show_history_page(self._history_page[-1].seq)
+
+    def show_newer_history(self) -> None:
+        """
+        Shows the history page following the current one, or refreshes the newest page.
+        """
+        if self.history_log is None:
+            return
+        self.show_history_page(self._newer_history_pages.pop() if self._newer_history_pages else None)
+
+    def redisplay_selected_history(self) -> None:
+        """
+        Displays the selected history danmaku again, as a new danmaku.
+        """
+        selected_indexes = self.history_list.selectionModel().selectedIndexes()
+        if not selected_indexes:
+            return
+        model = self._history_page[selected_indexes[0].row()].model
+        self.display_danmaku_batch([DanmakuModel(model.text, model.color, model.size, model.speed, model.font_family,
+                                                 model.font_weight, model.font_style, model.text_decoration)])
+
     def send_batch_danmaku(self, text: str, batch_str: str, color: str = "#FFFFFF", size: int = 20) -> None:
         """
         Sends a batch of danmakus.
         The number of danmakus is determined by batch_str.
-        Each danmaku is scheduled with a random delay.
+        The first danmaku is sent at once, the next ones after random delays drawn by the scheduler.
 
         Args:
             text (str): The text content of the danmaku.
@@ -267,36 +879,75 @@ class MainWindow(QMainWindow):
                 batch_count = 1
         except ValueError:
             batch_count = 1
-        
-        self._schedule_next_danmaku(text, color, size, batch_count)
 
-    def _schedule_next_danmaku(self, text: str, color: str, size: int, remaining_count: int) -> None:
+        batch_id = self.danmaku_scheduler.schedule_batch(text, batch_count, color, size)
+        if self.batches_paused:
+            self.danmaku_scheduler.pause(batch_id)
+        self.show_batch_progress()
+
+    def schedule_batch_progress(self, batch_id: int, sent: int, total: int) -> None:
         """
-        Schedules the sending of the next danmaku in a batch.
-        If remaining_count > 0, it creates a DanmakuModel, emits a signal to add it,
-        and then schedules the next one with a random delay.
+        Refreshes the batch progress shortly, once for all the batches progressing meanwhile.
 
         Args:
-            text (str): The text content of the danmaku.
-            color (str): The color of the danmaku text.
-            size (int): The font size of the danmaku.
-            remaining_count (int): The number of danmakus remaining to be sent in the current batch.
+            batch_id (int): The batch that progressed.
+            sent (int): Danmakus of the batch sent so far.
+            total (int): Danmakus in the batch.
+        """
+        if not self.batch_progress_timer.isActive():
+            self.batch_progress_timer.start()
+
+    def show_batch_progress(self) -> None:
+        """
+        Shows how many danmakus of the pending batches were sent.
         """
-        if remaining_count <= 0:
+        progress = [self.danmaku_scheduler.progress(batch_id) for batch_id in self.danmaku_scheduler.batch_ids]
+        if not progress:
+            self.batch_progress_label.setText("批量发送：无")
             return
+        sent = sum(batch_sent for batch_sent, _ in progress)
+        total = sum(batch_total for _, batch_total in progress)
+        state = "已暂停" if self.batches_paused else "发送中"
+        self.batch_progress_label.setText(f"批量发送：{state} {sent}/{total}（{len(progress)}批）")
 
-        current_model = DanmakuModel(text=text, color=color, size=size)
-        # Send danmaku using signal
-        danmaku_signal.danmaku_signal_add.emit(current_model)
+    def toggle_batches_paused(self) -> None:
+        """
+        Pauses every pending batch, or resumes them.
+        """
+        self.batches_paused = not self.batches_paused
+        for batch_id in self.danmaku_scheduler.batch_ids:
+            if self.batches_paused:
+                self.danmaku_scheduler.pause(batch_id)
+            else:
+                self.danmaku_scheduler.resume(batch_id)
+        self.pause_batches_button.setText("继续" if self.batches_paused else "暂停")
+        self.show_batch_progress()
 
-        new_remaining_count = remaining_count - 1
-        if new_remaining_count > 0:
-            delay_ms = int(random.uniform(500, 3000)) # Random delay between 0.5 and 3 seconds
-            QTimer.singleShot(delay_ms, lambda: self._schedule_next_danmaku(text, color, size, new_remaining_count))
+    def cancel_batches(self) -> None:
+        """
+        Cancels the danmakus of every pending batch that were not sent yet.
+        """
+        for batch_id in self.danmaku_scheduler.batch_ids:
+            self.danmaku_scheduler.cancel(batch_id)
+        self.show_batch_progress()
 
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
-    main_window = MainWindow()
+    metrics_port = os.environ.get(METRICS_PORT_ENV)
+    http_port = os.environ.get(HTTP_PORT_ENV)
+    max_on_screen = os.environ.get(MAX_ON_SCREEN_ENV)
+    frame_budget_ms = os.environ.get(FRAME_BUDGET_ENV)
+    main_window = MainWindow(metrics_port=int(metrics_port) if metrics_port else None,
+                             record_path=os.environ.get(RECORD_PATH_ENV) or None,
+                             fold_window=float(os.environ.get(FOLD_WINDOW_ENV) or 0) or None,
+                             ingest_workers=int(os.environ.get(INGEST_WORKERS_ENV) or 0),
+                             keyword_path=os.environ.get(KEYWORD_PATH_ENV) or None,
+                             jitter_latency=float(os.environ[JITTER_LATENCY_ENV]) if os.environ.get(JITTER_LATENCY_ENV) else None,
+                             screen_views=parse_screen_views(os.environ.get(SCREEN_VIEWS_ENV, "")),
+                             history_path=os.environ.get(HISTORY_PATH_ENV) or None,
+                             http_port=int(http_port) if http_port else None,
+                             max_on_screen=int(max_on_screen) if max_on_screen else None,
+                             frame_budget_ms=float(frame_budget_ms) if frame_budget_ms else None)
     main_window.show()
     sys.exit(app.exec_())
\ No newline at end of file
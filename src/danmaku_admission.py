@@ -0,0 +1,209 @@
+import random
+import threading
+import time
+from collections import deque
+from .danmaku_metrics import danmaku_metrics
+from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_recall import RecallPredicate # Added for type hinting
+
+# Policies applied when a danmaku arrives while the pending queue is full
+DROP_OLDEST: str = "drop-oldest" # Discard the longest-waiting danmaku to make room
+DROP_NEWEST: str = "drop-newest" # Discard the danmaku that just arrived
+SAMPLE: str = "sample" # Keep a uniform random sample of everything offered while full
+DROP_POLICIES: tuple[str, ...] = (DROP_OLDEST, DROP_NEWEST, SAMPLE)
+
+# Default admission settings
+DEFAULT_MAX_PENDING: int = 5000
+DEFAULT_DROP_POLICY: str = DROP_OLDEST
+
+
+class TokenBucket:
+    """
+    Classic token bucket limiting how many danmakus may be released per second.
+    """
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        """
+        Initializes a full TokenBucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (float | None, optional): Maximum number of stored tokens. Defaults to one second worth of tokens.
+        """
+        self.rate: float = rate
+        self.burst: float = burst if burst is not None else rate
+        self.tokens: float = self.burst
+        self._last_refill: float = time.monotonic()
+
+    def available(self) -> int:
+        """
+        Refills the bucket and returns the number of whole tokens it holds.
+
+        Returns:
+            int: The number of tokens that can be taken right now.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+        return int(self.tokens)
+
+    def take(self, count: int) -> None:
+        """
+        Removes tokens from the bucket.
+
+        Args:
+            count (int): The number of tokens to take, at most available().
+        """
+        self.tokens -= count
+
+
+class DanmakuAdmission:
+    """
+    Decides in the source thread which danmakus are sent to the GUI thread.
+    Incoming danmakus wait in a bounded pending queue and are released once per flush,
+    limited by a token bucket (maximum ingest rate) and by the free room on screen.
+    When the queue is full, the drop policy decides which danmaku is discarded.
+    """
+    def __init__(self,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 drop_policy: str = DEFAULT_DROP_POLICY,
+                 max_rate: float | None = None,
+                 burst: float | None = None,
+                 max_on_screen: int | None = None) -> None:
+        """
+        Initializes the DanmakuAdmission.
+
+        Args:
+            max_pending (int, optional): Capacity of the pending queue. Defaults to DEFAULT_MAX_PENDING.
+            drop_policy (str, optional): One of DROP_OLDEST, DROP_NEWEST or SAMPLE. Defaults to DEFAULT_DROP_POLICY.
+            max_rate (float | None, optional): Maximum danmakus released per second, None for no limit. Defaults to None.
+            burst (float | None, optional): Size of the token bucket. Defaults to one second worth of max_rate.
+            max_on_screen (int | None, optional): Maximum live danmakus per window, None for no limit. Defaults to None.
+
+        Raises:
+            ValueError: If drop_policy is unknown or max_pending is not positive.
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unsupported drop policy: {drop_policy}")
+        if max_pending <= 0:
+            raise ValueError("max_pending must be a positive integer.")
+        self.max_pending: int = max_pending
+        self.drop_policy: str = drop_policy
+        self.bucket: TokenBucket | None = TokenBucket(max_rate, burst) if max_rate is not None else None
+        self.max_on_screen: int | None = max_on_screen
+
+        self.offered: int = 0
+        self.released: int = 0
+        self.dropped: int = 0
+
+        self._pending: deque[DanmakuModel] = deque()
+        self._lock: threading.Lock = threading.Lock()
+        self._overflow_seen: int = 0 # Danmakus offered since the queue became full, for SAMPLE
+        self._active_on_screen: int = 0 # Largest live count reported by the windows
+        self._released_since_report: int = 0 # Released danmakus the windows have not reported yet
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of danmakus waiting in the queue.
+        """
+        return len(self._pending)
+
+    def offer(self, model: DanmakuModel) -> DanmakuModel | None:
+        """
+        Queues a danmaku for release, applying the drop policy when the queue is full.
+
+        Args:
+            model (DanmakuModel): The incoming danmaku.
+
+        Returns:
+            DanmakuModel | None: The danmaku dropped to make room, or the incoming one if it was dropped itself,
+            None if nothing was dropped.
+        """
+        with self._lock:
+            self.offered += 1
+            if len(self._pending) < self.max_pending:
+                self._overflow_seen = 0
+                self._pending.append(model)
+                return None
+
+            self.dropped += 1
+            if danmaku_metrics.enabled:
+                danmaku_metrics.admission_dropped.inc()
+            if self.drop_policy == DROP_OLDEST:
+                dropped = self._pending.popleft()
+                self._pending.append(model)
+                return dropped
+            if self.drop_policy == DROP_NEWEST:
+                return model
+            # Reservoir sampling: every danmaku seen while full has the same chance to stay queued
+            self._overflow_seen += 1
+            index = random.randrange(self.max_pending + self._overflow_seen)
+            if index < self.max_pending:
+                dropped = self._pending[index]
+                self._pending[index] = model
+                return dropped
+            return model
+
+    def drain(self) -> list[DanmakuModel]:
+        """
+        Releases as many queued danmakus as the rate limit and the room on screen allow.
+
+        Returns:
+            list[DanmakuModel]: The danmakus to send to the GUI thread, oldest first.
+        """
+        with self._lock:
+            count = len(self._pending)
+            if count and self.bucket is not None:
+                count = min(count, self.bucket.available())
+            if count and self.max_on_screen is not None:
+                room = self.max_on_screen - self._active_on_screen - self._released_since_report
+                count = min(count, max(0, room))
+            if not count:
+                return []
+            released = [self._pending.popleft() for _ in range(count)]
+            if self.bucket is not None:
+                self.bucket.take(count)
+            self.released += count
+            self._released_since_report += count
+            return released
+
+    def remove_matching(self, predicate: RecallPredicate) -> int:
+        """
+        Removes the queued danmakus selected by a bulk recall. Safe to call from any thread.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            int: The number of danmakus removed.
+        """
+        with self._lock:
+            kept = deque(model for model in self._pending if not predicate.matches(model))
+            removed = len(self._pending) - len(kept)
+            self._pending = kept
+            return removed
+
+    def report_on_screen(self, active_count: int) -> None:
+        """
+        Reports the number of live danmakus on the busiest window. Called from the GUI thread.
+
+        Args:
+            active_count (int): The largest number of live danmakus among the visible windows.
+        """
+        with self._lock:
+            self._active_on_screen = active_count
+            self._released_since_report = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the counters of the admission stage.
+
+        Returns:
+            dict[str, int]: Offered, released, dropped and pending danmakus.
+        """
+        return {
+            "offered": self.offered,
+            "released": self.released,
+            "dropped": self.dropped,
+            "pending": len(self._pending),
+        }
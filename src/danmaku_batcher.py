@@ -0,0 +1,84 @@
+import threading
+from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_recall import RecallPredicate # Added for type hinting
+from .danmaku_signal import danmaku_signal
+
+# Default interval between two batches in seconds (one frame at 60 frames per second)
+DEFAULT_FLUSH_INTERVAL: float = 1 / 60
+
+class DanmakuBatcher:
+    """
+    Buffers danmaku models produced in the source thread and hands them to the GUI thread in batches.
+    One queued cross-thread event per batch replaces one event per message.
+    """
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL) -> None:
+        """
+        Initializes the DanmakuBatcher.
+
+        Args:
+            flush_interval (float, optional): Seconds between two batches. Defaults to DEFAULT_FLUSH_INTERVAL.
+        """
+        self.flush_interval: float = flush_interval
+        self._pending: list[DanmakuModel] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def add(self, model: DanmakuModel) -> None:
+        """
+        Buffers a model until the next flush. Safe to call from any thread.
+
+        Args:
+            model (DanmakuModel): The model to deliver.
+        """
+        with self._lock:
+            self._pending.append(model)
+
+    def extend(self, models: list[DanmakuModel]) -> None:
+        """
+        Buffers several models until the next flush. Safe to call from any thread.
+
+        Args:
+            models (list[DanmakuModel]): The models to deliver.
+        """
+        with self._lock:
+            self._pending.extend(models)
+
+    def remove_matching(self, predicate: RecallPredicate) -> int:
+        """
+        Removes the buffered models selected by a bulk recall. Safe to call from any thread.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            int: The number of models removed.
+        """
+        with self._lock:
+            kept = [model for model in self._pending if not predicate.matches(model)]
+            removed = len(self._pending) - len(kept)
+            self._pending = kept
+            return removed
+
+    def flush(self) -> int:
+        """
+        Emits every buffered model as one batch through danmaku_signal_add_batch.
+
+        Returns:
+            int: The number of models delivered.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            danmaku_signal.danmaku_signal_add_batch.emit(batch)
+        return len(batch)
+
+    def run(self, stop_event: threading.Event) -> None:
+        """
+        Flushes the buffer every flush_interval seconds until stop_event is set.
+        Meant to be the target of a dedicated thread.
+
+        Args:
+            stop_event (threading.Event): Event that stops the loop once set.
+        """
+        while not stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush() # Deliver whatever arrived while stopping
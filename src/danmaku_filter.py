@@ -0,0 +1,252 @@
+import os
+import threading
+from collections import deque
+from typing import Iterable
+from .danmaku_model import DanmakuModel # Added for type hinting
+
+# Actions of a keyword.
+# "block" drops the danmaku, "mask" replaces the keyword with MASK_CHARACTER,
+# "allow" exempts the text it covers from the other two (e.g. a place name containing a blocked word).
+FILTER_BLOCK: str = "block"
+FILTER_MASK: str = "mask"
+FILTER_ALLOW: str = "allow"
+FILTER_ACTIONS: tuple[str, ...] = (FILTER_BLOCK, FILTER_MASK, FILTER_ALLOW)
+
+MASK_CHARACTER: str = "*"
+
+# Full-width ASCII letters and symbols match their half-width keywords
+_FULL_WIDTH = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+
+# A keyword match: start and end offsets in the text, and the action of the keyword
+Match = tuple[int, int, str]
+
+
+def normalize_for_matching(text: str) -> str:
+    """
+    Lower-cases text and maps full-width ASCII to half-width, keeping every character at its offset.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: A string of the same length as text.
+    """
+    text = text.translate(_FULL_WIDTH)
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters lower-case to several (e.g. "İ"), keep those unchanged
+    return "".join(lower if len(lower := character.lower()) == 1 else character for character in text)
+
+
+def parse_keywords(lines: Iterable[str]) -> list[tuple[str, str]]:
+    """
+    Parses a keyword list: one keyword per line, optionally prefixed by "block:", "mask:" or "allow:".
+    A keyword without one of these prefixes is blocked. Empty lines and lines starting with "#" are ignored.
+
+    Args:
+        lines (Iterable[str]): The lines of the list.
+
+    Returns:
+        list[tuple[str, str]]: The (keyword, action) pairs, keywords normalized.
+    """
+    keywords: list[tuple[str, str]] = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        action, separator, keyword = line.partition(":")
+        action = action.strip().lower()
+        if separator and action in FILTER_ACTIONS:
+            line = keyword.strip()
+        else:
+            action = FILTER_BLOCK
+        if line:
+            keywords.append((normalize_for_matching(line), action))
+    return keywords
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton finding every keyword occurrence in one pass over a text.
+    Matching costs O(length of the text + number of matches), whatever the number of keywords.
+    Immutable once built, so it can be shared between threads.
+    """
+    def __init__(self, keywords: Iterable[tuple[str, str]]) -> None:
+        """
+        Builds the automaton.
+
+        Args:
+            keywords (Iterable[tuple[str, str]]): (keyword, action) pairs, keywords already normalized.
+        """
+        self._goto: list[dict[str, int]] = [{}]
+        outputs: list[list[tuple[int, str]]] = [[]]
+        self.keyword_count: int = 0
+        for keyword, action in keywords:
+            node = 0
+            for character in keyword:
+                next_node = self._goto[node].get(character)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][character] = next_node
+                    self._goto.append({})
+                    outputs.append([])
+                node = next_node
+            outputs[node].append((len(keyword), action))
+            self.keyword_count += 1
+
+        # Breadth-first pass: failure links, with the outputs of every suffix merged into each node
+        self._fail: list[int] = [0] * len(self._goto)
+        queue: deque[int] = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for character, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and character not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(character, 0)
+                self._fail[child] = target if target != child else 0
+                outputs[child].extend(outputs[self._fail[child]])
+                queue.append(child)
+        self._outputs: list[tuple[tuple[int, str], ...]] = [tuple(output) for output in outputs]
+
+    def scan(self, text: str) -> list[Match]:
+        """
+        Finds every keyword occurrence, overlapping ones included.
+
+        Args:
+            text (str): The normalized text to search.
+
+        Returns:
+            list[Match]: (start, end, action) of each occurrence, ordered by end offset.
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        matches: list[Match] = []
+        node = 0
+        for end, character in enumerate(text, 1):
+            while node and character not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(character, 0)
+            if outputs[node]:
+                for length, action in outputs[node]:
+                    matches.append((end - length, end, action))
+        return matches
+
+
+class DanmakuFilter:
+    """
+    Moderates danmakus against a keyword list before they are displayed.
+    The list is read from a file and can be reloaded while the server runs; the new automaton is built
+    aside and swapped in by a single assignment, so danmakus being checked are never affected.
+    """
+    def __init__(self, path: str | None = None, keywords: Iterable[tuple[str, str]] | None = None) -> None:
+        """
+        Initializes the DanmakuFilter from a keyword file or from keywords.
+
+        Args:
+            path (str | None, optional): The keyword file, see parse_keywords. Defaults to None.
+            keywords (Iterable[tuple[str, str]] | None, optional): (keyword, action) pairs used when there is no file. Defaults to None.
+
+        Raises:
+            OSError: If the keyword file cannot be read.
+            ValueError: If an action is unknown.
+        """
+        keywords = list(keywords or ())
+        for _, action in keywords:
+            if action not in FILTER_ACTIONS:
+                raise ValueError(f"Unknown keyword action {action!r}, expected one of {FILTER_ACTIONS}")
+        self.path: str | None = path
+        self.blocked: int = 0
+        self.masked: int = 0
+        self._mtime: float | None = None
+        self._reload_lock: threading.Lock = threading.Lock()
+        self.automaton: KeywordAutomaton = KeywordAutomaton(
+            (normalize_for_matching(keyword), action) for keyword, action in keywords)
+        if path is not None:
+            self.reload()
+
+    def reload(self) -> int:
+        """
+        Reads the keyword file again and swaps in the new list.
+
+        Returns:
+            int: The number of keywords loaded.
+
+        Raises:
+            OSError: If the keyword file cannot be read; the previous list stays active.
+            ValueError: If there is no keyword file, or it is not UTF-8.
+        """
+        if self.path is None:
+            raise ValueError("The filter has no keyword file to reload.")
+        with self._reload_lock:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding="utf-8") as keyword_file:
+                automaton = KeywordAutomaton(parse_keywords(keyword_file))
+            self.automaton = automaton
+            self._mtime = mtime
+            return automaton.keyword_count
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reloads the keyword file if it was modified since it was last read.
+
+        Returns:
+            bool: True if the list was reloaded.
+
+        Raises:
+            OSError: If the keyword file cannot be read; the previous list stays active.
+        """
+        if self.path is None or os.path.getmtime(self.path) == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def check(self, text: str) -> str | None:
+        """
+        Applies the keyword list to a text.
+
+        Args:
+            text (str): The text of a danmaku.
+
+        Returns:
+            str | None: None if the text is blocked, otherwise the text with masked keywords replaced.
+        """
+        matches = self.automaton.scan(normalize_for_matching(text))
+        if not matches:
+            return text
+        allowed = [(start, end) for start, end, action in matches if action == FILTER_ALLOW]
+        masked: list[Match] = []
+        for match in matches:
+            start, end, action = match
+            if action == FILTER_ALLOW or any(low <= start and end <= high for low, high in allowed):
+                continue
+            if action == FILTER_BLOCK:
+                return None
+            masked.append(match)
+        if not masked:
+            return text
+        characters = list(text)
+        for start, end, _ in masked:
+            characters[start:end] = MASK_CHARACTER * (end - start)
+        return "".join(characters)
+
+    def apply(self, model: DanmakuModel) -> bool:
+        """
+        Moderates a danmaku, masking its text in place if needed.
+
+        Args:
+            model (DanmakuModel): The incoming danmaku.
+
+        Returns:
+            bool: False if the danmaku is blocked and must not be displayed.
+        """
+        text = self.check(model.text)
+        if text is None:
+            self.blocked += 1
+            return False
+        if text is not model.text:
+            model.text = text
+            self.masked += 1
+        return True
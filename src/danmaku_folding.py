@@ -0,0 +1,148 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from .danmaku_model import DanmakuModel # Added for type hinting
+
+# Seconds during which copies of a danmaku are folded into it, counted from its first appearance.
+# Shorter than the time a danmaku takes to cross the screen, so the counted item is still visible.
+DEFAULT_FOLD_WINDOW: float = 5
+
+# Maximum number of distinct texts tracked at once; the oldest are forgotten beyond it
+DEFAULT_MAX_FOLD_ENTRIES: int = 10000
+
+_WHITESPACE = re.compile(r"\s+")
+_REPEATED_CHARACTER = re.compile(r"(.)\1{3,}") # "66666666" folds into "666"
+
+
+def normalize_text(text: str) -> str:
+    """
+    Returns the key under which texts count as identical:
+    compatibility-normalized, case-folded, whitespace-collapsed, with long character runs shortened to three.
+
+    Args:
+        text (str): The text of a danmaku.
+
+    Returns:
+        str: The folding key of the text.
+    """
+    text = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+    return _REPEATED_CHARACTER.sub(r"\1\1\1", text)
+
+
+class _FoldEntry:
+    __slots__ = ("key", "model", "count", "first_seen")
+
+    def __init__(self, key: str, model: DanmakuModel, first_seen: float) -> None:
+        self.key: str = key
+        self.model: DanmakuModel = model
+        self.count: int = 1
+        self.first_seen: float = first_seen
+
+
+class DanmakuFolder:
+    """
+    Folds repeated danmakus into the first one seen within a time window.
+    The first copy goes on to be displayed; later copies only raise its count, which the GUI thread
+    shows as a multiplier on the same item. Lookups go through a hash index on the normalized text,
+    and entries leave the index in arrival order once their window has passed.
+    Called from the source thread; forget() may be called from any thread.
+    """
+    def __init__(self, window: float = DEFAULT_FOLD_WINDOW, max_entries: int = DEFAULT_MAX_FOLD_ENTRIES) -> None:
+        """
+        Initializes the DanmakuFolder.
+
+        Args:
+            window (float, optional): Seconds during which copies are folded into the first one. Defaults to DEFAULT_FOLD_WINDOW.
+            max_entries (int, optional): Maximum number of distinct texts tracked at once. Defaults to DEFAULT_MAX_FOLD_ENTRIES.
+
+        Raises:
+            ValueError: If window or max_entries is not positive.
+        """
+        if window <= 0:
+            raise ValueError("window must be positive.")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be a positive integer.")
+        self.window: float = window
+        self.max_entries: int = max_entries
+        self.folded: int = 0
+
+        self._index: dict[str, _FoldEntry] = {}
+        # Entries by danmaku ID in order of first appearance, so forgetting one and expiring the oldest are O(1)
+        self._order: OrderedDict[int, _FoldEntry] = OrderedDict()
+        self._updates: dict[int, _FoldEntry] = {} # Entries whose count changed since the last drain
+        self._lock: threading.Lock = threading.Lock()
+
+    def fold(self, model: DanmakuModel, now: float | None = None) -> bool:
+        """
+        Folds a danmaku into an earlier copy of the same text, or starts tracking it.
+
+        Args:
+            model (DanmakuModel): The incoming danmaku.
+            now (float | None, optional): The current monotonic time in seconds. Defaults to time.monotonic().
+
+        Returns:
+            bool: True if the danmaku was folded and must not be displayed on its own.
+        """
+        if now is None:
+            now = time.monotonic()
+        key = normalize_text(model.text)
+        with self._lock:
+            self._expire(now)
+            entry = self._index.get(key)
+            if entry is not None:
+                entry.count += 1
+                self._updates[entry.model.danmaku_id] = entry
+                self.folded += 1
+                return True
+            entry = _FoldEntry(key, model, now)
+            self._index[key] = entry
+            self._order[model.danmaku_id] = entry
+            if len(self._order) > self.max_entries:
+                del self._index[self._order.popitem(last=False)[1].key]
+            return False
+
+    def drain_updates(self) -> list[tuple[DanmakuModel, int]]:
+        """
+        Returns the danmakus whose count changed since the last call, with their new count.
+
+        Returns:
+            list[tuple[DanmakuModel, int]]: The folded danmakus and their counts.
+        """
+        with self._lock:
+            if not self._updates:
+                return []
+            updates = [(entry.model, entry.count) for entry in self._updates.values()]
+            self._updates.clear()
+            return updates
+
+    def forget(self, danmaku_id: int) -> None:
+        """
+        Stops folding into a danmaku, for instance because it was recalled, dropped before being shown
+        or has left the screen. Safe to call from any thread.
+
+        Args:
+            danmaku_id (int): The ID of the danmaku.
+        """
+        with self._lock:
+            entry = self._order.pop(danmaku_id, None)
+            if entry is not None:
+                del self._index[entry.key]
+            self._updates.pop(danmaku_id, None) # The item is gone, there is nothing left to update
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _expire(self, now: float) -> None:
+        """
+        Forgets the entries whose window has passed; a pending count update is still delivered.
+        """
+        deadline = now - self.window
+        order = self._order
+        while order:
+            entry = next(iter(order.values()))
+            if entry.first_seen > deadline:
+                break
+            del order[entry.model.danmaku_id]
+            del self._index[entry.key]
@@ -0,0 +1,486 @@
+import bisect
+import os
+import struct
+import threading
+import time
+from typing import BinaryIO, Callable
+from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_record import pack_danmaku, unpack_danmakus, unpack_text
+from .danmaku_filter import normalize_for_matching
+
+# A history log starts with this header: magic and format version
+HISTORY_MAGIC: bytes = b"MWDH"
+HISTORY_VERSION: int = 1
+_HEADER: struct.Struct = struct.Struct("<4sB")
+
+# Every entry starts with the danmaku ID, the wall-clock time it was logged and the length of its packed record
+_ENTRY: struct.Struct = struct.Struct("<QdI")
+
+# The sparse index, kept in a file next to the log, holds one line per block of HISTORY_BLOCK_ENTRIES entries:
+# the file offset of the block, the smallest and largest danmaku ID in it, and its earliest and latest log time
+HISTORY_BLOCK_ENTRIES: int = 256
+_BLOCK: struct.Struct = struct.Struct("<QQQdd")
+HISTORY_INDEX_SUFFIX: str = ".idx"
+
+# Decides from the ID, log time and the log buffer and offset of its record whether an entry is read
+EntrySelector = Callable[[int, float, bytes, int], bool]
+
+# Seconds between two fsyncs of the log while entries are written
+DEFAULT_HISTORY_FSYNC_INTERVAL: float = 1
+HISTORY_BUFFER_SIZE: int = 1 << 20
+
+
+class HistoryEntry:
+    """
+    A danmaku read back from the history log, with its position in the log.
+    """
+    __slots__ = ("seq", "logged_at", "model")
+
+    def __init__(self, seq: int, logged_at: float, model: DanmakuModel) -> None:
+        self.seq: int = seq # Position in the log, counting from 0
+        self.logged_at: float = logged_at # Unix time at which the danmaku was logged
+        self.model: DanmakuModel = model # Carries the ID the danmaku had when it was logged
+
+
+class DanmakuHistoryLog:
+    """
+    Keeps every displayed danmaku in an append-only file, so the history survives restarts without being held in memory.
+    append() only queues the danmakus; a background thread packs them with pack_danmaku, writes them
+    and fsyncs the file at most once per fsync interval, so the GUI thread never waits for the disk.
+    A sparse index of one line per HISTORY_BLOCK_ENTRIES entries, kept in memory and in a side file,
+    finds a danmaku by ID or by time by reading a single block. Danmaku IDs and log times are only
+    nearly sorted in the log (the jitter buffer reorders danmakus), so every block records its range of both.
+    Readers may run on any thread and only see entries the writer has flushed.
+    """
+    def __init__(self, path: str, fsync_interval: float = DEFAULT_HISTORY_FSYNC_INTERVAL) -> None:
+        """
+        Opens a history log, creating it or appending to it, and starts its writer thread.
+        An entry cut off by a crash is truncated, and index lines missing from the side file are rebuilt.
+
+        Args:
+            path (str): The log file; the index is kept in path + HISTORY_INDEX_SUFFIX.
+            fsync_interval (float, optional): Maximum seconds written entries wait for an fsync. Defaults to DEFAULT_HISTORY_FSYNC_INTERVAL.
+
+        Raises:
+            ValueError: If the file exists but is not a history log, or fsync_interval is negative.
+        """
+        if fsync_interval < 0:
+            raise ValueError("fsync_interval must not be negative.")
+        self.path: str = path
+        self.index_path: str = path + HISTORY_INDEX_SUFFIX
+        self.fsync_interval: float = fsync_interval
+        self.written: int = 0 # Entries written by this instance
+        self.failed: int = 0 # Danmakus that could not be packed
+        self.syncs: int = 0
+
+        # One element per block, the last one possibly incomplete; only the writer thread appends or widens them.
+        # The prefix maxima are sorted, so the first block that can hold an ID or a time is found by bisection
+        self._offsets: list[int] = []
+        self._min_ids: list[int] = []
+        self._max_ids: list[int] = []
+        self._max_id_prefix: list[int] = []
+        self._min_times: list[float] = []
+        self._max_times: list[float] = []
+        self._max_time_prefix: list[float] = []
+        # Entries and bytes readers may see, published together by the writer
+        self._count: int = 0
+        self._end: int = _HEADER.size
+        self._published_lock: threading.Lock = threading.Lock()
+
+        self._file: BinaryIO = self._open_log()
+        self._index_file: BinaryIO = self._open_index()
+        self._reader: BinaryIO = open(path, "rb")
+        self._read_lock: threading.Lock = threading.Lock()
+
+        # Danmakus queued by append() with their log time, taken in bulk by the writer
+        self._pending: list[tuple[float, list[DanmakuModel]]] = []
+        self._condition: threading.Condition = threading.Condition()
+        self._closing: bool = False
+        self._dirty: bool = False
+        self._last_sync: float = time.monotonic()
+        self._writer: threading.Thread = threading.Thread(target=self._run, name="DanmakuHistoryWriter", daemon=True)
+        self._writer.start()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, models: list[DanmakuModel]) -> None:
+        """
+        Queues danmakus for the writer thread; returns without touching the disk.
+
+        Args:
+            models (list[DanmakuModel]): The danmakus, in display order.
+        """
+        if not models:
+            return
+        with self._condition:
+            self._pending.append((time.time(), list(models)))
+            self._condition.notify()
+
+    def read(self, seq: int, count: int) -> list[HistoryEntry]:
+        """
+        Reads consecutive entries, oldest first, for paging through the log.
+
+        Args:
+            seq (int): The position of the first entry.
+            count (int): The number of entries to read at most.
+
+        Returns:
+            list[HistoryEntry]: The entries, fewer if the log ends first.
+        """
+        total, _ = self._published()
+        entries: list[HistoryEntry] = []
+        seq = max(0, seq)
+        block = seq // HISTORY_BLOCK_ENTRIES
+        while len(entries) < count and block * HISTORY_BLOCK_ENTRIES < total:
+            entries.extend(entry for entry in self._read_block(block) if entry.seq >= seq)
+            block += 1
+        return entries[:count]
+
+    def read_before(self, before: int | None, count: int, query: str | None = None) -> list[HistoryEntry]:
+        """
+        Reads the entries preceding a position, newest first, optionally only those whose text contains a query.
+        Matching ignores case and full-width letters, like the keyword filter; blocks are scanned from disk
+        and only matching entries are turned into DanmakuModel objects.
+
+        Args:
+            before (int | None): The position to stop before, None for the end of the log.
+            count (int): The number of entries to return at most.
+            query (str | None, optional): Text the entries must contain, None or empty for every entry. Defaults to None.
+
+        Returns:
+            list[HistoryEntry]: The entries, newest first.
+        """
+        return self.scan_before(before, count, query)[0]
+
+    def scan_before(self, before: int | None, count: int, query: str | None = None,
+                    max_blocks: int | None = None) -> tuple[list[HistoryEntry], int]:
+        """
+        Reads like read_before, but stops after a number of blocks, so that a search with few matches
+        can be spread over several calls instead of reading the whole log at once.
+
+        Args:
+            before (int | None): The position to stop before, None for the end of the log.
+            count (int): The number of entries to return at most.
+            query (str | None, optional): Text the entries must contain, None or empty for every entry. Defaults to None.
+            max_blocks (int | None, optional): The number of blocks to read at most, None for no limit. Defaults to None.
+
+        Returns:
+            tuple[list[HistoryEntry], int]: The entries, newest first, and the position to continue before,
+            0 once the start of the log is reached.
+        """
+        total, _ = self._published()
+        before = total if before is None else min(before, total)
+        select: EntrySelector | None = None
+        if query:
+            needle = normalize_for_matching(query)
+            select = lambda danmaku_id, logged_at, buffer, offset: needle in normalize_for_matching(unpack_text(buffer, offset))
+        entries: list[HistoryEntry] = []
+        block = (before - 1) // HISTORY_BLOCK_ENTRIES
+        blocks_read = 0
+        while len(entries) < count and block >= 0 and (max_blocks is None or blocks_read < max_blocks):
+            matches = [entry for entry in self._read_block(block, select) if entry.seq < before]
+            entries.extend(reversed(matches))
+            block -= 1
+            blocks_read += 1
+        if len(entries) >= count:
+            return entries[:count], entries[count - 1].seq
+        return entries, (block + 1) * HISTORY_BLOCK_ENTRIES
+
+    def find_id(self, danmaku_id: int) -> HistoryEntry | None:
+        """
+        Looks a danmaku up by ID, reading only the blocks whose ID range covers it.
+
+        Args:
+            danmaku_id (int): The ID the danmaku had when it was logged.
+
+        Returns:
+            HistoryEntry | None: The entry, or None if the ID is not in the log.
+        """
+        blocks = self._published_blocks()
+        for block in range(bisect.bisect_left(self._max_id_prefix, danmaku_id, 0, blocks), blocks):
+            if self._min_ids[block] <= danmaku_id <= self._max_ids[block]:
+                found = self._read_block(block, lambda entry_id, logged_at, buffer, offset: entry_id == danmaku_id)
+                if found:
+                    return found[0]
+        return None
+
+    def find_time(self, timestamp: float) -> int:
+        """
+        Finds the position of the first entry logged at or after a time, for paging from a point in time.
+
+        Args:
+            timestamp (float): A Unix time.
+
+        Returns:
+            int: The position of the entry, len(self) if every entry is older.
+        """
+        total, _ = self._published()
+        blocks = self._published_blocks()
+        block = bisect.bisect_left(self._max_time_prefix, timestamp, 0, blocks)
+        while block < blocks:
+            found = self._read_block(block, lambda danmaku_id, logged_at, buffer, offset: logged_at >= timestamp)
+            if found:
+                return found[0].seq
+            block += 1
+        return total
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Waits until every queued danmaku has been written and synced, for tests and benchmarks.
+
+        Args:
+            timeout (float | None, optional): Seconds to wait at most, None to wait until done. Defaults to None.
+
+        Returns:
+            bool: True if everything queued was written in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify()
+            while self._pending or self._dirty:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """
+        Writes and syncs the queued danmakus, stops the writer thread and closes the files.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._writer.join()
+        with self._read_lock:
+            self._reader.close()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the counters of the history log.
+
+        Returns:
+            dict[str, int]: Entries in the log, entries written and danmakus dropped by this instance,
+            fsyncs done, and danmakus queued for the writer.
+        """
+        with self._condition:
+            pending = sum(len(models) for _, models in self._pending)
+        return {"entries": self._count, "written": self.written, "failed": self.failed,
+                "syncs": self.syncs, "pending": pending}
+
+    def _published(self) -> tuple[int, int]:
+        """
+        Returns the entries and bytes readers may see.
+        """
+        with self._published_lock:
+            return self._count, self._end
+
+    def _published_blocks(self) -> int:
+        """
+        Returns the number of blocks holding entries readers may see.
+        """
+        return -(-self._published()[0] // HISTORY_BLOCK_ENTRIES)
+
+    def _read_block(self, block: int, select: EntrySelector | None = None) -> list[HistoryEntry]:
+        """
+        Reads the visible entries of one block; only selected entries are turned into DanmakuModel objects.
+
+        Args:
+            block (int): The block.
+            select (EntrySelector | None, optional): Picks the entries to read, None reads every entry. Defaults to None.
+
+        Returns:
+            list[HistoryEntry]: The entries, oldest first.
+        """
+        total, end = self._published()
+        start = self._offsets[block]
+        stop = self._offsets[block + 1] if block + 1 < len(self._offsets) else end
+        stop = min(stop, end)
+        with self._read_lock:
+            self._reader.seek(start)
+            buffer = self._reader.read(stop - start)
+        entries: list[HistoryEntry] = []
+        seq = block * HISTORY_BLOCK_ENTRIES
+        offset = 0
+        while offset + _ENTRY.size <= len(buffer) and seq < total:
+            danmaku_id, logged_at, length = _ENTRY.unpack_from(buffer, offset)
+            offset += _ENTRY.size
+            if select is None or select(danmaku_id, logged_at, buffer, offset):
+                model = next(unpack_danmakus(memoryview(buffer)[offset:offset + length]))
+                model.danmaku_id = danmaku_id
+                entries.append(HistoryEntry(seq, logged_at, model))
+            offset += length
+            seq += 1
+        return entries
+
+    def _open_log(self) -> BinaryIO:
+        """
+        Opens the log for appending, writing the header of a new log or scanning an existing one
+        to rebuild the in-memory index; a torn entry at the end is truncated.
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            log = open(self.path, "wb", buffering=HISTORY_BUFFER_SIZE)
+            log.write(_HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION))
+            log.flush()
+            return log
+        with open(self.path, "rb") as existing:
+            magic, version = _HEADER.unpack(existing.read(_HEADER.size).ljust(_HEADER.size, b"\0"))
+        if magic != HISTORY_MAGIC or version != HISTORY_VERSION:
+            raise ValueError(f"{self.path} is not a danmaku history log of version {HISTORY_VERSION}")
+        # Complete blocks listed in the index file are trusted; the rest of the log is scanned
+        size = os.path.getsize(self.path)
+        for start, min_id, max_id, min_time, max_time in _read_index(self.index_path):
+            if start >= size:
+                break
+            self._add_block(start, min_id, max_id, min_time, max_time)
+        self._count = len(self._offsets) * HISTORY_BLOCK_ENTRIES
+        self._end = self._offsets[-1] if self._offsets else _HEADER.size
+        if self._offsets:
+            self._drop_last_block() # Rescanned below, which also finds where it ends
+        with open(self.path, "rb", buffering=HISTORY_BUFFER_SIZE) as existing:
+            existing.seek(self._end)
+            while True:
+                header = existing.read(_ENTRY.size)
+                if len(header) < _ENTRY.size:
+                    break
+                danmaku_id, logged_at, length = _ENTRY.unpack(header)
+                if len(existing.read(length)) < length:
+                    break
+                self._index_entry(self._count, self._end, danmaku_id, logged_at)
+                self._count += 1
+                self._end += _ENTRY.size + length
+        if self._end < size:
+            os.truncate(self.path, self._end)
+        return open(self.path, "ab", buffering=HISTORY_BUFFER_SIZE)
+
+    def _open_index(self) -> BinaryIO:
+        """
+        Rewrites the index file from the complete blocks found while opening the log, and opens it for appending.
+        """
+        complete = self._count // HISTORY_BLOCK_ENTRIES
+        with open(self.index_path, "wb") as index:
+            for block in range(complete):
+                index.write(self._block_line(block))
+        return open(self.index_path, "ab")
+
+    def _block_line(self, block: int) -> bytes:
+        return _BLOCK.pack(self._offsets[block], self._min_ids[block], self._max_ids[block],
+                           self._min_times[block], self._max_times[block])
+
+    def _add_block(self, start: int, min_id: int, max_id: int, min_time: float, max_time: float) -> None:
+        self._offsets.append(start)
+        self._min_ids.append(min_id)
+        self._max_ids.append(max_id)
+        self._max_id_prefix.append(max(max_id, self._max_id_prefix[-1]) if self._max_id_prefix else max_id)
+        self._min_times.append(min_time)
+        self._max_times.append(max_time)
+        self._max_time_prefix.append(max(max_time, self._max_time_prefix[-1]) if self._max_time_prefix else max_time)
+
+    def _drop_last_block(self) -> None:
+        self._count -= HISTORY_BLOCK_ENTRIES
+        for column in (self._offsets, self._min_ids, self._max_ids, self._max_id_prefix,
+                       self._min_times, self._max_times, self._max_time_prefix):
+            column.pop()
+
+    def _index_entry(self, seq: int, start: int, danmaku_id: int, logged_at: float) -> None:
+        """
+        Adds the entry at a position, starting at a file offset, to the in-memory index.
+        """
+        if seq % HISTORY_BLOCK_ENTRIES == 0:
+            self._add_block(start, danmaku_id, danmaku_id, logged_at, logged_at)
+            return
+        if danmaku_id < self._min_ids[-1]:
+            self._min_ids[-1] = danmaku_id
+        if danmaku_id > self._max_ids[-1]:
+            self._max_ids[-1] = danmaku_id
+            self._max_id_prefix[-1] = max(self._max_id_prefix[-1], danmaku_id)
+        if logged_at < self._min_times[-1]:
+            self._min_times[-1] = logged_at
+        if logged_at > self._max_times[-1]:
+            self._max_times[-1] = logged_at
+            self._max_time_prefix[-1] = max(self._max_time_prefix[-1], logged_at)
+
+    def _run(self) -> None:
+        """
+        Writes queued danmakus in bulk and syncs the log at most once per fsync interval, until closed.
+        """
+        while True:
+            with self._condition:
+                while not self._pending and not self._closing:
+                    if not self._dirty:
+                        self._condition.wait()
+                        continue
+                    remaining = self._last_sync + self.fsync_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batches, self._pending = self._pending, []
+                closing = self._closing
+                if batches:
+                    self._dirty = True # Until synced, so flush() keeps waiting
+            if batches:
+                self._write(batches)
+            if self._dirty and (closing or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+            if closing and not batches:
+                self._file.close()
+                self._index_file.close()
+                return
+
+    def _write(self, batches: list[tuple[float, list[DanmakuModel]]]) -> None:
+        """
+        Appends the entries of queued batches, then publishes them to readers.
+        """
+        write = self._file.write
+        count, end = self._count, self._end
+        for logged_at, models in batches:
+            for model in models:
+                try:
+                    record = pack_danmaku(model)
+                except ValueError as e:
+                    print(f"Danmaku {model.danmaku_id} not logged: {e}")
+                    self.failed += 1
+                    continue
+                write(_ENTRY.pack(model.danmaku_id, logged_at, len(record)))
+                write(record)
+                self._index_entry(count, end, model.danmaku_id, logged_at)
+                count += 1
+                end += _ENTRY.size + len(record)
+                if count % HISTORY_BLOCK_ENTRIES == 0:
+                    self._index_file.write(self._block_line(count // HISTORY_BLOCK_ENTRIES - 1))
+        self._file.flush()
+        self.written += count - self._count # Only this thread changes self._count
+        with self._published_lock:
+            self._count, self._end = count, end
+
+    def _sync(self) -> None:
+        """
+        Flushes the index file and fsyncs both files.
+        """
+        self._index_file.flush()
+        os.fsync(self._file.fileno())
+        os.fsync(self._index_file.fileno())
+        self.syncs += 1
+        self._last_sync = time.monotonic()
+        with self._condition:
+            self._dirty = False
+            self._condition.notify_all()
+
+
+def _read_index(path: str) -> list[tuple[int, int, int, float, float]]:
+    """
+    Reads the complete lines of an index file, none if it is missing.
+
+    Args:
+        path (str): The index file.
+
+    Returns:
+        list[tuple[int, int, int, float, float]]: Offset, smallest and largest ID, earliest and latest time per block.
+    """
+    try:
+        with open(path, "rb") as index:
+            data = index.read()
+    except FileNotFoundError:
+        return []
+    return [_BLOCK.unpack_from(data, offset) for offset in range(0, len(data) - _BLOCK.size + 1, _BLOCK.size)]
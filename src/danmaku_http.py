@@ -0,0 +1,185 @@
+"""
+Minimal HTTP/1.1 framing for the NDJSON ingest endpoint of DanmakuSource: request heads,
+request bodies sent with Content-Length or chunked transfer encoding, read piece by piece
+and split into lines, and responses. Persistent connections are kept unless the client asks otherwise.
+"""
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any, AsyncIterator
+
+# Path danmakus are posted to, one JSON danmaku (or bulk array) per line
+HTTP_INGEST_PATH: str = "/danmaku"
+# Limits protecting the ingest thread from oversized requests
+MAX_HEAD_BYTES: int = 16384 # Request line and headers together
+MAX_LINE_BYTES: int = 1 << 20 # One line of the body
+BODY_READ_SIZE: int = 1 << 16 # Bytes read from the socket at once
+
+
+class HttpError(Exception):
+    """
+    A request that cannot be served; answered with its status, after which the connection is closed.
+    """
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status: HTTPStatus = status
+
+
+class HttpRequest:
+    """
+    The head of one HTTP request; its body is read from the stream afterwards.
+    """
+    __slots__ = ("method", "path", "version", "headers")
+
+    def __init__(self, method: str, path: str, version: str, headers: dict[str, str]) -> None:
+        self.method: str = method
+        self.path: str = path
+        self.version: str = version
+        self.headers: dict[str, str] = headers # Names lower-cased
+
+    @property
+    def keep_alive(self) -> bool:
+        """
+        Whether the connection stays open after this request: the default of HTTP/1.1, opt-in for HTTP/1.0.
+        """
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+async def read_request(reader: asyncio.StreamReader) -> HttpRequest | None:
+    """
+    Reads the request line and headers of the next request on a connection.
+
+    Args:
+        reader (asyncio.StreamReader): The connection, whose limit is at least MAX_HEAD_BYTES.
+
+    Returns:
+        HttpRequest | None: The request, or None if the client closed the connection between requests.
+
+    Raises:
+        HttpError: If the head is malformed or longer than MAX_HEAD_BYTES.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Incomplete request head") from e
+    except asyncio.LimitOverrunError as e:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request head too large") from e
+    if len(head) > MAX_HEAD_BYTES:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request head too large")
+    request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+    parts = request_line.split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers: dict[str, str] = {}
+    for line in header_lines:
+        name, separator, value = line.partition(":")
+        if not separator or not name or name != name.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed header")
+        headers[name.lower()] = value.strip()
+    return HttpRequest(parts[0], parts[1], parts[2], headers)
+
+
+async def read_body(reader: asyncio.StreamReader, request: HttpRequest) -> AsyncIterator[bytes]:
+    """
+    Yields the body of a request piece by piece as it arrives, whatever its size.
+
+    Args:
+        reader (asyncio.StreamReader): The connection, positioned after the request head.
+        request (HttpRequest): The request whose body is read.
+
+    Yields:
+        bytes: Pieces of the body, at most BODY_READ_SIZE bytes each.
+
+    Raises:
+        HttpError: If the body has no declared length, a length is malformed or the client stops early.
+    """
+    if request.headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            try:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed chunk size") from e
+            if size == 0:
+                # Skip the trailer section, which ends with an empty line
+                while (await reader.readline()).strip():
+                    pass
+                return
+            async for piece in _read_exactly(reader, size):
+                yield piece
+            try:
+                end = await reader.readexactly(2)
+            except asyncio.IncompleteReadError:
+                end = b""
+            if end != b"\r\n":
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed chunk")
+        return
+    length = request.headers.get("content-length")
+    if length is None:
+        raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Content-Length or chunked transfer encoding required")
+    if not length.isdigit():
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length")
+    async for piece in _read_exactly(reader, int(length)):
+        yield piece
+
+
+async def _read_exactly(reader: asyncio.StreamReader, size: int) -> AsyncIterator[bytes]:
+    while size:
+        piece = await reader.read(min(size, BODY_READ_SIZE))
+        if not piece:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Request body ended early")
+        size -= len(piece)
+        yield piece
+
+
+async def split_lines(pieces: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Splits a body arriving in pieces into its non-empty lines, holding at most one partial line.
+
+    Args:
+        pieces (AsyncIterator[bytes]): The pieces of the body.
+
+    Yields:
+        bytes: The lines, without line breaks and surrounding whitespace.
+
+    Raises:
+        HttpError: If a line is longer than MAX_LINE_BYTES.
+    """
+    partial = b""
+    async for piece in pieces:
+        lines = piece.split(b"\n")
+        lines[0] = partial + lines[0]
+        partial = lines.pop()
+        if len(partial) > MAX_LINE_BYTES:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Line longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+    partial = partial.strip()
+    if partial:
+        yield partial
+
+
+def response(status: HTTPStatus, body: dict[str, Any], keep_alive: bool) -> bytes:
+    """
+    Builds a complete response with a JSON body.
+
+    Args:
+        status (HTTPStatus): The status of the response.
+        body (dict[str, Any]): The JSON object sent back.
+        keep_alive (bool): Whether the connection stays open for another request.
+
+    Returns:
+        bytes: The response, head and body.
+    """
+    payload = json.dumps(body).encode("utf-8")
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + payload
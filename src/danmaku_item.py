@@ -0,0 +1,99 @@
+from PyQt5.QtGui import QPixmap
+from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_pixmap_cache import danmaku_pixmap_cache, measure_text
+from .danmaku_metrics import danmaku_metrics
+
+def effective_speed(speed: float, distance: float) -> float:
+    """
+    Returns the speed at which a danmaku actually moves.
+    A non-positive speed crosses the given distance in 10 seconds, mirroring DanmakuWidget.
+
+    Args:
+        speed (float): The speed requested by the model, in pixels per second.
+        distance (float): The distance the danmaku travels, in pixels.
+
+    Returns:
+        float: A positive speed in pixels per second.
+    """
+    return speed if speed > 0 else max(distance, 1) / 10
+
+
+class DanmakuItem:
+    """
+    Represents a single danmaku drawn by the canvas renderer.
+    Unlike DanmakuWidget it owns no Qt widget; its position is derived from
+    the elapsed time and the speed of its model every time the canvas is painted.
+    Items are pooled by their manager and rebound to a new danmaku with bind().
+    """
+    def __init__(self, model: DanmakuModel, y: int, start_x: int, end_x: int, start_time: float) -> None:
+        """
+        Initializes a DanmakuItem.
+
+        Args:
+            model (DanmakuModel): The data model for the danmaku.
+            y (int): The top y-coordinate of the danmaku.
+            start_x (int): The x-coordinate at which the danmaku enters.
+            end_x (int): The x-coordinate at which the danmaku has fully left the canvas.
+            start_time (float): The monotonic time (in seconds) at which the danmaku was added.
+        """
+        self.bind(model, y, start_x, end_x, start_time)
+        if danmaku_metrics.enabled:
+            danmaku_metrics.items_created.inc(kind="item")
+
+    def bind(self, model: DanmakuModel, y: int, start_x: int, end_x: int, start_time: float) -> None:
+        """
+        Makes the item display a danmaku, replacing whatever it displayed before.
+
+        Args:
+            model (DanmakuModel): The data model for the danmaku.
+            y (int): The top y-coordinate of the danmaku.
+            start_x (int): The x-coordinate at which the danmaku enters.
+            end_x (int): The x-coordinate at which the danmaku has fully left the canvas.
+            start_time (float): The monotonic time (in seconds) at which the danmaku was added.
+        """
+        self.model: DanmakuModel = model
+        self.danmaku_id: int = model.danmaku_id
+        self.y: int = y
+        self.start_x: int = start_x
+        self.end_x: int = end_x
+        self.start_time: float = start_time
+        self.recalled: bool = False # Set when the danmaku is recalled, the item is dropped on the next frame
+        self.view_mask: int = 1 # Bit 0 for the manager, one more bit per view sharing its layout, see DanmakuView
+        self.speed: float = effective_speed(model.speed, start_x - end_x)
+
+        # Pre-rendered text and shadow, drawn with its top-left corner at (x - padding, y - padding)
+        self.pixmap: QPixmap = danmaku_pixmap_cache.get(model)
+        self.padding: int = danmaku_pixmap_cache.padding
+
+    def x_at(self, now: float) -> float:
+        """
+        Calculates the x-coordinate of the danmaku at the given time.
+
+        Args:
+            now (float): The current monotonic time in seconds.
+
+        Returns:
+            float: The x-coordinate of the left edge of the danmaku.
+        """
+        return self.start_x - self.speed * (now - self.start_time)
+
+    def refresh(self) -> None:
+        """
+        Re-rasterizes the danmaku after its model has changed, keeping its position and speed.
+        The end of the path moves with the new width, so a longer text still leaves the canvas completely.
+        """
+        self.pixmap = danmaku_pixmap_cache.get(self.model)
+        self.padding = danmaku_pixmap_cache.padding # The shadow may have changed since the item was created
+        self.end_x = -measure_text(self.model).width()
+
+    def is_finished(self, now: float) -> bool:
+        """
+        Checks whether the danmaku has completely left the canvas.
+
+        Args:
+            now (float): The current monotonic time in seconds.
+
+        Returns:
+            bool: True if the danmaku is no longer visible.
+        """
+        return self.x_at(now) <= self.end_x
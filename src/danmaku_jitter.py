@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import threading
+import time
+from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_recall import RecallPredicate # Added for type hinting
+
+# Default jitter buffer settings
+DEFAULT_JITTER_LATENCY: float = 1.0 # Seconds added to the intended time of every danmaku
+DEFAULT_MAX_BUFFERED: int = 20000
+OFFSET_WINDOW: float = 30 # Seconds over which the smallest transit time is remembered
+
+
+class DanmakuJitterBuffer:
+    """
+    Plays timestamped danmakus back at the pace they were sent, whatever the bursts of the relays in between.
+    A danmaku is held until its timestamp plus a fixed latency, mapped onto the local clock by the smallest
+    transit time observed recently; danmakus are released in timestamp order, so late arrivals are reordered.
+    A danmaku arriving after its release time is released at once and counted as late.
+    Pending danmakus are kept in a heap; pushing and releasing cost O(log n). Danmakus are pushed and released
+    in the source thread, a bulk recall may remove them from the GUI thread, so the heap is guarded by a lock.
+    """
+    def __init__(self, latency: float = DEFAULT_JITTER_LATENCY, max_buffered: int = DEFAULT_MAX_BUFFERED) -> None:
+        """
+        Initializes the DanmakuJitterBuffer.
+
+        Args:
+            latency (float, optional): Seconds between the intended time of a danmaku and its release; should exceed
+                the longest pause between two bursts. Defaults to DEFAULT_JITTER_LATENCY.
+            max_buffered (int, optional): Danmakus held at most; beyond it the earliest one is released ahead of time. Defaults to DEFAULT_MAX_BUFFERED.
+
+        Raises:
+            ValueError: If latency is negative or max_buffered is not positive.
+        """
+        if latency < 0:
+            raise ValueError("latency must not be negative.")
+        if max_buffered <= 0:
+            raise ValueError("max_buffered must be a positive integer.")
+        self.latency: float = latency
+        self.max_buffered: int = max_buffered
+
+        self.pushed: int = 0
+        self.released: int = 0
+        self.late: int = 0
+        self.early: int = 0 # Released ahead of time because the buffer was full
+        self.total_lateness: float = 0
+        self.max_lateness: float = 0
+
+        # (release time, sequence number, danmaku), the sequence keeps equal times in arrival order
+        self._heap: list[tuple[float, int, DanmakuModel]] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._sequence: itertools.count = itertools.count()
+        # Smallest local arrival time minus timestamp, over the current and the previous window
+        self._offset: float | None = None
+        self._previous_offset: float | None = None
+        self._window_start: float | None = None
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of danmakus held.
+        """
+        return len(self._heap)
+
+    @property
+    def offset(self) -> float | None:
+        """
+        The estimated local time minus sender time for a danmaku in transit as short as possible, None before the first danmaku.
+        """
+        if self._previous_offset is None:
+            return self._offset
+        return min(self._offset, self._previous_offset)
+
+    def push(self, model: DanmakuModel, now: float | None = None) -> list[DanmakuModel]:
+        """
+        Holds a timestamped danmaku until its release time.
+
+        Args:
+            model (DanmakuModel): The danmaku, with sent_at set.
+            now (float | None, optional): The current time.monotonic(). Defaults to the time of the call.
+
+        Returns:
+            list[DanmakuModel]: Danmakus to release right away: the danmaku itself if it arrived late,
+            or the earliest held one if the buffer overflowed.
+        """
+        if now is None:
+            now = time.monotonic()
+        self._observe(now - model.sent_at, now)
+        self.pushed += 1
+        release_at = model.sent_at + self.offset + self.latency
+        if release_at <= now:
+            self._count_late(now - release_at)
+            self.released += 1
+            return [model]
+        with self._lock:
+            heapq.heappush(self._heap, (release_at, next(self._sequence), model))
+            if len(self._heap) <= self.max_buffered:
+                return []
+            self.early += 1
+            self.released += 1
+            return [heapq.heappop(self._heap)[2]]
+
+    def release(self, now: float | None = None) -> list[DanmakuModel]:
+        """
+        Releases every danmaku whose time has come.
+
+        Args:
+            now (float | None, optional): The current time.monotonic(). Defaults to the time of the call.
+
+        Returns:
+            list[DanmakuModel]: The released danmakus, in timestamp order.
+        """
+        if now is None:
+            now = time.monotonic()
+        released: list[DanmakuModel] = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                released.append(heapq.heappop(heap)[2])
+            self.released += len(released)
+        return released
+
+    def remove_matching(self, predicate: RecallPredicate) -> int:
+        """
+        Removes the held danmakus selected by a bulk recall. Safe to call from any thread.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            int: The number of danmakus removed.
+        """
+        with self._lock:
+            kept = [entry for entry in self._heap if not predicate.matches(entry[2])]
+            removed = len(self._heap) - len(kept)
+            if removed:
+                heapq.heapify(kept)
+                self._heap = kept
+            return removed
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the counters of the jitter buffer.
+
+        Returns:
+            dict[str, float]: Pushed, released, late and early danmakus, held danmakus,
+            and the mean and maximum lateness of late danmakus in seconds.
+        """
+        return {
+            "pushed": self.pushed,
+            "released": self.released,
+            "late": self.late,
+            "early": self.early,
+            "depth": len(self._heap),
+            "mean_lateness": self.total_lateness / self.late if self.late else 0,
+            "max_lateness": self.max_lateness,
+        }
+
+    def _observe(self, transit: float, now: float) -> None:
+        """
+        Updates the smallest transit time, forgetting values older than two windows so the clocks may drift.
+        """
+        if self._window_start is None or now - self._window_start >= OFFSET_WINDOW:
+            self._previous_offset = self._offset
+            self._offset = transit
+            self._window_start = now
+        elif transit < self._offset:
+            self._offset = transit
+
+    def _count_late(self, lateness: float) -> None:
+        self.late += 1
+        self.total_lateness += lateness
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
@@ -0,0 +1,137 @@
+import math
+
+# Policies applied when no lane can take a new danmaku
+LANE_FULL_HOLD: str = "hold" # Keep the danmaku and retry on the next frames
+LANE_FULL_DROP: str = "drop" # Discard the danmaku
+LANE_FULL_POLICIES: tuple[str, ...] = (LANE_FULL_HOLD, LANE_FULL_DROP)
+
+# Default horizontal gap between two danmakus in the same lane, in pixels
+DEFAULT_LANE_GAP: int = 20
+
+
+class LaneAllocator:
+    """
+    Assigns danmakus to horizontal lanes so that no two danmakus ever overlap.
+
+    Only the last danmaku entering a lane matters: it is the one a newcomer could catch up with.
+    For that danmaku each lane records two times:
+      * enter_free: when its tail is `gap` pixels inside the canvas, so a newcomer can enter behind it;
+      * exit: when it has completely left the canvas.
+    A newcomer of speed v entering at time t cannot catch the previous danmaku before it leaves if
+    its head reaches x = gap no earlier than the previous exit, i.e. t + (width - gap) / v >= exit.
+    Both conditions are kept as minimums in a segment tree, so the top-most usable lane is found
+    by descending only into subtrees that may hold one, in O(log L) for the usual case.
+    """
+    def __init__(self, canvas_width: int, lane_count: int, gap: int = DEFAULT_LANE_GAP) -> None:
+        """
+        Initializes a LaneAllocator with every lane free.
+
+        Args:
+            canvas_width (int): The width of the canvas the danmakus cross, in pixels.
+            lane_count (int): The number of lanes.
+            gap (int, optional): Minimum horizontal gap between two danmakus of a lane. Defaults to DEFAULT_LANE_GAP.
+        """
+        self.gap: int = gap
+        self.reset(canvas_width, lane_count)
+
+    def reset(self, canvas_width: int, lane_count: int) -> None:
+        """
+        Resizes the allocator and frees every lane.
+
+        Args:
+            canvas_width (int): The width of the canvas the danmakus cross, in pixels.
+            lane_count (int): The number of lanes.
+        """
+        self.canvas_width: int = canvas_width
+        self.lane_count: int = max(0, lane_count)
+        self._leaves: int = 1
+        while self._leaves < self.lane_count:
+            self._leaves *= 2
+        # Padding leaves beyond lane_count are never free
+        self._min_enter: list[float] = [math.inf] * (2 * self._leaves)
+        self._min_exit: list[float] = [math.inf] * (2 * self._leaves)
+        for lane in range(self.lane_count):
+            self._set(lane, -math.inf, -math.inf)
+
+    def allocate(self, width: int, speed: float, now: float, lanes_needed: int = 1) -> int | None:
+        """
+        Finds the top-most run of free lanes for a danmaku entering at the right edge and reserves it.
+
+        Args:
+            width (int): The measured width of the danmaku in pixels.
+            speed (float): The speed of the danmaku in pixels per second, must be positive.
+            now (float): The monotonic time (in seconds) at which the danmaku enters.
+            lanes_needed (int, optional): The number of adjacent lanes the danmaku covers. Defaults to 1.
+
+        Returns:
+            int | None: The index of the first reserved lane, or None if no run of lanes is free.
+        """
+        lanes_needed = max(1, lanes_needed)
+        deadline = now + (self.canvas_width - self.gap) / speed
+        start = 0
+        while start + lanes_needed <= self.lane_count:
+            lane = self._find_free(1, 0, self._leaves, start, now, deadline)
+            if lane < 0 or lane + lanes_needed > self.lane_count:
+                return None
+            # Tall danmakus need every covered lane to be free
+            blocked = next((other for other in range(lane + 1, lane + lanes_needed)
+                            if not self._is_free(other, now, deadline)), None)
+            if blocked is None:
+                enter_free = now + (width + self.gap) / speed
+                exit_time = now + (self.canvas_width + width) / speed
+                for reserved in range(lane, lane + lanes_needed):
+                    self._set(reserved, enter_free, exit_time)
+                return lane
+            start = blocked + 1
+        return None
+
+    def extend(self, lane: int, lanes_needed: int, enter_free: float, exit_time: float) -> None:
+        """
+        Pushes back the times of lanes whose last danmaku has grown, so newcomers keep their distance.
+        Times that are already later are kept.
+
+        Args:
+            lane (int): The first lane covered by the danmaku.
+            lanes_needed (int): The number of lanes the danmaku covers.
+            enter_free (float): When the grown danmaku leaves room for a newcomer.
+            exit_time (float): When the grown danmaku has completely left the canvas.
+        """
+        for extended in range(max(0, lane), min(self.lane_count, lane + lanes_needed)):
+            leaf = self._leaves + extended
+            self._set(extended, max(self._min_enter[leaf], enter_free), max(self._min_exit[leaf], exit_time))
+
+    def _is_free(self, lane: int, now: float, deadline: float) -> bool:
+        """
+        Checks a single lane against both conditions.
+        """
+        leaf = self._leaves + lane
+        return self._min_enter[leaf] <= now and self._min_exit[leaf] <= deadline
+
+    def _find_free(self, node: int, low: int, high: int, start: int, now: float, deadline: float) -> int:
+        """
+        Returns the smallest free lane index >= start within the subtree of node, or -1.
+        """
+        if high <= start or self._min_enter[node] > now or self._min_exit[node] > deadline:
+            return -1
+        if high - low == 1:
+            # Both minimums of a leaf belong to the same lane, so the lane is free
+            return low
+        middle = (low + high) // 2
+        lane = self._find_free(2 * node, low, middle, start, now, deadline)
+        if lane >= 0:
+            return lane
+        return self._find_free(2 * node + 1, middle, high, start, now, deadline)
+
+    def _set(self, lane: int, enter_free: float, exit_time: float) -> None:
+        """
+        Stores the times of a lane and updates the minimums of its ancestors.
+        """
+        node = self._leaves + lane
+        self._min_enter[node] = enter_free
+        self._min_exit[node] = exit_time
+        node //= 2
+        while node:
+            left, right = 2 * node, 2 * node + 1
+            self._min_enter[node] = min(self._min_enter[left], self._min_enter[right])
+            self._min_exit[node] = min(self._min_exit[left], self._min_exit[right])
+            node //= 2
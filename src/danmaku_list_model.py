@@ -0,0 +1,188 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QObject
+from typing import Any
+from .danmaku_model import DanmakuModel # Added for type hinting
+
+# Default number of danmakus kept in the control panel list
+DEFAULT_HISTORY_CAPACITY: int = 10000
+
+
+class DanmakuListModel(QAbstractListModel):
+    """
+    List model of the most recent danmakus, backed by a fixed-size ring buffer.
+    Appending evicts the oldest rows once the capacity is reached, so memory stays bounded.
+    Removing by ID is O(1): the entry becomes a tombstone in place and the view hides its row,
+    which keeps the row of every other entry unchanged. Since every hidden row slows down the view's
+    row insertions and removals, the owner compacts the tombstones away once there are many of them.
+    """
+    def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY, parent: QObject | None = None) -> None:
+        """
+        Initializes the DanmakuListModel.
+
+        Args:
+            capacity (int, optional): Maximum number of rows kept. Defaults to DEFAULT_HISTORY_CAPACITY.
+            parent (QObject | None, optional): The parent object. Defaults to None.
+
+        Raises:
+            ValueError: If capacity is not positive.
+        """
+        super().__init__(parent)
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive integer.")
+        self.capacity: int = capacity
+        # Entries are (danmaku ID, display text); None marks a removed (tombstoned) entry
+        self._slots: list[tuple[int, str] | None] = [None] * capacity
+        self._first_seq: int = 0 # Sequence number of row 0
+        self._next_seq: int = 0 # Sequence number of the next appended entry
+        self._seq_by_id: dict[int, int] = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """
+        Returns the number of rows, removed entries included.
+        """
+        if parent.isValid():
+            return 0
+        return self._next_seq - self._first_seq
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        """
+        Returns the display text (DisplayRole) or the danmaku ID (UserRole) of a row.
+        """
+        entry = self._entry(index)
+        if entry is None:
+            return None
+        if role == Qt.DisplayRole:
+            return entry[1]
+        if role == Qt.UserRole:
+            return entry[0]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        """
+        Makes removed entries neither selectable nor enabled.
+        """
+        if self._entry(index) is None:
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def append_batch(self, models: list[DanmakuModel]) -> None:
+        """
+        Appends danmakus at the bottom, evicting the oldest rows beyond the capacity.
+
+        Args:
+            models (list[DanmakuModel]): The danmakus to append, oldest first.
+        """
+        models = models[-self.capacity:]
+        if not models:
+            return
+        overflow = self.rowCount() + len(models) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for seq in range(self._first_seq, self._first_seq + overflow):
+                slot = seq % self.capacity
+                entry = self._slots[slot]
+                if entry is not None:
+                    del self._seq_by_id[entry[0]]
+                self._slots[slot] = None
+            self._first_seq += overflow
+            self.endRemoveRows()
+
+        first_row = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(models) - 1)
+        for model in models:
+            self._slots[self._next_seq % self.capacity] = (model.danmaku_id, f"{model.danmaku_id}: {model.display_text}")
+            self._seq_by_id[model.danmaku_id] = self._next_seq
+            self._next_seq += 1
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        """
+        Removes every row, such as before showing another page of the history.
+        """
+        self.beginResetModel()
+        self._slots = [None] * self.capacity
+        self._first_seq = self._next_seq = 0
+        self._seq_by_id.clear()
+        self.endResetModel()
+
+    @property
+    def tombstones(self) -> int:
+        """
+        Returns the number of removed entries still taking up a row.
+        """
+        return self.rowCount() - len(self._seq_by_id)
+
+    def compact(self) -> None:
+        """
+        Drops the removed entries, renumbering the remaining rows in order.
+        The model is reset, so views forget the rows they hid along with the selection.
+        """
+        entries = [self._slots[seq % self.capacity] for seq in range(self._first_seq, self._next_seq)]
+        live = [entry for entry in entries if entry is not None]
+        self.beginResetModel()
+        self._slots = live + [None] * (self.capacity - len(live))
+        self._first_seq = 0
+        self._next_seq = len(live)
+        self._seq_by_id = {entry[0]: seq for seq, entry in enumerate(live)}
+        self.endResetModel()
+
+    def remove(self, danmaku_id: int) -> int:
+        """
+        Removes a danmaku by ID, leaving a tombstone in its row.
+
+        Args:
+            danmaku_id (int): The ID of the danmaku to remove.
+
+        Returns:
+            int: The row of the removed entry, which the view should hide, or -1 if the ID is unknown.
+        """
+        seq = self._seq_by_id.pop(danmaku_id, None)
+        if seq is None:
+            return -1
+        self._slots[seq % self.capacity] = None
+        row = seq - self._first_seq
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        return row
+
+    def update(self, model: DanmakuModel) -> int:
+        """
+        Refreshes the text of a danmaku still in the list, such as a folded danmaku showing a new count.
+
+        Args:
+            model (DanmakuModel): The changed danmaku.
+
+        Returns:
+            int: The row of the danmaku, or -1 if it is not in the list.
+        """
+        seq = self._seq_by_id.get(model.danmaku_id)
+        if seq is None:
+            return -1
+        self._slots[seq % self.capacity] = (model.danmaku_id, f"{model.danmaku_id}: {model.display_text}")
+        row = seq - self._first_seq
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        return row
+
+    def row_for_id(self, danmaku_id: int) -> int:
+        """
+        Returns the row of a danmaku, or -1 if it is not in the list.
+
+        Args:
+            danmaku_id (int): The ID of the danmaku.
+
+        Returns:
+            int: The row of the danmaku.
+        """
+        seq = self._seq_by_id.get(danmaku_id)
+        return -1 if seq is None else seq - self._first_seq
+
+    def __contains__(self, danmaku_id: int) -> bool:
+        return danmaku_id in self._seq_by_id
+
+    def _entry(self, index: QModelIndex) -> tuple[int, str] | None:
+        """
+        Returns the entry stored for a model index, or None if it is invalid or removed.
+        """
+        if not index.isValid() or not 0 <= index.row() < self.rowCount():
+            return None
+        return self._slots[(self._first_seq + index.row()) % self.capacity]
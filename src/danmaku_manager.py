@@ -1,97 +1,629 @@
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QPoint
-from PyQt5.QtGui import QResizeEvent # Added for type hinting
+from PyQt5.QtCore import Qt, QPoint, QTimer
+from PyQt5.QtGui import QResizeEvent, QPaintEvent, QPainter, QImage # Added for type hinting
 from collections import deque
-import random
+import time
 from .danmaku_widget import DanmakuWidget
+from .danmaku_item import DanmakuItem, effective_speed
+from .danmaku_lanes import LaneAllocator, LANE_FULL_HOLD, LANE_FULL_POLICIES
+from .danmaku_pixmap_cache import measure_text
 from .danmaku_signal import danmaku_signal
 from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_registry import danmaku_registry
+from .danmaku_metrics import danmaku_metrics
+from .danmaku_quality import danmaku_quality_governor, QualityLevel
+from .danmaku_pool import DanmakuItemPool
+from .danmaku_view import ScreenView, DanmakuView
+from .danmaku_recall import RecallPredicate # Added for type hinting
+
+# Render modes supported by DanmakuManager.
+# "canvas" draws every active danmaku in a single paintEvent driven by one frame timer,
+# "widget" creates one animated DanmakuWidget per danmaku and is kept as a fallback.
+RENDER_MODE_CANVAS: str = "canvas"
+RENDER_MODE_WIDGET: str = "widget"
+
+# Interval of the canvas frame timer in milliseconds (roughly 60 frames per second)
+FRAME_INTERVAL_MS: int = 16
+
+# Share of the widget height, from the top, in which danmakus are laid out
+DEFAULT_DISPLAY_AREA_RATIO: float = 0.25
+
+# Maximum number of danmakus held while every lane is busy; the oldest are dropped beyond it
+MAX_HELD_DANMAKU: int = 1000
 
 class DanmakuManager(QWidget):
     """
     Manages the display and positioning of danmaku messages on a widget.
-    It calculates available vertical positions and ensures danmakus are spaced out.
+    Danmakus are assigned to lanes by a LaneAllocator, so they never overlap.
+    In canvas mode, DanmakuViews on other screens can paint the same layout: danmakus are placed, moved
+    and expired once per frame for all of them, and every view only blits the danmakus it shows.
     """
-    def __init__(self) -> None:
+    def __init__(self, render_mode: str = RENDER_MODE_CANVAS, lane_full_policy: str = LANE_FULL_HOLD,
+                 screen_view: ScreenView | None = None) -> None:
         """
         Initializes the DanmakuManager.
         Sets up attributes for translucent background and mouse tracking.
-        Calculates initial available positions for danmakus.
+        Calculates the initial lanes for danmakus.
+
+        Args:
+            render_mode (str, optional): Either RENDER_MODE_CANVAS or RENDER_MODE_WIDGET. Defaults to RENDER_MODE_CANVAS.
+            lane_full_policy (str, optional): LANE_FULL_HOLD or LANE_FULL_DROP, applied when no lane is free. Defaults to LANE_FULL_HOLD.
+            screen_view (ScreenView | None, optional): The share and density cap of the danmakus painted by the manager itself,
+                only honoured in canvas mode. Defaults to showing every danmaku.
+
+        Raises:
+            ValueError: If render_mode or lane_full_policy is not supported.
         """
         super().__init__()
+        if render_mode not in (RENDER_MODE_CANVAS, RENDER_MODE_WIDGET):
+            raise ValueError(f"Unsupported render mode: {render_mode}")
+        if lane_full_policy not in LANE_FULL_POLICIES:
+            raise ValueError(f"Unsupported lane full policy: {lane_full_policy}")
+        self.render_mode: str = render_mode
+        self.lane_full_policy: str = lane_full_policy
+
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setStyleSheet("background: transparent;")
         self.setMouseTracking(True)
 
-        self.available_y_queue: deque[int] = deque()
-        self.min_spacing_ratio: float = 1.0 # Changed type to float for clarity
-        self._calculate_available_positions()
+        self.display_area_ratio: float = DEFAULT_DISPLAY_AREA_RATIO
+        self.lane_height: int = 1
+        self.lanes: LaneAllocator = LaneAllocator(0, 0)
+        self._calculate_lanes()
+        # Danmakus waiting for a free lane, and the number dropped because none was free
+        self.held_models: deque[DanmakuModel] = deque()
+        self.lane_drops: int = 0
 
+        # Flat list of danmakus drawn by the canvas renderer
+        self.active_items: list[DanmakuItem] = []
+        self.frame_timer: QTimer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.PreciseTimer)
+        self.frame_timer.setInterval(FRAME_INTERVAL_MS)
+        self.frame_timer.timeout.connect(self._on_frame)
+        # Number of live DanmakuWidget instances in widget mode
+        self._widget_count: int = 0
+        # Items that left the screen, rebound to new danmakus instead of being rebuilt
+        self.item_pool: DanmakuItemPool[DanmakuItem] | DanmakuItemPool[DanmakuWidget] = (
+            DanmakuItemPool() if render_mode == RENDER_MODE_CANVAS else DanmakuItemPool(destroy=DanmakuWidget.deleteLater))
+        # Only filled while metrics are enabled: items not painted yet, and when the current frame started
+        self._unpainted_items: list[DanmakuItem] = []
+        self._frame_started: float | None = None
 
-    def _calculate_available_positions(self) -> None:
-        """
-        Calculates and shuffles available vertical (y) positions for danmaku display.
-        The positions are based on the widget's height and minimum spacing ratio.
-        """
-        self.available_y_queue.clear()
-        # Ensure max_available_height is an integer for range function
-        max_available_height = int(self.height() // 4)
-        # Ensure min_spacing is an integer for range step
-        min_spacing = int(self.size().height() / 4 / 10 * self.min_spacing_ratio)
-        if min_spacing <= 0: # Prevent zero or negative step in range
-            min_spacing = 1 
-        
-        available_y_positions = []
-        for y in range(0, max_available_height, min_spacing):
-            available_y_positions.append(y)
-        
-        random.shuffle(available_y_positions)
-        self.available_y_queue.extend(available_y_positions)
+        # Views sharing the layout; bit 0 of the view mask of an item stands for the manager, bit i for views[i - 1]
+        self.screen_view: ScreenView = screen_view or ScreenView()
+        self.views: list[DanmakuView] = []
+        self._view_configs: list[ScreenView] = [self.screen_view]
+        self._view_counts: list[int] = [0] # Danmakus shown per bit index
+        # Views showing every danmaku blit one frame composed per tick instead of drawing every danmaku again.
+        # composed_frame is set while the current frame is composed; rows below frame_height hold no danmaku
+        self.composed_frame: QImage | None = None
+        self.frame_height: int = 0
+        self._frame_image: QImage | None = None
 
+        # Quality settings follow the global governor; frames are measured for it while it is enabled
+        self.max_active: int | None = None
+        self._last_tick: float | None = None
+        self._tick_lateness: float = 0.0
+        self._tick_unreported: bool = False # Set by a frame until its paint has been reported
+        self._apply_quality_level(danmaku_quality_governor.level)
+        danmaku_quality_governor.level_changed.connect(self._apply_quality_level)
 
-    def get_next_y_position(self) -> int:
-        """
-        Retrieves the next available y-position from the queue for a new danmaku.
-        Adds a small random jitter to the position.
-        If the queue is empty, defaults to 0.
 
-        Returns:
-            int: The calculated y-position for the next danmaku.
+    def _calculate_lanes(self) -> None:
+        """
+        Splits the display area into lanes one default danmaku high and frees all of them.
         """
-        if not self.available_y_queue:
-            return 0 # Default to top if no positions are available
-        
-        y = self.available_y_queue.popleft()
-        self.available_y_queue.append(y) # Cycle the position back to the end of the queue
-        
-        jitter = random.randint(-5, 5)
-        # Ensure position is within widget bounds
-        return max(0, min(self.height() - 20, y + jitter)) # Subtract 20 to avoid danmaku going off-screen
+        self.lane_height = max(1, measure_text(DanmakuModel("")).height())
+        lane_count = max(1, int(self.height() * self.display_area_ratio) // self.lane_height)
+        self.lanes.reset(self.width(), lane_count)
 
 
     def resizeEvent(self, event: QResizeEvent) -> None:
         """
         Handles the resize event of the widget.
-        Recalculates available y-positions when the widget size changes.
+        Recalculates the lanes when the widget size changes.
 
         Args:
             event (QResizeEvent): The resize event.
         """
         super().resizeEvent(event) # Call base class implementation
-        self._calculate_available_positions()
+        self._calculate_lanes()
+
+
+    def _apply_quality_level(self, level: QualityLevel) -> None:
+        """
+        Applies the density cap and frame rate of a quality level.
+
+        Args:
+            level (QualityLevel): The new quality level.
+        """
+        self.max_active = level.max_active
+        self.frame_timer.setInterval(level.frame_interval_ms)
+
+
+    @property
+    def displayed_count(self) -> int:
+        """
+        The number of danmakus currently displayed by this manager, held ones excluded.
+        """
+        if self.render_mode == RENDER_MODE_CANVAS:
+            return len(self.active_items)
+        return self._widget_count
+
+
+    @property
+    def active_count(self) -> int:
+        """
+        The number of danmakus currently displayed or held for a lane by this manager.
+        """
+        if self.render_mode == RENDER_MODE_CANVAS:
+            return len(self.active_items) + len(self.held_models)
+        return self._widget_count + len(self.held_models)
+
+
+    def attach_view(self, view: DanmakuView) -> int:
+        """
+        Makes a view paint the layout of this manager, starting with the next danmaku placed.
+
+        Args:
+            view (DanmakuView): The view.
+
+        Returns:
+            int: The bit standing for the view in the view mask of every DanmakuItem.
+
+        Raises:
+            ValueError: If the manager does not render in canvas mode.
+        """
+        if self.render_mode != RENDER_MODE_CANVAS:
+            raise ValueError("Only a canvas mode manager can share its layout with views.")
+        self.views.append(view)
+        self._view_configs.append(view.screen_view)
+        self._view_counts.append(0)
+        return 1 << len(self.views)
+
+
+    def shown_count(self, view_bit: int = 1) -> int:
+        """
+        Returns the number of danmakus currently shown by the manager or one of its views.
+
+        Args:
+            view_bit (int, optional): The bit of the view, 1 for the manager itself. Defaults to 1.
+
+        Returns:
+            int: The number of danmakus shown.
+        """
+        if self.render_mode == RENDER_MODE_WIDGET:
+            return self._widget_count
+        return self._view_counts[view_bit.bit_length() - 1]
+
+
+    def _view_mask(self, model: DanmakuModel) -> int:
+        """
+        Picks the views showing a danmaku being placed, by their share and density cap, and counts it for them.
+
+        Args:
+            model (DanmakuModel): The danmaku.
+
+        Returns:
+            int: The view mask of the danmaku.
+        """
+        mask = 0
+        counts = self._view_counts
+        for index, config in enumerate(self._view_configs):
+            if config.accepts(model) and (config.max_active is None or counts[index] < config.max_active):
+                mask |= 1 << index
+                counts[index] += 1
+        return mask
+
+
+    def _forget_view_mask(self, item: DanmakuItem) -> None:
+        """
+        Uncounts a danmaku leaving the canvas from the views that showed it.
+
+        Args:
+            item (DanmakuItem): The item leaving.
+        """
+        mask = item.view_mask
+        index = 0
+        while mask:
+            if mask & 1:
+                self._view_counts[index] -= 1
+            mask >>= 1
+            index += 1
+
+
+    def _repaint(self, height: int | None = None) -> None:
+        """
+        Schedules a repaint of the manager and of every view sharing its layout.
+
+        Args:
+            height (int | None, optional): Repaints only this many rows from the top, None repaints everything. Defaults to None.
+        """
+        if height is None:
+            self.update()
+            for view in self.views:
+                view.update()
+            return
+        self.update(0, 0, self.width(), height)
+        for view in self.views:
+            view.update_rows(height)
+
+
+    def _compose_frame(self, now: float, height: int) -> QImage:
+        """
+        Draws every active danmaku once into the frame image blitted by the views showing all of them.
+
+        Args:
+            now (float): The current monotonic time in seconds.
+            height (int): The rows to clear first, covering every danmaku of the previous frame.
+
+        Returns:
+            QImage: The composed frame.
+        """
+        image = self._frame_image
+        if image is None or image.size() != self.size():
+            image = self._frame_image = QImage(self.size(), QImage.Format_ARGB32_Premultiplied)
+            image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(0, 0, image.width(), height, Qt.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        for item in self.active_items:
+            painter.drawPixmap(int(item.x_at(now)) - item.padding, item.y - item.padding, item.pixmap)
+        painter.end()
+        return image
 
 
     def add_danmaku(self, model: DanmakuModel) -> None:
         """
         Adds a new danmaku to the manager for display.
-        Creates a DanmakuWidget with the given model and positions it.
 
         Args:
             model (DanmakuModel): The data model for the danmaku to be added.
         """
+        self.add_danmaku_batch([model])
+
+
+    def add_danmaku_batch(self, models: list[DanmakuModel]) -> None:
+        """
+        Adds several danmakus to the manager for display in one pass.
+        Danmakus that find no free lane are held or dropped according to lane_full_policy.
+
+        Args:
+            models (list[DanmakuModel]): The data models for the danmakus to be added.
+        """
+        now = time.monotonic()
+        for model in models:
+            # Keep the order of arrival: nothing overtakes danmakus already waiting for a lane
+            if self.held_models or self._at_density_cap() or not self._place(model, now):
+                self._hold_or_drop(model)
+        self._ensure_frame_timer()
+
+
+    def _place(self, model: DanmakuModel, now: float) -> bool:
+        """
+        Reserves lanes for a danmaku and starts displaying it.
+        In canvas mode a DanmakuItem is appended to the active list,
+        otherwise a DanmakuWidget is created with the model and positioned.
+
+        Args:
+            model (DanmakuModel): The data model for the danmaku to be added.
+            now (float): The current monotonic time in seconds.
+
+        Returns:
+            bool: False if no lane is free for the danmaku.
+        """
         screen_width = self.width()
-        y = self.get_next_y_position()
-        # Ensure end_pos x-coordinate makes the danmaku fully disappear
-        label = DanmakuWidget(model, self, QPoint(screen_width, y), QPoint(-model.size * len(model.text), y)) 
+        text_size = measure_text(model)
+        # Ensure end x-coordinate makes the danmaku fully disappear
+        end_x = -text_size.width()
+        speed = effective_speed(model.speed, screen_width - end_x)
+        lanes_needed = min(self.lanes.lane_count, -(-text_size.height() // self.lane_height))
+        lane = self.lanes.allocate(text_size.width(), speed, now, lanes_needed)
+        if lane is None:
+            return False
+
+        y = lane * self.lane_height
+        if self.render_mode == RENDER_MODE_CANVAS:
+            item = self.item_pool.acquire()
+            if item is None:
+                item = DanmakuItem(model, y, screen_width, end_x, now)
+            else:
+                item.bind(model, y, screen_width, end_x, now)
+            item.view_mask = self._view_mask(model)
+            self.active_items.append(item)
+            danmaku_registry.register(model.danmaku_id, self, item)
+            if danmaku_metrics.enabled:
+                self._unpainted_items.append(item)
+            return True
+        label = self.item_pool.acquire()
+        if label is None:
+            label = DanmakuWidget(model, self, QPoint(screen_width, y), QPoint(end_x, y))
+            label.expired.connect(self._on_item_expired)
+        else:
+            label.bind(model, QPoint(screen_width, y), QPoint(end_x, y))
+        danmaku_registry.register(model.danmaku_id, self, label)
+        self._widget_count += 1
         label.show()
+        return True
+
+
+    def _at_density_cap(self) -> bool:
+        """
+        Checks whether the quality level allows no further danmaku on screen.
+        """
+        return self.max_active is not None and self.displayed_count >= self.max_active
+
+
+    def _hold_or_drop(self, model: DanmakuModel) -> None:
+        """
+        Applies lane_full_policy to a danmaku that found no free lane.
+        A dropped danmaku that no other window shows is reported as finished, so nothing folds into it.
+
+        Args:
+            model (DanmakuModel): The danmaku that could not be placed.
+        """
+        if self.lane_full_policy == LANE_FULL_HOLD:
+            self.held_models.append(model)
+            if len(self.held_models) <= MAX_HELD_DANMAKU:
+                return
+            model = self.held_models.popleft()
+        self.lane_drops += 1
+        if model.danmaku_id not in danmaku_registry:
+            danmaku_signal.danmaku_signal_finished.emit(model.danmaku_id)
+
+
+    def _place_held(self, now: float) -> None:
+        """
+        Places held danmakus, oldest first, until one still finds no free lane.
+
+        Args:
+            now (float): The current monotonic time in seconds.
+        """
+        while self.held_models and not self._at_density_cap() and self._place(self.held_models[0], now):
+            self.held_models.popleft()
+
+
+    def _ensure_frame_timer(self) -> None:
+        """
+        Starts the frame timer when there is something to animate or to place.
+        """
+        busy = self.held_models or (self.render_mode == RENDER_MODE_CANVAS and self.active_items)
+        # Widgets animate on their own, the frame timer then only measures event loop lateness for the governor
+        busy = busy or (danmaku_quality_governor.enabled and self._widget_count)
+        if busy and not self.frame_timer.isActive():
+            self.frame_timer.start()
+
+
+    def remove_item(self, item: DanmakuItem | DanmakuWidget) -> None:
+        """
+        Removes a recalled danmaku from this manager.
+        Called by the danmaku registry, which has already forgotten the item.
+
+        Args:
+            item (DanmakuItem | DanmakuWidget): The item to remove.
+        """
+        self.remove_items([item])
+
+
+    def remove_items(self, items: list[DanmakuItem | DanmakuWidget]) -> None:
+        """
+        Removes several recalled danmakus from this manager, repainting once.
+        Called by the danmaku registry, which has already forgotten the items.
+
+        Args:
+            items (list[DanmakuItem | DanmakuWidget]): The items to remove.
+        """
+        repaint = False
+        for item in items:
+            if isinstance(item, DanmakuWidget):
+                self._widget_count -= 1
+                item.recall()
+                self._release_widget(item)
+                continue
+            # Dropping the item from the active list is deferred to the next frame, keeping recall O(1)
+            item.recalled = True
+            repaint = True
+        if repaint:
+            self._repaint()
+
+
+    def clear(self) -> None:
+        """
+        Removes every danmaku from this manager, held ones included, and forgets them in the danmaku registry.
+        Called when the window owning the manager closes, so nothing refers to its items afterwards.
+        """
+        self.held_models.clear()
+        for item in danmaku_registry.forget_manager(self):
+            if isinstance(item, DanmakuWidget):
+                self._widget_count -= 1
+                item.recall()
+                self._release_widget(item)
+        for item in self.active_items:
+            self._forget_view_mask(item)
+            self.item_pool.release(item)
+        self.active_items = []
+        self.frame_height = 0
+        self._stop_frame_timer()
+        self._repaint()
+
+
+    def recall_held(self, predicate: RecallPredicate) -> list[DanmakuModel]:
+        """
+        Forgets the held danmakus selected by a bulk recall before they find a lane.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            list[DanmakuModel]: The danmakus that were held, oldest first.
+        """
+        recalled: list[DanmakuModel] = []
+        kept: list[DanmakuModel] = []
+        for model in self.held_models:
+            (recalled if predicate.matches(model) else kept).append(model)
+        if recalled:
+            self.held_models.clear()
+            self.held_models.extend(kept)
+        return recalled
+
+
+    def refresh_item(self, item: DanmakuItem | DanmakuWidget) -> None:
+        """
+        Redraws a danmaku whose model has changed, such as a folded danmaku showing a new count.
+        Called by the danmaku registry.
+
+        Args:
+            item (DanmakuItem | DanmakuWidget): The item to redraw.
+        """
+        item.refresh()
+        if isinstance(item, DanmakuWidget):
+            return
+        # A longer text keeps its lanes busy for longer
+        lanes_needed = min(self.lanes.lane_count, -(-measure_text(item.model).height() // self.lane_height))
+        self.lanes.extend(item.y // self.lane_height, lanes_needed,
+                          item.start_time + (-item.end_x + self.lanes.gap) / item.speed,
+                          item.start_time + (item.start_x - item.end_x) / item.speed)
+        self._repaint()
+
+
+    def _on_item_expired(self, item: DanmakuItem | DanmakuWidget) -> None:
+        """
+        Handles a danmaku that has left this manager on its own.
+        Emits the finished signal once the danmaku is gone from every window.
+
+        Args:
+            item (DanmakuItem | DanmakuWidget): The expired item.
+        """
+        danmaku_id = item.danmaku_id
+        if isinstance(item, DanmakuWidget):
+            self._widget_count -= 1
+            self._release_widget(item)
+        if danmaku_registry.unregister(danmaku_id, self, item):
+            danmaku_signal.danmaku_signal_finished.emit(danmaku_id)
+
+
+    def _release_widget(self, widget: DanmakuWidget) -> None:
+        """
+        Returns a widget that left the screen to the pool, shrinking the pool once no widget is shown.
+
+        Args:
+            widget (DanmakuWidget): The hidden widget.
+        """
+        self.item_pool.release(widget)
+        if not self._widget_count:
+            self.item_pool.trim()
+
+
+    def _on_frame(self) -> None:
+        """
+        Advances the manager by one frame.
+        Places held danmakus whose lane has become free, drops danmakus that have left the canvas
+        and schedules a repaint. The frame timer is stopped while there is nothing to do.
+        """
+        now = time.monotonic()
+        if danmaku_metrics.enabled:
+            self._frame_started = now
+        if danmaku_quality_governor.enabled:
+            self._measure_tick(now)
+        self._place_held(now)
+        if self.render_mode == RENDER_MODE_WIDGET:
+            if danmaku_quality_governor.enabled:
+                danmaku_quality_governor.report_frame(self._tick_lateness + time.monotonic() - now)
+            if not self.held_models and not (danmaku_quality_governor.enabled and self._widget_count):
+                self._stop_frame_timer()
+            return
+        remaining_items: list[DanmakuItem] = []
+        bottom = 0
+        for item in self.active_items:
+            if item.recalled:
+                self._forget_view_mask(item)
+                self.item_pool.release(item)
+                continue
+            if item.is_finished(now):
+                self._on_item_expired(item)
+                self._forget_view_mask(item)
+                self.item_pool.release(item)
+                continue
+            remaining_items.append(item)
+            item_bottom = item.y - item.padding + item.pixmap.height()
+            if item_bottom > bottom:
+                bottom = item_bottom
+        self.active_items = remaining_items
+        if not self.active_items and not self.held_models:
+            self._stop_frame_timer()
+        # Only the rows holding danmakus now or on the previous frame need a repaint
+        dirty_height = max(bottom, self.frame_height)
+        self.frame_height = bottom
+        composing = any(view.uses_composed_frame for view in self.views)
+        self.composed_frame = self._compose_frame(now, dirty_height) if composing else None
+        self._repaint(dirty_height)
+
+
+    def _stop_frame_timer(self) -> None:
+        """
+        Stops the frame timer; the pause is not counted as lateness when it restarts.
+        """
+        self.frame_timer.stop()
+        self._last_tick = None
+        if self.render_mode == RENDER_MODE_CANVAS:
+            self.item_pool.trim() # The burst is over
+
+
+    def _measure_tick(self, now: float) -> None:
+        """
+        Records how much later than its interval the frame timer fired, for the quality governor.
+
+        Args:
+            now (float): The monotonic time at which the frame started.
+        """
+        if self._last_tick is None:
+            self._tick_lateness = 0.0
+        else:
+            self._tick_lateness = max(0.0, now - self._last_tick - self.frame_timer.interval() / 1000)
+        self._last_tick = now
+        self._tick_unreported = True
+
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """
+        Draws all active danmakus of the canvas renderer in a single pass.
+
+        Args:
+            event (QPaintEvent): The paint event.
+        """
+        if not self.active_items:
+            self._unpainted_items.clear()
+            return
+        now = time.monotonic()
+        painter = QPainter(self)
+        if self.composed_frame is not None and self.screen_view.shows_all:
+            painter.drawImage(0, 0, self.composed_frame, 0, 0, self.width(), self.frame_height)
+        else:
+            # Every item is a cached pixmap of its text and shadow, so a frame is only a series of blits
+            for item in self.active_items:
+                if item.recalled or not item.view_mask & 1:
+                    continue
+                painter.drawPixmap(int(item.x_at(now)) - item.padding, item.y - item.padding, item.pixmap)
+        painter.end()
+        if danmaku_metrics.enabled:
+            self._record_paint_metrics()
+        if danmaku_quality_governor.enabled and self._tick_unreported:
+            self._tick_unreported = False
+            # Work from the start of the frame to the end of painting, plus how late the frame started
+            danmaku_quality_governor.report_frame(self._tick_lateness + time.monotonic() - self._last_tick)
+
+
+    def _record_paint_metrics(self) -> None:
+        """
+        Records the duration of the frame just painted and the latency of the danmakus painted for the first time.
+        """
+        now = time.monotonic()
+        if self._frame_started is not None:
+            danmaku_metrics.frame_duration.observe(now - self._frame_started)
+            self._frame_started = None
+        for item in self._unpainted_items:
+            if not item.recalled:
+                danmaku_metrics.signal_to_paint.observe(now - item.model.received_at)
+        self._unpainted_items.clear()
 
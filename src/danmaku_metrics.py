@@ -0,0 +1,205 @@
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+import threading
+
+if TYPE_CHECKING: # http.server is only imported once the endpoint is started, it is slow to import
+    from http.server import ThreadingHTTPServer
+
+# Default address of the metrics endpoint; only local clients can reach it
+DEFAULT_METRICS_HOST: str = "127.0.0.1"
+DEFAULT_METRICS_PORT: int = 9321
+
+# Default histogram buckets in seconds, from a tenth of a millisecond to one second
+DEFAULT_BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.0166, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+LabelValues = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: LabelValues) -> str:
+    """
+    Formats label pairs the way the Prometheus text format expects them.
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Counter:
+    """
+    A monotonically increasing value, optionally split by labels.
+    Updates are plain integer additions; under the GIL an occasional lost increment is accepted.
+    """
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Adds amount to the counter of the given labels.
+        """
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        Returns the current value of the counter of the given labels.
+        """
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in list(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down, optionally split by labels.
+    """
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Sets the gauge of the given labels.
+        """
+        self.values[tuple(sorted(labels.items()))] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets, keeping their sum and count.
+    """
+    def __init__(self, name: str, documentation: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1) # The last bucket is +Inf
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Records one observation.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def mean(self) -> float:
+        """
+        Returns the mean of every observation so far, or 0 if there is none.
+        """
+        return self.sum / self.count if self.count else 0.0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            bound_label = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{self.name}_bucket{{le="{bound_label}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class DanmakuMetrics:
+    """
+    Opt-in instrumentation of the danmaku pipeline.
+    Instrumented code checks `enabled` before measuring anything, so a disabled instance
+    costs one attribute lookup per instrumented spot.
+    """
+    def __init__(self) -> None:
+        """
+        Initializes the DanmakuMetrics with every metric of the pipeline, disabled.
+        """
+        self.enabled: bool = False
+        self._server: "ThreadingHTTPServer | None" = None
+
+        self.messages_received: Counter = Counter("danmaku_messages_received_total", "WebSocket messages received.")
+        self.messages_parsed: Counter = Counter("danmaku_messages_parsed_total", "Danmakus parsed successfully.")
+        self.messages_rejected: Counter = Counter("danmaku_messages_rejected_total", "Danmakus rejected, by reason.")
+        self.messages_folded: Counter = Counter("danmaku_messages_folded_total", "Danmakus folded into an earlier copy.")
+        self.messages_filtered: Counter = Counter("danmaku_messages_filtered_total", "Danmakus blocked or masked by the keyword filter, by action.")
+        self.messages_recalled: Counter = Counter("danmaku_messages_recalled_total", "Danmakus removed by bulk recalls, by stage.")
+        self.admission_dropped: Counter = Counter("danmaku_admission_dropped_total", "Danmakus dropped by admission control.")
+        self.queue_depth: Gauge = Gauge("danmaku_queue_depth", "Danmakus waiting in the source thread for the GUI thread.")
+        self.active_items: Gauge = Gauge("danmaku_active_items", "Danmakus displayed or held for a lane, per window.")
+        self.quality_level: Gauge = Gauge("danmaku_quality_level", "Rendering quality level, 0 is full quality.")
+        self.items_created: Counter = Counter("danmaku_items_created_total", "Display items created, by kind.")
+        self.pixmap_cache: Gauge = Gauge("danmaku_pixmap_cache", "Pixmap cache counters, by field.")
+        self.item_pool: Gauge = Gauge("danmaku_item_pool", "Display item pool counters, per window and field.")
+        self.jitter_buffer: Gauge = Gauge("danmaku_jitter_buffer", "Jitter buffer counters and lateness in seconds, by field.")
+        self.signal_to_paint: Histogram = Histogram("danmaku_signal_to_paint_seconds",
+                                                    "Time from receiving a danmaku to painting it first.")
+        self.frame_duration: Histogram = Histogram("danmaku_frame_seconds", "Time spent updating and painting one frame.")
+
+    def enable(self) -> None:
+        """
+        Turns instrumentation on.
+        """
+        self.enabled = True
+
+    def render_prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics document.
+        """
+        lines: list[str] = []
+        for metric in (self.messages_received, self.messages_parsed, self.messages_rejected,
+                       self.messages_folded, self.messages_filtered, self.messages_recalled, self.admission_dropped, self.queue_depth, self.active_items,
+                       self.quality_level, self.items_created, self.pixmap_cache, self.item_pool, self.jitter_buffer, self.signal_to_paint, self.frame_duration):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def start_server(self, host: str = DEFAULT_METRICS_HOST, port: int = DEFAULT_METRICS_PORT) -> None:
+        """
+        Enables instrumentation and serves /metrics over HTTP from a daemon thread.
+
+        Args:
+            host (str, optional): The interface to listen on. Defaults to DEFAULT_METRICS_HOST.
+            port (int, optional): The port to listen on. Defaults to DEFAULT_METRICS_PORT.
+        """
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        self.enable()
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass # Scrapes every few seconds would flood the console
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Danmaku metrics served on http://{host}:{port}/metrics")
+
+    def stop_server(self) -> None:
+        """
+        Stops the metrics endpoint if it is running.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Global instance of the DanmakuMetrics class for application-wide use.
+danmaku_metrics: DanmakuMetrics = DanmakuMetrics()
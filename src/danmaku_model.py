@@ -1,20 +1,81 @@
-from PyQt5.QtGui import QFont
-import uuid
+import itertools
+import math
+import sys
+import time
+from typing import Any
+
+# Defaults matching QFont.Normal and QFont.StyleNormal, so models can be built without importing Qt
+FONT_WEIGHT_NORMAL: int = 50
+FONT_STYLE_NORMAL: int = 0
+
+# Longest display delay a message may ask for, in seconds
+MAX_DISPLAY_DELAY: float = 600
+
+# Ranges of the numeric fields and longest string field in UTF-8 bytes a message may carry: the widths of
+# the binary record of src.danmaku_record, so every danmaku accepted here can be packed and logged
+SIZE_SPEED_RANGE: tuple[int, int] = (-2**31, 2**31 - 1)
+FONT_FIELD_RANGE: tuple[int, int] = (-2**15, 2**15 - 1)
+MAX_FIELD_BYTES: int = 2**16 - 1
+
+# IDs are integers counting up from the start time of the process in milliseconds, shifted by 20 bits.
+# They are monotonic within a run and unique across restarts unless a run issued more than
+# 2**20 IDs per millisecond it was alive. next() on itertools.count is atomic, so any thread may mint IDs.
+_danmaku_ids: itertools.count = itertools.count((time.time_ns() // 1_000_000) << 20)
+
+
+def next_danmaku_id() -> int:
+    """
+    Returns a new danmaku ID.
+
+    Returns:
+        int: An ID greater than every ID issued before, in this run and in previous ones.
+    """
+    return next(_danmaku_ids)
+
+
+def _bounded_int(parsed: dict[str, Any], key: str, default: int, bounds: tuple[int, int]) -> int:
+    """
+    Reads an integer field of a message, rejecting values out of bounds.
+    """
+    value = int(parsed.get(key, default))
+    if not bounds[0] <= value <= bounds[1]:
+        raise ValueError(f"{key} must be between {bounds[0]} and {bounds[1]}, got {value}")
+    return value
+
+
+def _bounded_str(parsed: dict[str, Any], key: str, default: str) -> str:
+    """
+    Reads a string field of a message, rejecting strings longer than MAX_FIELD_BYTES in UTF-8
+    or that cannot be encoded at all, such as lone surrogates.
+    """
+    value = str(parsed.get(key, default))
+    if len(value.encode("utf-8")) > MAX_FIELD_BYTES:
+        raise ValueError(f"{key} must be at most {MAX_FIELD_BYTES} bytes long in UTF-8")
+    return value
+
 
 class DanmakuModel:
     """
     Represents the data model for a single danmaku message.
     Stores properties like text, color, size, speed, and font details.
+    Uses __slots__ and interned strings to keep retained messages small; it does not depend on Qt.
     """
-    def __init__(self, 
-                 text: str, 
-                 color: str = "#FFFFFF", 
-                 size: int = 20, 
-                 speed: int = 300, 
-                 font_family: str = "Microsoft YaHei", 
-                 font_weight: int = QFont.Normal, # Using QFont.Weight type for clarity
-                 font_style: QFont.Style = QFont.StyleNormal, # Using QFont.Style type
-                 text_decoration: str = "") -> None:
+    __slots__ = ("text", "color", "size", "speed", "font_family", "font_weight", "font_style",
+                 "text_decoration", "danmaku_id", "received_at",
+                 "fold_count", "display_delay", "sent_at", "sender")
+
+    def __init__(self,
+                 text: str,
+                 color: str = "#FFFFFF",
+                 size: int = 20,
+                 speed: int = 300,
+                 font_family: str = "Microsoft YaHei",
+                 font_weight: int = FONT_WEIGHT_NORMAL, # Same value as QFont.Normal
+                 font_style: int = FONT_STYLE_NORMAL, # Same value as QFont.StyleNormal
+                 text_decoration: str = "",
+                 display_delay: float = 0,
+                 sent_at: float | None = None,
+                 sender: str | None = None) -> None:
         """
         Initializes a DanmakuModel instance.
 
@@ -24,16 +85,77 @@ class DanmakuModel:
             size (int, optional): The font size of the danmaku. Defaults to 20.
             speed (int, optional): The speed at which the danmaku moves across the screen. Defaults to 300.
             font_family (str, optional): The font family for the danmaku text. Defaults to "Microsoft YaHei".
-            font_weight (int, optional): The font weight (e.g., QFont.Normal, QFont.Bold). Defaults to QFont.Normal.
-            font_style (QFont.Style, optional): The font style (e.g., QFont.StyleNormal, QFont.StyleItalic). Defaults to QFont.StyleNormal.
+            font_weight (int, optional): The font weight (e.g., QFont.Normal, QFont.Bold). Defaults to FONT_WEIGHT_NORMAL.
+            font_style (int, optional): The font style (e.g., QFont.StyleNormal, QFont.StyleItalic). Defaults to FONT_STYLE_NORMAL.
             text_decoration (str, optional): Text decoration (e.g., "underline"). Defaults to "".
+            display_delay (float, optional): Seconds to wait after receiving the danmaku before displaying it. Defaults to 0.
+            sent_at (float | None, optional): When the sender emitted the danmaku, in Unix seconds, None if unknown. Defaults to None.
+            sender (str | None, optional): Who sent the danmaku, as named by the relay, None if unknown. Defaults to None.
         """
         self.text: str = text
-        self.color: str = color
+        # Colors, font families and decorations repeat across messages, share one string object each
+        self.color: str = sys.intern(color)
         self.size: int = size
         self.speed: int = speed
-        self.font_family: str = font_family
-        self.font_weight: int = font_weight # QFont.Weight is an enum, typically int
-        self.font_style: QFont.Style = font_style # QFont.Style is an enum
-        self.text_decoration: str = text_decoration
-        self.danmaku_id: str = str(uuid.uuid4())
\ No newline at end of file
+        self.font_family: str = sys.intern(font_family)
+        self.font_weight: int = int(font_weight) # QFont.Weight is an enum, stored as a small int
+        self.font_style: int = int(font_style) # QFont.Style is an enum, stored as a small int
+        self.text_decoration: str = sys.intern(text_decoration)
+        self.danmaku_id: int = next_danmaku_id()
+        self.received_at: float = time.monotonic() # When the danmaku entered the application
+        self.fold_count: int = 1 # Number of identical danmakus shown by this one, see DanmakuFolder
+        self.display_delay: float = display_delay # Honoured by the DanmakuScheduler of the control panel
+        self.sent_at: float | None = sent_at # Paces playback through the DanmakuJitterBuffer
+        # Recurring senders share one string object; lets moderators recall everything one sender sent
+        self.sender: str | None = None if sender is None else sys.intern(sender)
+
+    @property
+    def display_text(self) -> str:
+        """
+        The text drawn on screen, followed by the multiplier of a folded danmaku.
+        """
+        return self.text if self.fold_count == 1 else f"{self.text} ×{self.fold_count}"
+
+    @classmethod
+    def from_dict(cls, parsed: dict[str, Any]) -> "DanmakuModel":
+        """
+        Builds a DanmakuModel from one decoded danmaku object of the WebSocket protocol.
+        Does not need Qt, so it can run outside the GUI process.
+
+        Args:
+            parsed (dict[str, Any]): The decoded JSON object.
+
+        Returns:
+            DanmakuModel: The danmaku described by the object.
+
+        Raises:
+            ValueError: If a numeric field cannot be converted or is out of range, the delay is negative or above
+                MAX_DISPLAY_DELAY, the timestamp is not finite, or a string is longer than MAX_FIELD_BYTES in UTF-8.
+            TypeError: If the object is not a JSON object or a field has an unusable type.
+        """
+        if not isinstance(parsed, dict):
+            raise TypeError(f"Expected a JSON object, got {type(parsed).__name__}")
+        display_delay = float(parsed.get('delay', 0))
+        if not 0 <= display_delay <= MAX_DISPLAY_DELAY: # Also rejects NaN
+            raise ValueError(f"delay must be between 0 and {MAX_DISPLAY_DELAY} seconds, got {display_delay}")
+        sender = parsed.get('sender')
+        if sender is not None:
+            sender = _bounded_str(parsed, 'sender', "")
+        timestamp = parsed.get('timestamp')
+        if timestamp is not None:
+            timestamp = float(timestamp) / 1000 # Unix milliseconds in the protocol
+            if not math.isfinite(timestamp):
+                raise ValueError(f"timestamp must be finite, got {timestamp}")
+        return cls(
+            text=_bounded_str(parsed, 'text', ''),
+            color=_bounded_str(parsed, 'color', '#FFFFFF'),
+            size=_bounded_int(parsed, 'size', 20, SIZE_SPEED_RANGE),
+            speed=_bounded_int(parsed, 'speed', 300, SIZE_SPEED_RANGE),
+            font_family=_bounded_str(parsed, 'fontFamily', "Microsoft YaHei"),
+            font_weight=_bounded_int(parsed, 'fontWeight', FONT_WEIGHT_NORMAL, FONT_FIELD_RANGE),
+            font_style=_bounded_int(parsed, 'fontStyle', FONT_STYLE_NORMAL, FONT_FIELD_RANGE),
+            text_decoration=_bounded_str(parsed, 'textDecoration', ""),
+            display_delay=display_delay,
+            sent_at=timestamp,
+            sender=sender
+        )
@@ -0,0 +1,226 @@
+from PyQt5.QtWidgets import QGraphicsScene, QGraphicsPixmapItem, QGraphicsDropShadowEffect
+from PyQt5.QtCore import Qt, QRect, QRectF, QSize
+from PyQt5.QtGui import QFont, QFontMetrics, QColor, QImage, QPainter, QPixmap
+from collections import OrderedDict
+from functools import lru_cache
+from .danmaku_model import DanmakuModel # Added for type hinting
+
+# Parameters of the drop shadow baked into every cached pixmap
+SHADOW_BLUR_RADIUS: int = 15
+SHADOW_COLOR: QColor = QColor(0, 0, 0, 200) # Black shadow with some transparency
+
+# Default memory budget of the cache in bytes
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+
+# Cache key of a rasterized danmaku: (text, font_family, size, weight, style, color, decoration)
+PixmapKey = tuple[str, str, int, int, int, str, str]
+
+
+def build_font(model: DanmakuModel) -> QFont:
+    """
+    Builds the QFont used to draw a danmaku.
+
+    Args:
+        model (DanmakuModel): The data model of the danmaku.
+
+    Returns:
+        QFont: The font described by the model, including its text decoration.
+    """
+    font = QFont(model.font_family)
+    font.setPointSize(model.size)
+    font.setWeight(model.font_weight)
+    # QFont.Style is an enum, ensure model.font_style is compatible or cast
+    font.setStyle(QFont.Style(model.font_style) if isinstance(model.font_style, int) else model.font_style)
+    decoration = model.text_decoration
+    font.setUnderline("underline" in decoration)
+    font.setStrikeOut("line-through" in decoration)
+    font.setOverline("overline" in decoration)
+    return font
+
+
+@lru_cache(maxsize=256)
+def _font_metrics(font_family: str, size: int, weight: int, style: int, decoration: str) -> QFontMetrics:
+    """
+    Returns the QFontMetrics of a font, cached by its appearance.
+    """
+    return QFontMetrics(build_font(DanmakuModel("", font_family=font_family, size=size, font_weight=weight,
+                                                font_style=style, text_decoration=decoration)))
+
+
+def measure_text(model: DanmakuModel) -> QSize:
+    """
+    Measures the size of the text of a danmaku, without its shadow margin.
+
+    Args:
+        model (DanmakuModel): The data model of the danmaku.
+
+    Returns:
+        QSize: The width and height of the text in pixels.
+    """
+    metrics = _font_metrics(model.font_family, model.size, model.font_weight,
+                            int(model.font_style), model.text_decoration)
+    text_rect = metrics.boundingRect(QRect(), Qt.AlignLeft, model.display_text)
+    return QSize(max(1, text_rect.width()), max(1, text_rect.height()))
+
+
+class DanmakuPixmapCache:
+    """
+    Caches danmakus rasterized together with their drop shadow.
+    The expensive blur runs once per distinct appearance; renderers only blit the result.
+    Entries are evicted in least-recently-used order once the memory budget is exceeded.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Initializes the DanmakuPixmapCache.
+
+        Args:
+            max_bytes (int, optional): The memory budget of the cached pixmaps in bytes. Defaults to DEFAULT_MAX_BYTES.
+        """
+        self.max_bytes: int = max_bytes
+        self.current_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.shadow_blur_radius: int = SHADOW_BLUR_RADIUS # 0 renders without a shadow
+        self._entries: OrderedDict[PixmapKey, QPixmap] = OrderedDict()
+
+    @property
+    def padding(self) -> int:
+        """
+        The margin around the text reserved for the shadow, on every side of the pixmap.
+        """
+        return self.shadow_blur_radius
+
+    def set_shadow_blur_radius(self, radius: int) -> None:
+        """
+        Changes the blur radius of the shadow of pixmaps rendered from now on; 0 disables the shadow.
+        Cached pixmaps are dropped, danmakus already displayed keep theirs.
+
+        Args:
+            radius (int): The new blur radius in pixels.
+        """
+        radius = max(0, radius)
+        if radius != self.shadow_blur_radius:
+            self.shadow_blur_radius = radius
+            self.clear()
+
+    @staticmethod
+    def key_for(model: DanmakuModel) -> PixmapKey:
+        """
+        Builds the cache key describing the appearance of a danmaku.
+
+        Args:
+            model (DanmakuModel): The data model of the danmaku.
+
+        Returns:
+            PixmapKey: The cache key.
+        """
+        return (model.display_text, model.font_family, model.size, model.font_weight,
+                int(model.font_style), model.color, model.text_decoration)
+
+    def get(self, model: DanmakuModel) -> QPixmap:
+        """
+        Returns the rasterized pixmap of a danmaku, rendering it on a cache miss.
+
+        Args:
+            model (DanmakuModel): The data model of the danmaku.
+
+        Returns:
+            QPixmap: The text and its shadow, with `padding` pixels of margin on every side.
+        """
+        key = self.key_for(model)
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return pixmap
+
+        self.misses += 1
+        pixmap = self._render(model)
+        self._entries[key] = pixmap
+        self.current_bytes += self._cost(pixmap)
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= self._cost(evicted)
+            self.evictions += 1
+        return pixmap
+
+    def clear(self) -> None:
+        """
+        Removes every cached pixmap. The counters are kept.
+        """
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the counters of the cache.
+
+        Returns:
+            dict[str, int]: Hits, misses, evictions, number of entries and used bytes.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+    @staticmethod
+    def _cost(pixmap: QPixmap) -> int:
+        """
+        Estimates the memory used by a pixmap (32 bits per pixel).
+        """
+        return pixmap.width() * pixmap.height() * 4
+
+    def _render(self, model: DanmakuModel) -> QPixmap:
+        """
+        Rasterizes the text of a danmaku and applies the drop shadow once.
+
+        Args:
+            model (DanmakuModel): The data model of the danmaku.
+
+        Returns:
+            QPixmap: The rendered pixmap.
+        """
+        font = build_font(model)
+        text_size = measure_text(model)
+        width = text_size.width()
+        height = text_size.height()
+
+        text_image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        text_image.fill(Qt.transparent)
+        painter = QPainter(text_image)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.setFont(font)
+        painter.setPen(QColor(model.color))
+        painter.drawText(QRect(0, 0, width, height), Qt.AlignLeft, model.display_text)
+        painter.end()
+        if not self.shadow_blur_radius:
+            return QPixmap.fromImage(text_image)
+
+        # Let QGraphicsDropShadowEffect blur the text exactly once
+        padding = self.padding
+        scene = QGraphicsScene()
+        pixmap_item = QGraphicsPixmapItem(QPixmap.fromImage(text_image))
+        shadow = QGraphicsDropShadowEffect()
+        shadow.setBlurRadius(self.shadow_blur_radius)
+        shadow.setXOffset(0)
+        shadow.setYOffset(0)
+        shadow.setColor(SHADOW_COLOR)
+        pixmap_item.setGraphicsEffect(shadow)
+        scene.addItem(pixmap_item)
+
+        target = QRectF(0, 0, width + 2 * padding, height + 2 * padding)
+        result = QImage(int(target.width()), int(target.height()), QImage.Format_ARGB32_Premultiplied)
+        result.fill(Qt.transparent)
+        painter = QPainter(result)
+        scene.render(painter, target, QRectF(-padding, -padding, target.width(), target.height()))
+        painter.end()
+        return QPixmap.fromImage(result)
+
+
+# Global instance shared by every renderer, so identical danmakus on different screens reuse one pixmap.
+danmaku_pixmap_cache: DanmakuPixmapCache = DanmakuPixmapCache()
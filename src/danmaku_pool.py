@@ -0,0 +1,113 @@
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+# Default water marks: idle items kept when a burst ends, and idle items kept at most
+DEFAULT_POOL_LOW_WATER: int = 32
+DEFAULT_POOL_HIGH_WATER: int = 512
+
+
+class DanmakuItemPool(Generic[T]):
+    """
+    Keeps display items that are no longer shown, so they can be rebound to a new danmaku
+    instead of being destroyed and rebuilt.
+    At most high_water idle items are kept; trim() shrinks the pool to low_water once a burst is over.
+    """
+    def __init__(self,
+                 destroy: Callable[[T], None] | None = None,
+                 low_water: int = DEFAULT_POOL_LOW_WATER,
+                 high_water: int = DEFAULT_POOL_HIGH_WATER) -> None:
+        """
+        Initializes an empty DanmakuItemPool.
+
+        Args:
+            destroy (Callable[[T], None] | None, optional): Releases the resources of an item leaving the pool. Defaults to None.
+            low_water (int, optional): Idle items kept by trim(). Defaults to DEFAULT_POOL_LOW_WATER.
+            high_water (int, optional): Maximum idle items kept. Defaults to DEFAULT_POOL_HIGH_WATER.
+
+        Raises:
+            ValueError: If the water marks are negative or low_water exceeds high_water.
+        """
+        if not 0 <= low_water <= high_water:
+            raise ValueError("Water marks must satisfy 0 <= low_water <= high_water.")
+        self.destroy: Callable[[T], None] | None = destroy
+        self.low_water: int = low_water
+        self.high_water: int = high_water
+        self.acquired: int = 0
+        self.reused: int = 0
+        self.destroyed: int = 0
+        self._idle: list[T] = []
+
+    def acquire(self) -> T | None:
+        """
+        Takes an idle item out of the pool.
+
+        Returns:
+            T | None: An item to rebind, or None if the caller has to create one.
+        """
+        self.acquired += 1
+        if not self._idle:
+            return None
+        self.reused += 1
+        return self._idle.pop()
+
+    def release(self, item: T) -> None:
+        """
+        Returns an item that is no longer shown; it is destroyed if the pool is at its high-water mark.
+
+        Args:
+            item (T): The item to keep for reuse.
+        """
+        if len(self._idle) < self.high_water:
+            self._idle.append(item)
+        else:
+            self._destroy(item)
+
+    def trim(self) -> None:
+        """
+        Destroys idle items beyond the low-water mark.
+        """
+        while len(self._idle) > self.low_water:
+            self._destroy(self._idle.pop())
+
+    def clear(self) -> None:
+        """
+        Destroys every idle item.
+        """
+        while self._idle:
+            self._destroy(self._idle.pop())
+
+    @property
+    def idle(self) -> int:
+        """
+        The number of items waiting for reuse.
+        """
+        return len(self._idle)
+
+    @property
+    def reuse_ratio(self) -> float:
+        """
+        The share of acquisitions served by a reused item.
+        """
+        return self.reused / self.acquired if self.acquired else 0.0
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the counters of the pool.
+
+        Returns:
+            dict[str, float]: Acquired, reused, created and destroyed items, idle items and the reuse ratio.
+        """
+        return {
+            "acquired": self.acquired,
+            "reused": self.reused,
+            "created": self.acquired - self.reused,
+            "destroyed": self.destroyed,
+            "idle": len(self._idle),
+            "reuse_ratio": round(self.reuse_ratio, 4),
+        }
+
+    def _destroy(self, item: T) -> None:
+        self.destroyed += 1
+        if self.destroy is not None:
+            self.destroy(item)
@@ -0,0 +1,149 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from collections import deque
+from typing import NamedTuple
+import time
+from .danmaku_pixmap_cache import danmaku_pixmap_cache, SHADOW_BLUR_RADIUS
+
+# Default frame time budget in milliseconds (60 frames per second)
+DEFAULT_FRAME_BUDGET_MS: float = 16.6
+
+# Frames averaged before a decision, and how the average compares to the budget:
+# above STEP_DOWN_RATIO * budget lowers the quality, below STEP_UP_RATIO * budget for
+# STEP_UP_AFTER_S seconds raises it again. The gap between the ratios keeps the level from flapping.
+SAMPLE_WINDOW: int = 30
+STEP_DOWN_RATIO: float = 1.0
+STEP_UP_RATIO: float = 0.6
+STEP_UP_AFTER_S: float = 3.0
+# Minimum seconds between two level changes, so the effect of a change is measured before the next one
+CHANGE_COOLDOWN_S: float = 1.0
+
+
+class QualityLevel(NamedTuple):
+    """
+    Rendering settings of one quality level.
+    """
+    name: str
+    shadow_blur_radius: int # 0 disables the shadow
+    max_active: int | None # Maximum danmakus displayed per window, None for no cap
+    frame_interval_ms: int # Interval of the canvas frame timer
+
+
+# From full quality down to the cheapest rendering; each level keeps the savings of the previous ones
+QUALITY_LEVELS: tuple[QualityLevel, ...] = (
+    QualityLevel("full", SHADOW_BLUR_RADIUS, None, 16),
+    QualityLevel("reduced-blur", 6, None, 16),
+    QualityLevel("no-shadow", 0, None, 16),
+    QualityLevel("density-cap", 0, 200, 16),
+    QualityLevel("low-rate", 0, 200, 33),
+)
+
+
+class QualityGovernor(QObject):
+    """
+    Watches measured frame times against a budget and steps rendering quality down when frames run late,
+    and back up once there is sustained headroom.
+    Managers report every frame; the pixmap cache follows the level directly, managers follow level_changed.
+    Disabled until enable() is called, in which case the level stays at full quality.
+    """
+    # Signal emitted with the new QualityLevel whenever the level changes.
+    level_changed: pyqtSignal = pyqtSignal(object)
+
+    def __init__(self, levels: tuple[QualityLevel, ...] = QUALITY_LEVELS) -> None:
+        """
+        Initializes the QualityGovernor at the first (full) level.
+
+        Args:
+            levels (tuple[QualityLevel, ...], optional): The quality levels, best first. Defaults to QUALITY_LEVELS.
+        """
+        super().__init__()
+        self.levels: tuple[QualityLevel, ...] = levels
+        self.level_index: int = 0
+        self.enabled: bool = False
+        self.budget: float = DEFAULT_FRAME_BUDGET_MS / 1000
+        self._samples: deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._sample_sum: float = 0.0
+        self._last_change: float = -CHANGE_COOLDOWN_S
+        self._headroom_since: float | None = None
+
+    @property
+    def level(self) -> QualityLevel:
+        """
+        The current quality level.
+        """
+        return self.levels[self.level_index]
+
+    @property
+    def average_frame_time(self) -> float:
+        """
+        The average of the recent frame times in seconds.
+        """
+        return self._sample_sum / len(self._samples) if self._samples else 0.0
+
+    def enable(self, budget_ms: float = DEFAULT_FRAME_BUDGET_MS) -> None:
+        """
+        Starts adapting the quality to the measured frame times.
+
+        Args:
+            budget_ms (float, optional): The frame time budget in milliseconds. Defaults to DEFAULT_FRAME_BUDGET_MS.
+        """
+        self.budget = budget_ms / 1000
+        self.enabled = True
+
+    def report_frame(self, frame_time: float, now: float | None = None) -> None:
+        """
+        Records the time one frame took and adjusts the level if needed.
+
+        Args:
+            frame_time (float): The frame time in seconds, work plus lateness of the frame timer.
+            now (float | None, optional): The current monotonic time in seconds. Defaults to time.monotonic().
+        """
+        if len(self._samples) == self._samples.maxlen:
+            self._sample_sum -= self._samples[0]
+        self._samples.append(frame_time)
+        self._sample_sum += frame_time
+        if len(self._samples) < SAMPLE_WINDOW:
+            return
+        if now is None:
+            now = time.monotonic()
+        if now - self._last_change < CHANGE_COOLDOWN_S:
+            return
+
+        average = self.average_frame_time
+        if average > self.budget * STEP_DOWN_RATIO:
+            self._headroom_since = None
+            if self.level_index < len(self.levels) - 1:
+                self.set_level(self.level_index + 1, now)
+        elif average < self.budget * STEP_UP_RATIO:
+            if self._headroom_since is None:
+                self._headroom_since = now
+            elif now - self._headroom_since >= STEP_UP_AFTER_S and self.level_index > 0:
+                self.set_level(self.level_index - 1, now)
+        else:
+            self._headroom_since = None
+
+    def set_level(self, level_index: int, now: float | None = None) -> None:
+        """
+        Switches to a quality level and applies it.
+
+        Args:
+            level_index (int): The index of the level in levels.
+            now (float | None, optional): The current monotonic time in seconds. Defaults to time.monotonic().
+
+        Raises:
+            ValueError: If level_index is out of range.
+        """
+        if not 0 <= level_index < len(self.levels):
+            raise ValueError(f"Invalid quality level {level_index}")
+        self._last_change = time.monotonic() if now is None else now
+        self._headroom_since = None
+        self._samples.clear()
+        self._sample_sum = 0.0
+        if level_index == self.level_index:
+            return
+        self.level_index = level_index
+        danmaku_pixmap_cache.set_shadow_blur_radius(self.level.shadow_blur_radius)
+        self.level_changed.emit(self.level)
+
+
+# Global instance of the QualityGovernor class for application-wide use.
+danmaku_quality_governor: QualityGovernor = QualityGovernor()
@@ -0,0 +1,109 @@
+import math
+import time
+from typing import Any, Callable
+from .danmaku_filter import normalize_for_matching
+from .danmaku_model import DanmakuModel # Added for type hinting
+
+# "type" of a WebSocket control message asking for a bulk recall; any other message is a danmaku
+RECALL_MESSAGE_TYPE: str = "recall"
+
+# Called on the GUI thread with the number of danmakus a recall removed
+RecallReply = Callable[[int], None]
+
+
+class RecallPredicate:
+    """
+    Selects the danmakus removed by a bulk recall: by exact text, by contained text, by sender,
+    by the time they were received, or all of them. Every condition given must hold.
+    Texts are compared normalized like the keyword filter does, so case and full-width forms do not matter.
+    """
+    __slots__ = ("text", "contains", "sender", "since", "until", "all")
+
+    def __init__(self, text: str | None = None, contains: str | None = None, sender: str | None = None,
+                 since: float | None = None, until: float | None = None, all: bool = False) -> None:
+        """
+        Initializes a RecallPredicate.
+
+        Args:
+            text (str | None, optional): Text the whole danmaku must equal. Defaults to None.
+            contains (str | None, optional): Text the danmaku must contain. Defaults to None.
+            sender (str | None, optional): Sender the danmaku must come from. Defaults to None.
+            since (float | None, optional): Earliest time.monotonic() the danmaku was received at. Defaults to None.
+            until (float | None, optional): Latest time.monotonic() the danmaku was received at. Defaults to None.
+            all (bool, optional): Selects every danmaku; required when no other condition is given. Defaults to False.
+
+        Raises:
+            ValueError: If no condition is given, a text is empty or the time window is empty.
+        """
+        if text is None and contains is None and sender is None and since is None and until is None and not all:
+            raise ValueError("A recall needs a condition, or all to recall every danmaku.")
+        if text == "" or contains == "" or sender == "":
+            raise ValueError("Recall texts and senders must not be empty.")
+        if since is not None and until is not None and not since <= until:
+            raise ValueError("since must not be after until.")
+        self.text: str | None = None if text is None else normalize_for_matching(text)
+        self.contains: str | None = None if contains is None else normalize_for_matching(contains)
+        self.sender: str | None = sender
+        self.since: float | None = since
+        self.until: float | None = until
+        self.all: bool = all
+
+    @classmethod
+    def from_dict(cls, parsed: dict[str, Any]) -> "RecallPredicate":
+        """
+        Builds a RecallPredicate from a decoded recall control message.
+        since and until are Unix milliseconds, like the timestamp of a danmaku.
+
+        Args:
+            parsed (dict[str, Any]): The decoded JSON object, its "type" being RECALL_MESSAGE_TYPE.
+
+        Returns:
+            RecallPredicate: The predicate described by the message.
+
+        Raises:
+            ValueError: If a time cannot be converted or is not finite, or the predicate is invalid.
+            TypeError: If a field has an unusable type.
+        """
+        # Received times are monotonic, so map the Unix times of the message onto that clock
+        offset = time.monotonic() - time.time()
+        window: list[float | None] = []
+        for field in ("since", "until"):
+            value = parsed.get(field)
+            if value is not None:
+                value = float(value) / 1000 # Unix milliseconds in the protocol
+                if not math.isfinite(value):
+                    raise ValueError(f"{field} must be finite, got {value}")
+                value += offset
+            window.append(value)
+        text, contains, sender = (None if parsed.get(field) is None else str(parsed[field])
+                                  for field in ("text", "contains", "sender"))
+        return cls(text, contains, sender, window[0], window[1], parsed.get("all") is True)
+
+    def matches(self, model: DanmakuModel, text: str | None = None) -> bool:
+        """
+        Checks whether a danmaku is selected.
+
+        Args:
+            model (DanmakuModel): The danmaku.
+            text (str | None, optional): The text of the danmaku already normalized, if known. Defaults to None.
+
+        Returns:
+            bool: True if every condition holds for the danmaku.
+        """
+        if self.sender is not None and model.sender != self.sender:
+            return False
+        if self.since is not None and model.received_at < self.since:
+            return False
+        if self.until is not None and model.received_at > self.until:
+            return False
+        if self.text is None and self.contains is None:
+            return True
+        if text is None:
+            text = normalize_for_matching(model.text)
+        if self.text is not None and text != self.text:
+            return False
+        return self.contains is None or self.contains in text
+
+    def __repr__(self) -> str:
+        conditions = [f"{name}={getattr(self, name)!r}" for name in self.__slots__[:-1] if getattr(self, name) is not None]
+        return f"RecallPredicate({', '.join(conditions) or 'all=True'})"
@@ -0,0 +1,100 @@
+import math
+import struct
+from typing import Iterator
+from .danmaku_model import DanmakuModel
+
+# Fixed part of a packed danmaku: size, speed, font weight, font style, display delay, send time (NaN if unknown),
+# then the byte lengths of text, color, font family, text decoration and sender, which follow as UTF-8.
+# An empty sender stands for an unknown one. DanmakuModel.from_dict rejects values wider than these fields
+_RECORD: struct.Struct = struct.Struct("<iihhfdIHHHH")
+
+
+def pack_danmaku(model: DanmakuModel) -> bytes:
+    """
+    Packs the display fields of a danmaku into a compact binary record, without pickling.
+    The ID is not packed: the process unpacking the record issues its own.
+
+    Args:
+        model (DanmakuModel): The danmaku to pack.
+
+    Returns:
+        bytes: The record.
+
+    Raises:
+        ValueError: If a number or a string does not fit the record.
+    """
+    text = model.text.encode("utf-8")
+    color = model.color.encode("utf-8")
+    font_family = model.font_family.encode("utf-8")
+    text_decoration = model.text_decoration.encode("utf-8")
+    sender = model.sender.encode("utf-8") if model.sender else b""
+    try:
+        header = _RECORD.pack(model.size, model.speed, model.font_weight, model.font_style, model.display_delay,
+                              math.nan if model.sent_at is None else model.sent_at,
+                              len(text), len(color), len(font_family), len(text_decoration), len(sender))
+    except struct.error as e:
+        raise ValueError(f"Danmaku does not fit a record: {e}") from e
+    return b"".join((header, text, color, font_family, text_decoration, sender))
+
+
+def unpack_danmakus(buffer: bytes | memoryview, offset: int = 0) -> Iterator[DanmakuModel]:
+    """
+    Unpacks consecutive records into new DanmakuModel objects.
+
+    Args:
+        buffer (bytes | memoryview): Records packed by pack_danmaku, back to back.
+        offset (int, optional): Where the first record starts. Defaults to 0.
+
+    Yields:
+        DanmakuModel: The unpacked danmakus, in order.
+
+    Raises:
+        ValueError: If the buffer ends in the middle of a record.
+    """
+    unpack_from = _RECORD.unpack_from
+    record_size = _RECORD.size
+    end = len(buffer)
+    view = memoryview(buffer)
+    while offset < end:
+        if offset + record_size > end:
+            raise ValueError("Truncated danmaku record")
+        size, speed, font_weight, font_style, display_delay, sent_at, text_length, color_length, family_length, decoration_length, \
+            sender_length = unpack_from(buffer, offset)
+        offset += record_size
+        if offset + text_length + color_length + family_length + decoration_length + sender_length > end:
+            raise ValueError("Truncated danmaku record")
+        text = str(view[offset:offset + text_length], "utf-8")
+        offset += text_length
+        color = str(view[offset:offset + color_length], "utf-8")
+        offset += color_length
+        font_family = str(view[offset:offset + family_length], "utf-8")
+        offset += family_length
+        text_decoration = str(view[offset:offset + decoration_length], "utf-8")
+        offset += decoration_length
+        sender = str(view[offset:offset + sender_length], "utf-8") if sender_length else None
+        offset += sender_length
+        yield DanmakuModel(text, color, size, speed, font_family, font_weight, font_style, text_decoration,
+                           display_delay, None if math.isnan(sent_at) else sent_at, sender)
+
+
+def unpack_text(buffer: bytes | memoryview, offset: int = 0) -> str:
+    """
+    Decodes only the text of a record, without building a DanmakuModel, for scanning many records.
+
+    Args:
+        buffer (bytes | memoryview): A record packed by pack_danmaku.
+        offset (int, optional): Where the record starts. Defaults to 0.
+
+    Returns:
+        str: The text of the danmaku.
+
+    Raises:
+        ValueError: If the buffer ends in the middle of the record.
+    """
+    if offset + _RECORD.size > len(buffer):
+        raise ValueError("Truncated danmaku record")
+    text_length = _RECORD.unpack_from(buffer, offset)[6]
+    start = offset + _RECORD.size
+    if start + text_length > len(buffer):
+        raise ValueError("Truncated danmaku record")
+    return str(memoryview(buffer)[start:start + text_length], "utf-8")
@@ -0,0 +1,131 @@
+import os
+import struct
+import time
+from typing import BinaryIO, Iterator
+
+# A recording starts with this header: magic, format version and the wall-clock start time in nanoseconds
+RECORDING_MAGIC: bytes = b"MWDR"
+RECORDING_VERSION: int = 1
+_HEADER: struct.Struct = struct.Struct("<4sBQ")
+
+# Every message follows a record header: arrival time in nanoseconds since the recording start,
+# and the payload length whose top bit marks a binary (bytes) message
+_RECORD: struct.Struct = struct.Struct("<QI")
+_BINARY_FLAG: int = 1 << 31
+
+# Seconds between two flushes of the write buffer to the file
+DEFAULT_RECORDING_FLUSH_INTERVAL: float = 1
+RECORDING_BUFFER_SIZE: int = 1 << 20
+
+
+class DanmakuRecorder:
+    """
+    Appends every raw WebSocket message to a compact binary file together with its arrival time.
+    Writes are buffered and reach the file at least once per flush interval, so recording
+    costs a struct.pack and a memory copy per message. Not thread-safe; call it from the source thread.
+    """
+    def __init__(self, path: str, flush_interval: float = DEFAULT_RECORDING_FLUSH_INTERVAL) -> None:
+        """
+        Opens a recording, appending to it if the file already holds one.
+
+        Args:
+            path (str): The file to record to.
+            flush_interval (float, optional): Maximum seconds a message stays in the write buffer. Defaults to DEFAULT_RECORDING_FLUSH_INTERVAL.
+
+        Raises:
+            ValueError: If the file exists but is not a recording.
+        """
+        self.path: str = path
+        self.flush_interval: float = flush_interval
+        self.count: int = 0
+        self._file: BinaryIO = open(path, "ab", buffering=RECORDING_BUFFER_SIZE)
+        if self._file.tell() == 0:
+            start_ns = time.time_ns()
+            self._file.write(_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, start_ns))
+        else:
+            start_ns = _read_header(path)
+        # Arrival times come from the high-resolution performance counter, anchored to the recording start
+        self._offset_ns: int = time.time_ns() - start_ns - time.perf_counter_ns()
+        self._last_flush: float = time.monotonic()
+
+    def record(self, message: str | bytes) -> None:
+        """
+        Appends one message with its arrival time.
+
+        Args:
+            message (str | bytes): The message as received, text or binary.
+        """
+        if isinstance(message, str):
+            payload = message.encode("utf-8")
+            length = len(payload)
+        else:
+            payload = message
+            length = len(payload) | _BINARY_FLAG
+        self._file.write(_RECORD.pack(time.perf_counter_ns() + self._offset_ns, length))
+        self._file.write(payload)
+        self.count += 1
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self) -> None:
+        """
+        Flushes the buffered messages and closes the file.
+        """
+        if not self._file.closed:
+            self._file.close()
+
+
+def _read_header(path: str) -> int:
+    """
+    Reads the header of a recording.
+
+    Args:
+        path (str): The recording file.
+
+    Returns:
+        int: The wall-clock start time of the recording in nanoseconds.
+
+    Raises:
+        ValueError: If the file is not a recording of a supported version.
+    """
+    with open(path, "rb") as recording:
+        header = recording.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError(f"{path} is not a danmaku recording")
+    magic, version, start_ns = _HEADER.unpack(header)
+    if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+        raise ValueError(f"{path} is not a danmaku recording of version {RECORDING_VERSION}")
+    return start_ns
+
+
+def read_recording(path: str) -> Iterator[tuple[int, str | bytes]]:
+    """
+    Reads the messages of a recording in arrival order.
+    A record cut off at the end of the file, as left by a crash, is ignored.
+
+    Args:
+        path (str): The recording file.
+
+    Yields:
+        tuple[int, str | bytes]: The arrival time in nanoseconds since the recording start, and the message.
+
+    Raises:
+        ValueError: If the file is not a recording of a supported version.
+    """
+    _read_header(path)
+    with open(path, "rb", buffering=RECORDING_BUFFER_SIZE) as recording:
+        recording.seek(_HEADER.size, os.SEEK_SET)
+        read = recording.read
+        record_size = _RECORD.size
+        unpack = _RECORD.unpack
+        while True:
+            header = read(record_size)
+            if len(header) < record_size:
+                return
+            arrival_ns, length = unpack(header)
+            payload = read(length & ~_BINARY_FLAG)
+            if len(payload) < length & ~_BINARY_FLAG:
+                return
+            yield arrival_ns, payload if length & _BINARY_FLAG else payload.decode("utf-8")
@@ -0,0 +1,189 @@
+from typing import Any, TYPE_CHECKING
+from .danmaku_filter import normalize_for_matching
+from .danmaku_recall import RecallPredicate # Added for type hinting
+
+if TYPE_CHECKING: # Only needed for type hinting, avoids a circular import
+    from .danmaku_manager import DanmakuManager
+
+class DanmakuRegistry:
+    """
+    Maps danmaku IDs to the items currently displayed for them, across every DanmakuWindow.
+    Recalling or expiring a danmaku is a direct lookup instead of a broadcast to every live item.
+    Secondary indexes by normalized text and by sender let a bulk recall find its danmakus without a scan.
+    """
+    def __init__(self) -> None:
+        """
+        Initializes an empty DanmakuRegistry.
+        """
+        self._entries: dict[int, list[tuple["DanmakuManager", Any]]] = {}
+        # IDs of the displayed danmakus by normalized text and by sender, and the normalized text of each
+        self._by_text: dict[str, set[int]] = {}
+        self._by_sender: dict[str, set[int]] = {}
+        self._text_keys: dict[int, str] = {}
+
+    def register(self, danmaku_id: int, manager: "DanmakuManager", item: Any) -> None:
+        """
+        Records that a manager is displaying an item for the given danmaku.
+
+        Args:
+            danmaku_id (int): The ID of the danmaku.
+            manager (DanmakuManager): The manager displaying the item.
+            item (Any): The DanmakuItem or DanmakuWidget displayed by the manager.
+        """
+        entries = self._entries.get(danmaku_id)
+        if entries is None:
+            entries = self._entries[danmaku_id] = []
+            self._index(danmaku_id, item.model)
+        entries.append((manager, item))
+
+    def unregister(self, danmaku_id: int, manager: "DanmakuManager", item: Any) -> bool:
+        """
+        Forgets an item that is no longer displayed.
+
+        Args:
+            danmaku_id (int): The ID of the danmaku.
+            manager (DanmakuManager): The manager that displayed the item.
+            item (Any): The item that is no longer displayed.
+
+        Returns:
+            bool: True if this was the last item displayed for the danmaku.
+        """
+        entries = self._entries.get(danmaku_id)
+        if entries is None:
+            return False
+        # A danmaku has at most one item per window, so this list stays tiny
+        entries[:] = [entry for entry in entries if entry[1] is not item]
+        if entries:
+            return False
+        del self._entries[danmaku_id]
+        self._unindex(danmaku_id, item.model)
+        return True
+
+    def recall(self, danmaku_id: int) -> int:
+        """
+        Removes every item displayed for the given danmaku from its manager.
+
+        Args:
+            danmaku_id (int): The ID of the danmaku to recall.
+
+        Returns:
+            int: The number of items removed.
+        """
+        entries = self._entries.pop(danmaku_id, None)
+        if not entries:
+            return 0
+        self._unindex(danmaku_id, entries[0][1].model)
+        for manager, item in entries:
+            manager.remove_item(item)
+        return len(entries)
+
+    def recall_matching(self, predicate: RecallPredicate) -> list[int]:
+        """
+        Removes every item displayed for the danmakus selected by a predicate, in one pass.
+        A predicate on the exact text or the sender only checks the danmakus of that index entry;
+        every manager repaints once, however many of its items were removed.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            list[int]: The IDs of the recalled danmakus.
+        """
+        if predicate.text is not None:
+            candidates: Any = self._by_text.get(predicate.text, ())
+        elif predicate.sender is not None:
+            candidates = self._by_sender.get(predicate.sender, ())
+        else:
+            candidates = self._entries
+        entries, text_keys = self._entries, self._text_keys
+        recalled = [danmaku_id for danmaku_id in candidates
+                    if predicate.matches(entries[danmaku_id][0][1].model, text_keys[danmaku_id])]
+        if len(recalled) == len(self._entries):
+            # Everything goes, drop the indexes wholesale instead of entry by entry
+            removed = list(self._entries.values())
+            self._entries = {}
+            self._by_text.clear()
+            self._by_sender.clear()
+            self._text_keys.clear()
+        else:
+            removed = [self._entries.pop(danmaku_id) for danmaku_id in recalled]
+            for danmaku_id, entries in zip(recalled, removed):
+                self._unindex(danmaku_id, entries[0][1].model)
+        items_by_manager: dict["DanmakuManager", list[Any]] = {}
+        for entries in removed:
+            for manager, item in entries:
+                items_by_manager.setdefault(manager, []).append(item)
+        for manager, items in items_by_manager.items():
+            manager.remove_items(items)
+        return recalled
+
+    def forget_manager(self, manager: "DanmakuManager") -> list[Any]:
+        """
+        Forgets every item displayed by a manager that goes away, such as the manager of a closed window,
+        so no later recall reaches it. Danmakus also displayed by other managers stay registered for those.
+
+        Args:
+            manager (DanmakuManager): The manager going away.
+
+        Returns:
+            list[Any]: The items the manager was displaying.
+        """
+        forgotten: list[Any] = []
+        for danmaku_id, entries in list(self._entries.items()):
+            kept = [entry for entry in entries if entry[0] is not manager]
+            if len(kept) == len(entries):
+                continue
+            forgotten.extend(item for owner, item in entries if owner is manager)
+            if kept:
+                entries[:] = kept
+            else:
+                del self._entries[danmaku_id]
+                self._unindex(danmaku_id, entries[0][1].model)
+        return forgotten
+
+    def refresh(self, danmaku_id: int) -> int:
+        """
+        Asks the manager of every item displayed for the given danmaku to redraw it from its model.
+
+        Args:
+            danmaku_id (int): The ID of the danmaku whose model has changed.
+
+        Returns:
+            int: The number of items refreshed.
+        """
+        entries = self._entries.get(danmaku_id)
+        if not entries:
+            return 0
+        for manager, item in entries:
+            manager.refresh_item(item)
+        return len(entries)
+
+    def _index(self, danmaku_id: int, model: Any) -> None:
+        """
+        Adds a danmaku displayed for the first time to the secondary indexes.
+        """
+        text_key = self._text_keys[danmaku_id] = normalize_for_matching(model.text)
+        self._by_text.setdefault(text_key, set()).add(danmaku_id)
+        if model.sender is not None:
+            self._by_sender.setdefault(model.sender, set()).add(danmaku_id)
+
+    def _unindex(self, danmaku_id: int, model: Any) -> None:
+        """
+        Removes a danmaku no longer displayed from the secondary indexes, dropping entries left empty.
+        """
+        for index, key in ((self._by_text, self._text_keys.pop(danmaku_id)), (self._by_sender, model.sender)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(danmaku_id)
+                if not ids:
+                    del index[key]
+
+    def __contains__(self, danmaku_id: int) -> bool:
+        return danmaku_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global instance of the DanmakuRegistry class for application-wide use.
+danmaku_registry: DanmakuRegistry = DanmakuRegistry()
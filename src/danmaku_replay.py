@@ -0,0 +1,153 @@
+"""
+Replays a danmaku recording into a running DanmakuSource.
+
+Run from the repository root:
+    python -m src.danmaku_replay capture.mwdr              # Original timing
+    python -m src.danmaku_replay capture.mwdr --speed 4    # Four times faster
+    python -m src.danmaku_replay capture.mwdr --speed max  # As fast as possible, in bulk frames
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from websockets.asyncio.client import connect, ClientConnection
+
+from .danmaku_recording import read_recording
+
+DEFAULT_URI: str = "ws://127.0.0.1:3210"
+# Danmakus per bulk frame when replaying as fast as possible
+DEFAULT_MAX_SPEED_BULK_SIZE: int = 500
+
+
+def is_control_message(text: str) -> bool:
+    """
+    Checks whether a recorded JSON object is a control message rather than a danmaku.
+
+    Args:
+        text (str): The message, a JSON object.
+
+    Returns:
+        bool: True if the object has a "type" key.
+    """
+    if '"type"' not in text:
+        return False # Skips decoding the plain danmakus
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and "type" in parsed
+
+
+def bundle(messages: list[str | bytes]) -> list[str | bytes]:
+    """
+    Packs recorded messages into as few bulk frames as possible.
+    Messages that are JSON objects or arrays are merged into one array; anything else
+    (binary frames, malformed text) is kept as its own frame, so rejections replay unchanged.
+    Control messages, objects with a "type" such as a bulk recall, only act as top-level objects,
+    so they are kept as their own frames too.
+
+    Args:
+        messages (list[str | bytes]): The messages to pack, in order.
+
+    Returns:
+        list[str | bytes]: The frames to send, in order.
+    """
+    frames: list[str | bytes] = []
+    entries: list[str] = []
+    for message in messages:
+        text = message.strip() if isinstance(message, str) else ""
+        if text[:1] == "{" and text[-1:] == "}" and not is_control_message(text):
+            entries.append(text)
+        elif text[:1] == "[" and text[-1:] == "]":
+            inner = text[1:-1].strip()
+            if inner:
+                entries.append(inner) # A recorded bulk frame, its elements join the new one
+        else:
+            if entries:
+                frames.append("[" + ",".join(entries) + "]")
+                entries = []
+            frames.append(message)
+    if entries:
+        frames.append("[" + ",".join(entries) + "]")
+    return frames
+
+
+async def _send(websocket: ClientConnection, messages: list[str | bytes], bulk_size: int) -> int:
+    """
+    Sends pending messages, bundled when bulk_size is above 1.
+
+    Returns:
+        int: The number of frames sent.
+    """
+    frames = bundle(messages) if bulk_size > 1 else messages
+    for frame in frames:
+        await websocket.send(frame)
+    return len(frames)
+
+
+async def replay(path: str, uri: str = DEFAULT_URI, speed: float | None = 1.0, bulk_size: int = 1) -> dict[str, Any]:
+    """
+    Sends the messages of a recording to a WebSocket server.
+
+    Args:
+        path (str): The recording file.
+        uri (str, optional): The server to send to. Defaults to DEFAULT_URI.
+        speed (float | None, optional): Time scale of the replay, None sends as fast as possible. Defaults to 1.0.
+        bulk_size (int, optional): Maximum messages merged into one frame, 1 keeps the recorded frames. Defaults to 1.
+
+    Returns:
+        dict[str, Any]: The numbers of messages and frames sent, the duration and the rate.
+
+    Raises:
+        ValueError: If speed is not positive or the file is not a recording.
+    """
+    if speed is not None and speed <= 0:
+        raise ValueError("speed must be positive, or None for as fast as possible.")
+    messages = 0
+    frames = 0
+    pending: list[str | bytes] = []
+    first_arrival_ns: int | None = None
+    started = time.perf_counter()
+    async with connect(uri, max_size=None) as websocket:
+        for arrival_ns, message in read_recording(path):
+            if speed is not None:
+                if first_arrival_ns is None:
+                    first_arrival_ns = arrival_ns
+                delay = started + (arrival_ns - first_arrival_ns) / 1e9 / speed - time.perf_counter()
+                if delay > 0:
+                    # Everything already due goes out before waiting for the next message
+                    frames += await _send(websocket, pending, bulk_size)
+                    pending.clear()
+                    await asyncio.sleep(delay)
+            pending.append(message)
+            messages += 1
+            if len(pending) >= bulk_size:
+                frames += await _send(websocket, pending, bulk_size)
+                pending.clear()
+        frames += await _send(websocket, pending, bulk_size)
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": messages,
+        "frames": frames,
+        "seconds": round(elapsed, 3),
+        "msgs_per_s": round(messages / elapsed) if elapsed > 0 else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a danmaku recording into a DanmakuSource.")
+    parser.add_argument("recording", help="Recording file written by DanmakuRecorder")
+    parser.add_argument("--uri", default=DEFAULT_URI, help=f"WebSocket server (default {DEFAULT_URI})")
+    parser.add_argument("--speed", default="1", help="Time scale such as 1, 0.5 or 10, or 'max' (default 1)")
+    parser.add_argument("--bulk", type=int, default=None,
+                        help=f"Messages per frame (default 1, or {DEFAULT_MAX_SPEED_BULK_SIZE} with --speed max)")
+    args = parser.parse_args()
+    speed = None if args.speed == "max" else float(args.speed)
+    bulk_size = args.bulk if args.bulk is not None else (DEFAULT_MAX_SPEED_BULK_SIZE if speed is None else 1)
+    print(json.dumps(asyncio.run(replay(args.recording, args.uri, speed, max(1, bulk_size)))))
+
+
+if __name__ == '__main__':
+    main()
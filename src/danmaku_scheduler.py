@@ -0,0 +1,329 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import heapq
+import itertools
+import random
+import time
+from typing import Callable
+from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_recall import RecallPredicate # Added for type hinting
+
+# Minimum seconds between two timer ticks: a danmaku only appears on the next frame anyway,
+# so sends due within one frame are grouped instead of waking the event loop for each
+TICK_INTERVAL: float = 0.016
+
+# Draws the seconds to wait before the next danmaku of a batch
+DelayDistribution = Callable[[random.Random], float]
+
+
+def fixed_delay(seconds: float) -> DelayDistribution:
+    """
+    Waits the same time between every two danmakus.
+
+    Args:
+        seconds (float): The delay in seconds.
+
+    Returns:
+        DelayDistribution: The distribution.
+
+    Raises:
+        ValueError: If seconds is negative.
+    """
+    if seconds < 0:
+        raise ValueError("The delay must not be negative.")
+    return lambda generator: seconds
+
+
+def uniform_delay(low: float, high: float) -> DelayDistribution:
+    """
+    Draws every delay uniformly between two bounds.
+
+    Args:
+        low (float): The shortest delay in seconds.
+        high (float): The longest delay in seconds.
+
+    Returns:
+        DelayDistribution: The distribution.
+
+    Raises:
+        ValueError: If low is negative or above high.
+    """
+    if not 0 <= low <= high:
+        raise ValueError("The bounds must satisfy 0 <= low <= high.")
+    return lambda generator: generator.uniform(low, high)
+
+
+def exponential_delay(mean: float) -> DelayDistribution:
+    """
+    Draws exponentially distributed delays, so danmakus arrive like independent viewers would send them.
+
+    Args:
+        mean (float): The mean delay in seconds.
+
+    Returns:
+        DelayDistribution: The distribution.
+
+    Raises:
+        ValueError: If mean is not positive.
+    """
+    if mean <= 0:
+        raise ValueError("The mean delay must be positive.")
+    return lambda generator: generator.expovariate(1 / mean)
+
+
+# Delays of the batches sent from the control panel, as before the scheduler existed
+DEFAULT_BATCH_DELAY: DelayDistribution = uniform_delay(0.5, 3)
+
+
+class ScheduledBatch:
+    """
+    A batch of identical danmakus sent one after another, with delays drawn from a distribution.
+    Only its next send is scheduled, so a batch costs the same whatever its size.
+    """
+    __slots__ = ("batch_id", "text", "color", "size", "total", "sent", "delay", "next_due", "entry", "remaining",
+                 "cancelled")
+
+    def __init__(self, batch_id: int, text: str, color: str, size: int, total: int, delay: DelayDistribution) -> None:
+        self.batch_id: int = batch_id
+        self.text: str = text
+        self.color: str = color
+        self.size: int = size
+        self.total: int = total
+        self.sent: int = 0
+        self.delay: DelayDistribution = delay
+        self.next_due: float = 0 # Monotonic time of the next send
+        self.entry: int = -1 # Sequence number of the heap entry of the next send, older entries are stale
+        self.remaining: float | None = None # Seconds left until the next send while paused
+        self.cancelled: bool = False
+
+    @property
+    def paused(self) -> bool:
+        return self.remaining is not None
+
+
+class DanmakuScheduler(QObject):
+    """
+    Sends danmakus at scheduled times from a single timer.
+    Pending sends are kept in a heap, ordered by due time: each batch holds one entry for its next danmaku,
+    each delayed danmaku one entry. The timer is armed for the earliest entry, at most once per TICK_INTERVAL,
+    and every entry due when it fires is sent in one batch.
+    Cancelled and paused batches leave their entry in the heap; it is skipped when it comes up.
+    """
+    # Emitted with the list of danmakus due, in due order
+    danmakus_due: pyqtSignal = pyqtSignal(object)
+    # Emitted with the batch ID, danmakus sent and total, at most once per batch and timer tick
+    batch_progress: pyqtSignal = pyqtSignal(int, int, int)
+
+    def __init__(self, parent: QObject | None = None, seed: int | None = None) -> None:
+        """
+        Initializes the DanmakuScheduler.
+
+        Args:
+            parent (QObject | None, optional): The parent object. Defaults to None.
+            seed (int | None, optional): Seeds the generator the delays are drawn from, for reproducible runs. Defaults to None.
+        """
+        super().__init__(parent)
+        self.generator: random.Random = random.Random(seed)
+        # (due time, sequence number, batch or delayed danmaku), the sequence keeps equal due times in order
+        self._heap: list[tuple[float, int, ScheduledBatch | DanmakuModel]] = []
+        self._sequence: itertools.count = itertools.count()
+        self._batches: dict[int, ScheduledBatch] = {}
+        self._batch_ids: itertools.count = itertools.count(1)
+        self._delayed: int = 0
+        self._last_tick: float = float("-inf")
+        self.timer: QTimer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timer)
+
+    def schedule_batch(self, text: str, count: int, color: str = "#FFFFFF", size: int = 20,
+                       delay: DelayDistribution = DEFAULT_BATCH_DELAY, start_delay: float = 0) -> int:
+        """
+        Schedules a batch of identical danmakus.
+
+        Args:
+            text (str): The text of the danmakus.
+            count (int): The number of danmakus.
+            color (str, optional): The color of the danmakus. Defaults to "#FFFFFF".
+            size (int, optional): The font size of the danmakus. Defaults to 20.
+            delay (DelayDistribution, optional): The delay between two danmakus. Defaults to DEFAULT_BATCH_DELAY.
+            start_delay (float, optional): Seconds before the first danmaku. Defaults to 0.
+
+        Returns:
+            int: The ID of the batch, for cancel, pause, resume and progress.
+
+        Raises:
+            ValueError: If count is not positive.
+        """
+        if count <= 0:
+            raise ValueError("A batch needs at least one danmaku.")
+        batch = ScheduledBatch(next(self._batch_ids), text, color, size, count, delay)
+        batch.next_due = time.monotonic() + start_delay
+        self._batches[batch.batch_id] = batch
+        batch.entry = self._push(batch.next_due, batch)
+        return batch.batch_id
+
+    def schedule(self, model: DanmakuModel, delay: float) -> None:
+        """
+        Schedules one danmaku, counting the delay from when it was received.
+
+        Args:
+            model (DanmakuModel): The danmaku.
+            delay (float): Seconds between receiving and displaying it.
+        """
+        self._delayed += 1
+        self._push(model.received_at + delay, model)
+
+    def cancel(self, batch_id: int) -> bool:
+        """
+        Cancels the danmakus of a batch that were not sent yet.
+
+        Args:
+            batch_id (int): The ID of the batch.
+
+        Returns:
+            bool: True if the batch was still pending.
+        """
+        batch = self._batches.pop(batch_id, None)
+        if batch is None:
+            return False
+        batch.cancelled = True
+        return True
+
+    def pause(self, batch_id: int) -> bool:
+        """
+        Pauses a batch, keeping the time left until its next danmaku.
+
+        Args:
+            batch_id (int): The ID of the batch.
+
+        Returns:
+            bool: True if the batch was running.
+        """
+        batch = self._batches.get(batch_id)
+        if batch is None or batch.paused:
+            return False
+        batch.remaining = max(0.0, batch.next_due - time.monotonic())
+        return True
+
+    def resume(self, batch_id: int) -> bool:
+        """
+        Resumes a paused batch.
+
+        Args:
+            batch_id (int): The ID of the batch.
+
+        Returns:
+            bool: True if the batch was paused.
+        """
+        batch = self._batches.get(batch_id)
+        if batch is None or not batch.paused:
+            return False
+        batch.next_due = time.monotonic() + batch.remaining
+        batch.remaining = None
+        batch.entry = self._push(batch.next_due, batch)
+        return True
+
+    def recall(self, predicate: RecallPredicate) -> int:
+        """
+        Drops the delayed danmakus selected by a bulk recall and cancels the batches whose danmakus it selects.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            int: The number of danmakus that will no longer be sent.
+        """
+        kept = [entry for entry in self._heap if not (isinstance(entry[2], DanmakuModel) and predicate.matches(entry[2]))]
+        removed = len(self._heap) - len(kept)
+        if removed:
+            heapq.heapify(kept)
+            self._heap = kept
+            self._delayed -= removed
+            self._arm()
+        for batch in list(self._batches.values()):
+            # The danmakus of a batch do not exist yet, check one built like them
+            if predicate.matches(DanmakuModel(text=batch.text, color=batch.color, size=batch.size)):
+                removed += batch.total - batch.sent
+                self.cancel(batch.batch_id)
+        return removed
+
+    def progress(self, batch_id: int) -> tuple[int, int] | None:
+        """
+        Returns how far a pending batch got.
+
+        Args:
+            batch_id (int): The ID of the batch.
+
+        Returns:
+            tuple[int, int] | None: Danmakus sent and total, or None if the batch finished or was cancelled.
+        """
+        batch = self._batches.get(batch_id)
+        return None if batch is None else (batch.sent, batch.total)
+
+    @property
+    def batch_ids(self) -> list[int]:
+        """
+        The IDs of the pending batches, paused ones included, oldest first.
+        """
+        return list(self._batches)
+
+    @property
+    def pending(self) -> int:
+        """
+        Danmakus not sent yet, from batches and delayed danmakus.
+        """
+        return self._delayed + sum(batch.total - batch.sent for batch in self._batches.values())
+
+    def _push(self, due: float, entry: ScheduledBatch | DanmakuModel) -> int:
+        """
+        Adds an entry to the heap and arms the timer if it is now the earliest one.
+
+        Returns:
+            int: The sequence number of the entry.
+        """
+        sequence = next(self._sequence)
+        heapq.heappush(self._heap, (due, sequence, entry))
+        if self._heap[0][1] == sequence:
+            self._arm()
+        return sequence
+
+    def _arm(self) -> None:
+        """
+        Arms the timer for the earliest entry of the heap, no sooner than TICK_INTERVAL after the last tick.
+        """
+        if not self._heap:
+            self.timer.stop()
+            return
+        fire_at = max(self._heap[0][0], self._last_tick + TICK_INTERVAL)
+        self.timer.start(max(0, int((fire_at - time.monotonic()) * 1000)))
+
+    def _on_timer(self) -> None:
+        """
+        Sends every danmaku due, then re-arms the timer for the next one.
+        """
+        now = self._last_tick = time.monotonic()
+        heap = self._heap
+        due_models: list[DanmakuModel] = []
+        progressed: dict[int, ScheduledBatch] = {}
+        while heap and heap[0][0] <= now:
+            due, sequence, entry = heapq.heappop(heap)
+            if isinstance(entry, DanmakuModel):
+                self._delayed -= 1
+                due_models.append(entry)
+                continue
+            if entry.cancelled or entry.paused or entry.entry != sequence:
+                continue # Stale entry of a cancelled, paused or resumed batch
+            due_models.append(DanmakuModel(text=entry.text, color=entry.color, size=entry.size))
+            entry.sent += 1
+            progressed[entry.batch_id] = entry
+            if entry.sent < entry.total:
+                # Counted from the due time, so a late tick does not shift the rest of the batch
+                entry.next_due = due + entry.delay(self.generator)
+                entry.entry = next(self._sequence)
+                heapq.heappush(heap, (entry.next_due, entry.entry, entry))
+            else:
+                del self._batches[entry.batch_id]
+        self._arm()
+        if due_models:
+            self.danmakus_due.emit(due_models)
+        for batch in progressed.values():
+            self.batch_progress.emit(batch.batch_id, batch.sent, batch.total)
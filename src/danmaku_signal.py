@@ -11,9 +11,26 @@ class DanmakuSignal(QObject):
     # The 'object' type can be replaced with DanmakuModel if it's always the type.
     danmaku_signal_add: pyqtSignal = pyqtSignal(object) # Consider using a more specific type if possible, e.g., DanmakuModel
     
-    # Signal emitted when a danmaku should be deleted.
-    # The argument is the ID (str) of the danmaku to be deleted.
-    danmaku_signal_delete: pyqtSignal = pyqtSignal(str)
+    # Signal emitted with a list of DanmakuModel instances that should be added in one pass.
+    # 'object' passes the list by reference instead of converting it element by element.
+    danmaku_signal_add_batch: pyqtSignal = pyqtSignal(object)
+
+    # Signal emitted when a danmaku should be deleted (recalled).
+    # The argument is the ID (int) of the danmaku to be deleted; 'object' keeps the full 64-bit value.
+    danmaku_signal_delete: pyqtSignal = pyqtSignal(object)
+
+    # Signal emitted once a danmaku has left every screen on its own, or was dropped without being shown,
+    # so folding stops counting into it.
+    # The argument is the ID (int) of the finished danmaku.
+    danmaku_signal_finished: pyqtSignal = pyqtSignal(object)
+
+    # Signal emitted with a list of (DanmakuModel, count) pairs when repeated danmakus were folded
+    # into danmakus already sent, which then show the new count in place.
+    danmaku_signal_fold_update: pyqtSignal = pyqtSignal(object)
+
+    # Signal emitted with a (RecallPredicate, RecallReply | None) pair when a client asks for a bulk recall.
+    # The reply, if any, is called with the number of danmakus removed.
+    danmaku_signal_recall: pyqtSignal = pyqtSignal(object)
 
 # Global instance of the DanmakuSignal class for application-wide use.
 danmaku_signal: DanmakuSignal = DanmakuSignal()
\ No newline at end of file
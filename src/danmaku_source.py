@@ -1,66 +1,630 @@
 from PyQt5.QtCore import QThread
-from PyQt5.QtGui import QFont
-from websockets.sync.server import serve, ServerConnection # Added for type hinting
+from websockets.asyncio.server import serve, ServerConnection # Added for type hinting
+from websockets.exceptions import ConnectionClosed
+from websockets.http11 import Request, Response
+from http import HTTPStatus
+import asyncio
 import json
+import os
+import socket
+import sys
+import time
 from .danmaku_model import DanmakuModel
+from .danmaku_batcher import DanmakuBatcher, DEFAULT_FLUSH_INTERVAL
+from .danmaku_admission import DanmakuAdmission
+from .danmaku_metrics import danmaku_metrics
+from .danmaku_recording import DanmakuRecorder
+from .danmaku_folding import DanmakuFolder
+from .danmaku_filter import DanmakuFilter, FILTER_BLOCK, FILTER_MASK
+from .danmaku_jitter import DanmakuJitterBuffer
 from .danmaku_signal import danmaku_signal
-from typing import Any # For WebSocket handler
+from .danmaku_record import unpack_danmakus
+from .danmaku_recall import RecallPredicate, RECALL_MESSAGE_TYPE
+from .danmaku_workers import FRAME_LENGTH, BATCH_HEADER, CONTROL_RECORDS, WORKER_ARGUMENT
+from .danmaku_http import HttpError, HttpRequest, HTTP_INGEST_PATH, MAX_HEAD_BYTES, read_request, read_body, split_lines, response
+from typing import Any, Callable # For WebSocket handler
+
+# Default settings of the ingest server
+DEFAULT_HOST: str = "0.0.0.0"
+DEFAULT_PORT: int = 3210
+DEFAULT_MAX_CONNECTIONS: int = 64
+DEFAULT_PING_INTERVAL: float = 20 # Seconds between two keepalive pings
+DEFAULT_PING_TIMEOUT: float = 20 # Seconds to wait for a pong before closing the connection
+DEFAULT_IDLE_TIMEOUT: float = 300 # Seconds without any message before an idle client is closed
+DROP_REPORT_INTERVAL: float = 1 # Minimum seconds between two reports of dropped danmakus
+REJECTION_REPORT_INTERVAL: float = 1 # Minimum seconds between two reports of rejected messages
+WORKER_STOP_TIMEOUT: float = 3 # Seconds a worker process gets to exit before it is killed
+FILTER_RELOAD_CHECK_INTERVAL: float = 2 # Seconds between two checks of the keyword file for changes
+HTTP_YIELD_LINES: int = 1000 # Lines of a posted body handled before letting the other clients run
+
+
+def parse_danmaku(parsed: dict[str, Any]) -> DanmakuModel:
+    """
+    Builds a DanmakuModel from one decoded danmaku object.
+
+    Args:
+        parsed (dict[str, Any]): The decoded JSON object.
+
+    Returns:
+        DanmakuModel: The danmaku described by the object.
+
+    Raises:
+        ValueError: If a field cannot be converted or is out of range.
+        TypeError: If the object is not a JSON object or a field has an unusable type.
+    """
+    return DanmakuModel.from_dict(parsed)
+
+
+class ConnectionStats:
+    """
+    Counts the danmakus accepted and rejected on one WebSocket or HTTP connection.
+    """
+    def __init__(self, remote_address: str) -> None:
+        """
+        Initializes the ConnectionStats.
+
+        Args:
+            remote_address (str): The address of the client, used when reporting.
+        """
+        self.remote_address: str = remote_address
+        self.accepted: int = 0
+        self.rejected: int = 0
+
+    def __repr__(self) -> str:
+        return f"{self.remote_address}: {self.accepted} accepted, {self.rejected} rejected"
+
 
 class DanmakuSource(QThread):
     """
-    A QThread that runs a WebSocket server to receive danmaku messages.
+    A QThread that runs an asyncio WebSocket server to receive danmaku messages,
+    and an HTTP endpoint accepting them in bulk as newline-delimited JSON.
+    All client connections share the event loop of this thread.
     It parses incoming messages, creates DanmakuModel instances,
-    and emits a signal to add the danmaku.
+    passes them through admission control and delivers the admitted ones to the GUI thread in batches.
     """
-    def __init__(self) -> None:
+    def __init__(self,
+                 host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT,
+                 http_port: int | None = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 ping_interval: float | None = DEFAULT_PING_INTERVAL,
+                 ping_timeout: float | None = DEFAULT_PING_TIMEOUT,
+                 idle_timeout: float | None = DEFAULT_IDLE_TIMEOUT,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 admission: DanmakuAdmission | None = None,
+                 recorder: DanmakuRecorder | None = None,
+                 folder: DanmakuFolder | None = None,
+                 workers: int = 0,
+                 keyword_filter: DanmakuFilter | None = None,
+                 jitter_buffer: DanmakuJitterBuffer | None = None) -> None:
         """
         Initializes the DanmakuSource thread.
+
+        Args:
+            host (str, optional): The interface to listen on. Defaults to DEFAULT_HOST.
+            port (int, optional): The port to listen on. Defaults to DEFAULT_PORT.
+            http_port (int | None, optional): The port of the NDJSON ingest endpoint over HTTP (see src/danmaku_http.py), served by this thread also with workers; None disables it. Defaults to None.
+            max_connections (int, optional): Maximum number of concurrent clients, per protocol; further ones are refused. Defaults to DEFAULT_MAX_CONNECTIONS.
+            ping_interval (float | None, optional): Seconds between keepalive pings, None disables them. Defaults to DEFAULT_PING_INTERVAL.
+            ping_timeout (float | None, optional): Seconds to wait for a pong, None waits forever. Defaults to DEFAULT_PING_TIMEOUT.
+            idle_timeout (float | None, optional): Seconds without a message, or between two HTTP requests, before a client is closed, None disables it. Defaults to DEFAULT_IDLE_TIMEOUT.
+            flush_interval (float, optional): Seconds between two batches sent to the GUI thread. Defaults to DEFAULT_FLUSH_INTERVAL.
+            admission (DanmakuAdmission | None, optional): The admission stage deciding which danmakus reach the GUI thread. Defaults to a DanmakuAdmission with default limits.
+            recorder (DanmakuRecorder | None, optional): Records every received message for later replay; the source closes it on shutdown. Defaults to None.
+            folder (DanmakuFolder | None, optional): Folds repeated danmakus into one counted danmaku before admission, None disables folding. Defaults to None.
+            workers (int, optional): Number of worker processes accepting clients and parsing their messages; 0 serves them in this thread. Defaults to 0.
+            keyword_filter (DanmakuFilter | None, optional): Blocks or masks danmakus by keyword before folding and admission; its keyword file is reloaded when it changes. Defaults to None.
+            jitter_buffer (DanmakuJitterBuffer | None, optional): Paces timestamped danmakus to the times they were sent before admission, None releases them on arrival. Defaults to None.
+
+        Raises:
+            ValueError: If workers is negative, several workers cannot share the port, or recording is combined with workers.
         """
         super().__init__()
+        if workers < 0:
+            raise ValueError("workers must not be negative.")
+        if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("Several ingest workers need SO_REUSEPORT, which this platform lacks.")
+        if workers and recorder is not None:
+            raise ValueError("Recording needs the messages in this process, it cannot be combined with workers.")
+        self.host: str = host
+        self.port: int = port
+        self.http_port: int | None = http_port
+        self.max_connections: int = max_connections
+        self.ping_interval: float | None = ping_interval
+        self.ping_timeout: float | None = ping_timeout
+        self.idle_timeout: float | None = idle_timeout
+        self.batcher: DanmakuBatcher = DanmakuBatcher(flush_interval)
+        self.admission: DanmakuAdmission = admission if admission is not None else DanmakuAdmission()
+        self.recorder: DanmakuRecorder | None = recorder
+        self.folder: DanmakuFolder | None = folder
+        self.workers: int = workers
+        self.keyword_filter: DanmakuFilter | None = keyword_filter
+        self.jitter_buffer: DanmakuJitterBuffer | None = jitter_buffer
+        # Statistics of the currently open connections
+        self.connection_stats: dict[ServerConnection, ConnectionStats] = {}
+        self.http_connection_stats: dict[asyncio.StreamWriter, ConnectionStats] = {}
+        self._http_tasks: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop_event: asyncio.Event | None = None
+        self._last_rejection_report: float = -REJECTION_REPORT_INTERVAL
+        self._unreported_rejections: int = 0
 
     def run(self) -> None:
         """
         The main execution method of the thread.
-        Starts a WebSocket server and listens for incoming messages.
-        Processes valid messages into DanmakuModel objects and signals their addition.
+        Runs the asyncio event loop serving every WebSocket client until stop() is called.
+        """
+        asyncio.run(self._serve())
+
+    def stop(self) -> None:
+        """
+        Asks the server to shut down. Safe to call from any thread.
+        """
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def handle_message(self, message: str | bytes, stats: ConnectionStats,
+                       reply: Callable[[str], None] | None = None) -> None:
+        """
+        Processes one WebSocket message into DanmakuModel objects and offers them to the admission stage.
+        A message is either a single danmaku object or a bulk frame holding a JSON array of them.
+        With a keyword filter, blocked danmakus are dropped and masked keywords replaced first.
+        With a folder, repeated danmakus only raise the count of an earlier copy instead.
+        An object whose "type" is RECALL_MESSAGE_TYPE is a bulk recall, handed to handle_recall.
+
+        Args:
+            message (str | bytes): The received message.
+            stats (ConnectionStats): The statistics of the connection the message arrived on.
+            reply (Callable[[str], None] | None, optional): Sends a message back to the client. Defaults to None.
+        """
+        if self.recorder is not None:
+            self.recorder.record(message)
+        metrics_enabled = danmaku_metrics.enabled
+        if metrics_enabled:
+            danmaku_metrics.messages_received.inc()
+        try:
+            parsed: Any = json.loads(message) # json.loads accepts both str and UTF-8 bytes
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            stats.rejected += 1
+            if metrics_enabled:
+                danmaku_metrics.messages_rejected.inc(reason="json")
+            self._report_rejection(f"Error decoding JSON message from {stats.remote_address}: {message!r:.200}, Error: {e}")
+            return
+        if isinstance(parsed, dict) and parsed.get("type") == RECALL_MESSAGE_TYPE:
+            if not self.handle_recall(parsed, reply):
+                stats.rejected += 1
+                if metrics_enabled:
+                    danmaku_metrics.messages_rejected.inc(reason="content")
+            return
+
+        # A bulk frame carries many danmakus, each one is accepted or rejected on its own
+        for entry in parsed if isinstance(parsed, list) else (parsed,):
+            try:
+                model = parse_danmaku(entry)
+            except (TypeError, ValueError) as e: # Added ValueError for int conversions
+                stats.rejected += 1
+                if metrics_enabled:
+                    danmaku_metrics.messages_rejected.inc(reason="content")
+                self._report_rejection(f"Error processing message content from {stats.remote_address}: {entry!r:.200}, Error: {e}")
+                continue
+            stats.accepted += 1
+            if metrics_enabled:
+                danmaku_metrics.messages_parsed.inc()
+            self._admit(model, metrics_enabled)
+
+    def _report_rejection(self, report: str) -> None:
+        """
+        Prints why a message was rejected, at most once per REJECTION_REPORT_INTERVAL so that
+        a client sending malformed messages cannot flood the output; the others are only counted.
+
+        Args:
+            report (str): The description of the rejection.
+        """
+        now = time.monotonic()
+        if now - self._last_rejection_report < REJECTION_REPORT_INTERVAL:
+            self._unreported_rejections += 1
+            return
+        if self._unreported_rejections:
+            report += f" ({self._unreported_rejections} more rejected since the last report)"
+        print(report)
+        self._last_rejection_report = now
+        self._unreported_rejections = 0
+
+    def handle_batch(self, batch: bytes) -> None:
+        """
+        Processes one batch of records parsed and validated by a worker process.
+
+        Args:
+            batch (bytes): A BATCH_HEADER followed by packed danmaku records.
+        """
+        records, received, rejected_json, rejected_content = BATCH_HEADER.unpack_from(batch)
+        if records == CONTROL_RECORDS:
+            self.handle_recall(json.loads(batch[BATCH_HEADER.size:])) # Validated by the worker, which replied
+            return
+        metrics_enabled = danmaku_metrics.enabled
+        if metrics_enabled:
+            danmaku_metrics.messages_received.inc(received)
+            danmaku_metrics.messages_parsed.inc(records)
+            if rejected_json:
+                danmaku_metrics.messages_rejected.inc(rejected_json, reason="json")
+            if rejected_content:
+                danmaku_metrics.messages_rejected.inc(rejected_content, reason="content")
+        for model in unpack_danmakus(batch, BATCH_HEADER.size):
+            self._admit(model, metrics_enabled)
+
+    def handle_recall(self, parsed: dict[str, Any], reply: Callable[[str], None] | None = None) -> bool:
+        """
+        Asks the GUI thread to recall every danmaku selected by a recall control message.
+        The reply, if any, receives {"type": "recall", "removed": <count>} once the GUI thread is done,
+        or {"type": "recall", "error": <reason>} at once if the message is invalid.
+
+        Args:
+            parsed (dict[str, Any]): The decoded control message.
+            reply (Callable[[str], None] | None, optional): Sends a message back to the client. Defaults to None.
+
+        Returns:
+            bool: False if the message does not describe a valid recall.
+        """
+        try:
+            predicate = RecallPredicate.from_dict(parsed)
+        except (TypeError, ValueError) as e:
+            self._report_rejection(f"Error processing recall message: {parsed!r:.200}, Error: {e}")
+            if reply is not None:
+                reply(json.dumps({"type": RECALL_MESSAGE_TYPE, "error": str(e)}))
+            return False
+        answer = None
+        if reply is not None:
+            answer = lambda removed: reply(json.dumps({"type": RECALL_MESSAGE_TYPE, "removed": removed}))
+        danmaku_signal.danmaku_signal_recall.emit((predicate, answer))
+        return True
+
+    def recall_queued(self, predicate: RecallPredicate) -> int:
+        """
+        Removes the danmakus selected by a bulk recall from every stage that has not handed them
+        to the GUI thread yet: the jitter buffer, the admission queue and the batcher. Safe to call from any thread.
+        The stages are visited in pipeline order, so a danmaku moving on meanwhile is caught by the next one.
+
+        Args:
+            predicate (RecallPredicate): Selects the danmakus to recall.
+
+        Returns:
+            int: The number of danmakus removed.
+        """
+        removed = self.jitter_buffer.remove_matching(predicate) if self.jitter_buffer is not None else 0
+        return removed + self.admission.remove_matching(predicate) + self.batcher.remove_matching(predicate)
+
+    def _admit(self, model: DanmakuModel, metrics_enabled: bool) -> None:
+        """
+        Filters a valid danmaku, then folds it into an earlier copy or offers it to the admission stage,
+        through the jitter buffer if it carries a timestamp.
+
+        Args:
+            model (DanmakuModel): The parsed danmaku.
+            metrics_enabled (bool): Whether metrics are being collected.
+        """
+        if self.keyword_filter is not None:
+            masked = self.keyword_filter.masked
+            if not self.keyword_filter.apply(model):
+                if metrics_enabled:
+                    danmaku_metrics.messages_filtered.inc(action=FILTER_BLOCK)
+                return
+            if metrics_enabled and self.keyword_filter.masked != masked:
+                danmaku_metrics.messages_filtered.inc(action=FILTER_MASK)
+        if self.folder is not None and self.folder.fold(model):
+            if metrics_enabled:
+                danmaku_metrics.messages_folded.inc()
+            return
+        if self.jitter_buffer is not None and model.sent_at is not None:
+            for released in self.jitter_buffer.push(model):
+                self._offer(released)
+            return
+        self._offer(model)
+
+    def _offer(self, model: DanmakuModel) -> None:
         """
-        def echo(websocket: ServerConnection) -> None: # Added type hint for websocket
-            """
-            Handles incoming WebSocket messages.
+        Offers a danmaku to the admission stage. A danmaku it drops is never shown,
+        so copies arriving later must not be folded into it.
 
-            Args:
-                websocket (ServerConnection): The WebSocket connection object.
-            """
-            for message in websocket:
+        Args:
+            model (DanmakuModel): The danmaku to offer.
+        """
+        dropped = self.admission.offer(model)
+        if dropped is not None and self.folder is not None:
+            self.folder.forget(dropped.danmaku_id)
+
+    async def _serve(self) -> None:
+        """
+        Serves WebSocket clients, in this thread or through worker processes,
+        and flushes batches until the stop event is set.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        if self.workers:
+            await self._serve_with_workers()
+            return
+        async with serve(self._handle_connection, self.host, self.port,
+                         process_request=self._check_capacity,
+                         ping_interval=self.ping_interval,
+                         ping_timeout=self.ping_timeout):
+            print(f"Danmaku WebSocket server started on {self.host}:{self.port}") # Added server start message
+            http_server = await self._start_http_server()
+            flusher = asyncio.create_task(self._flush_loop())
+            reloader = asyncio.create_task(self._filter_reload_loop())
+            await self._stop_event.wait()
+            flusher.cancel()
+            reloader.cancel()
+            await self._stop_http_server(http_server)
+        if self.recorder is not None:
+            self.recorder.close()
+
+    async def _serve_with_workers(self) -> None:
+        """
+        Starts the worker processes, consumes their batches and stops them once the stop event is set.
+        Workers are separate interpreters started with `-m src.danmaku_workers`, so they never import Qt;
+        a frozen build, which cannot run `-m`, starts its own executable with WORKER_ARGUMENT instead.
+        They share the port through SO_REUSEPORT and report over their standard output.
+        """
+        arguments = ["--host", self.host, "--port", str(self.port),
+                     "--max-connections", str(self.max_connections),
+                     "--ping-interval", str(self.ping_interval).lower(),
+                     "--ping-timeout", str(self.ping_timeout).lower(),
+                     "--idle-timeout", str(self.idle_timeout).lower(),
+                     "--flush-interval", str(self.batcher.flush_interval)]
+        if self.workers > 1:
+            arguments.append("--reuse-port")
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if getattr(sys, "frozen", False):
+            command = [sys.executable, WORKER_ARGUMENT]
+        else:
+            command = [sys.executable, "-m", "src.danmaku_workers"]
+        processes = [await asyncio.create_subprocess_exec(*command, *arguments,
+                                                          stdin=asyncio.subprocess.PIPE,
+                                                          stdout=asyncio.subprocess.PIPE,
+                                                          cwd=project_root)
+                     for _ in range(self.workers)]
+        readers = [asyncio.create_task(self._read_worker(process)) for process in processes]
+        flusher = asyncio.create_task(self._flush_loop())
+        reloader = asyncio.create_task(self._filter_reload_loop())
+        print(f"Danmaku WebSocket server started on {self.host}:{self.port} with {self.workers} worker processes")
+        http_server = await self._start_http_server()
+        await self._stop_event.wait()
+        await self._stop_http_server(http_server)
+
+        for process in processes:
+            process.stdin.close() # Workers exit once their standard input is closed
+        for process in processes:
+            try:
+                await asyncio.wait_for(process.wait(), WORKER_STOP_TIMEOUT)
+            except TimeoutError:
+                process.kill()
+                await process.wait()
+        await asyncio.gather(*readers, return_exceptions=True) # Consume the last batches
+        flusher.cancel()
+        reloader.cancel()
+
+    async def _read_worker(self, process: asyncio.subprocess.Process) -> None:
+        """
+        Consumes the batches of one worker process until it exits.
+
+        Args:
+            process (asyncio.subprocess.Process): The worker process.
+        """
+        try:
+            while True:
+                (length,) = FRAME_LENGTH.unpack(await process.stdout.readexactly(FRAME_LENGTH.size))
+                self.handle_batch(await process.stdout.readexactly(length))
+        except asyncio.IncompleteReadError:
+            if not self._stop_event.is_set():
+                print(f"Danmaku ingest worker {process.pid} exited with code {await process.wait()}")
+
+    async def _flush_loop(self) -> None:
+        """
+        Hands the danmakus released by the admission stage to the GUI thread once per flush interval.
+        Reports dropped danmakus at most once per DROP_REPORT_INTERVAL.
+        """
+        reported_drops = 0
+        last_report = self._loop.time()
+        while True:
+            await asyncio.sleep(self.batcher.flush_interval)
+            if self.jitter_buffer is not None:
+                for model in self.jitter_buffer.release():
+                    self._offer(model)
+            self.batcher.extend(self.admission.drain())
+            self.batcher.flush()
+            if self.folder is not None:
+                # Sent after the batch, so a danmaku released in this flush is known before its count changes
+                updates = self.folder.drain_updates()
+                if updates:
+                    danmaku_signal.danmaku_signal_fold_update.emit(updates)
+            if danmaku_metrics.enabled:
+                danmaku_metrics.queue_depth.set(self.admission.pending)
+                if self.jitter_buffer is not None:
+                    for field, value in self.jitter_buffer.stats().items():
+                        danmaku_metrics.jitter_buffer.set(value, field=field)
+
+            now = self._loop.time()
+            if self.admission.dropped != reported_drops and now - last_report >= DROP_REPORT_INTERVAL:
+                stats = self.admission.stats()
+                print(f"Danmaku admission dropped {stats['dropped'] - reported_drops} danmakus "
+                      f"({stats['dropped']} total, {stats['pending']} pending)")
+                reported_drops = stats['dropped']
+                last_report = now
+
+    async def _filter_reload_loop(self) -> None:
+        """
+        Reloads the keyword file of the filter whenever it changes, without stopping the server.
+        The automaton is built in an executor thread, so clients keep being served meanwhile;
+        a file that cannot be read leaves the previous keywords active.
+        """
+        if self.keyword_filter is None or self.keyword_filter.path is None:
+            return
+        while True:
+            await asyncio.sleep(FILTER_RELOAD_CHECK_INTERVAL)
+            try:
+                if await self._loop.run_in_executor(None, self.keyword_filter.reload_if_changed):
+                    print(f"Danmaku keyword filter reloaded, {self.keyword_filter.automaton.keyword_count} keywords")
+            except (OSError, ValueError) as e:
+                print(f"Error reloading danmaku keyword filter {self.keyword_filter.path}: {e}")
+
+    def _check_capacity(self, connection: ServerConnection, request: Request) -> Response | None:
+        """
+        Refuses the handshake when the maximum number of concurrent connections is reached.
+
+        Args:
+            connection (ServerConnection): The connection being opened.
+            request (Request): The handshake request.
+
+        Returns:
+            Response | None: A 503 response to refuse the client, or None to continue the handshake.
+        """
+        if len(self.connection_stats) >= self.max_connections:
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "Too many connections\n")
+        return None
+
+    async def _handle_connection(self, websocket: ServerConnection) -> None:
+        """
+        Handles one WebSocket client until it disconnects or stays idle for too long.
+
+        Args:
+            websocket (ServerConnection): The WebSocket connection object.
+        """
+        stats = ConnectionStats(str(websocket.remote_address))
+        self.connection_stats[websocket] = stats
+        reply = lambda text: self._reply(websocket, text)
+        try:
+            while True:
                 try:
-                    # Ensure message is treated as string if it's bytes
-                    if isinstance(message, bytes):
-                        message_str = message.decode('utf-8')
-                    else:
-                        message_str = str(message) # Ensure it's a string
-
-                    parsed: dict[str, Any] = json.loads(message_str)
-                    model = DanmakuModel(
-                        text=str(parsed.get('text', '')),
-                        color=str(parsed.get('color', '#FFFFFF')),
-                        size=int(parsed.get('size', 20)),
-                        speed=int(parsed.get('speed', 300)),
-                        font_family=str(parsed.get('fontFamily', "Microsoft YaHei")),
-                        font_weight=int(parsed.get('fontWeight', QFont.Normal)),
-                        font_style=parsed.get('fontStyle', QFont.StyleNormal), # QFont.Style is an enum, usually int
-                        text_decoration=str(parsed.get('textDecoration', ""))
-                    )
-                    danmaku_signal.danmaku_signal_add.emit(model)
-                except json.JSONDecodeError as e:
-                    print(f"Error decoding JSON message: {message_str}, Error: {e}")
-                except (KeyError, ValueError) as e: # Added ValueError for int conversions
-                    print(f"Error processing message content: {parsed if 'parsed' in locals() else message_str}, Error: {e}")
-                except Exception as e: # Catch any other unexpected errors
-                    print(f"An unexpected error occurred while processing message: {message_str if 'message_str' in locals() else message}, Error: {e}")
-
-
-        # The 'serve' function from 'websockets' library typically returns a context manager.
-        # We assume 'server' object has a 'serve_forever' method.
-        with serve(echo, "0.0.0.0", 3210) as server:
-            print("Danmaku WebSocket server started on 0.0.0.0:3210") # Added server start message
-            server.serve_forever()
\ No newline at end of file
+                    async with asyncio.timeout(self.idle_timeout):
+                        message = await websocket.recv()
+                except TimeoutError:
+                    await websocket.close(1000, "Idle timeout")
+                    break
+                self.handle_message(message, stats, reply)
+        except ConnectionClosed:
+            pass
+        finally:
+            del self.connection_stats[websocket]
+            print(f"Danmaku WebSocket client closed, {stats}")
+
+    async def _start_http_server(self) -> asyncio.Server | None:
+        """
+        Starts the HTTP ingest endpoint on http_port. A port already in use only disables the endpoint.
+
+        Returns:
+            asyncio.Server | None: The server, or None if it is disabled or could not start.
+        """
+        if self.http_port is None:
+            return None
+        try:
+            server = await asyncio.start_server(self._handle_http_connection, self.host, self.http_port,
+                                                limit=MAX_HEAD_BYTES)
+        except OSError as e:
+            print(f"Error starting danmaku HTTP ingest on {self.host}:{self.http_port}: {e}")
+            return None
+        print(f"Danmaku HTTP ingest started on {self.host}:{self.http_port}{HTTP_INGEST_PATH}")
+        return server
+
+    async def _stop_http_server(self, server: asyncio.Server | None) -> None:
+        """
+        Stops accepting HTTP clients and closes the open connections, letting their handlers finish.
+
+        Args:
+            server (asyncio.Server | None): The server returned by _start_http_server.
+        """
+        if server is None:
+            return
+        server.close()
+        for writer in self.http_connection_stats:
+            writer.close() # A kept-alive connection waiting for its next request ends like a client leaving
+        await asyncio.gather(*self._http_tasks, return_exceptions=True)
+
+    async def _handle_http_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves the requests of one HTTP client, one after another on the same connection while it is kept alive.
+        Each request is answered with the danmakus it got accepted and rejected.
+
+        Args:
+            reader (asyncio.StreamReader): The incoming side of the connection.
+            writer (asyncio.StreamWriter): The outgoing side of the connection.
+        """
+        stats = ConnectionStats(f"http {writer.get_extra_info('peername')}")
+        if len(self.http_connection_stats) >= self.max_connections:
+            writer.write(response(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Too many connections"}, False))
+            writer.close()
+            return
+        self.http_connection_stats[writer] = stats
+        task = asyncio.current_task()
+        self._http_tasks.add(task)
+        try:
+            keep_alive = True
+            while keep_alive:
+                accepted, rejected = stats.accepted, stats.rejected
+                try:
+                    async with asyncio.timeout(self.idle_timeout):
+                        request = await read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = request.keep_alive
+                    await self._ingest_http_request(request, reader, writer, stats)
+                    status, body = HTTPStatus.OK, {}
+                except TimeoutError:
+                    break
+                except HttpError as e:
+                    # The rest of the request cannot be told apart from the next one, close after answering
+                    status, body, keep_alive = e.status, {"error": str(e)}, False
+                body.update(accepted=stats.accepted - accepted, rejected=stats.rejected - rejected)
+                writer.write(response(status, body, keep_alive))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.http_connection_stats[writer]
+            self._http_tasks.discard(task)
+            writer.close()
+            print(f"Danmaku HTTP client closed, {stats}")
+
+    async def _ingest_http_request(self, request: HttpRequest, reader: asyncio.StreamReader,
+                                   writer: asyncio.StreamWriter, stats: ConnectionStats) -> None:
+        """
+        Handles every line of a posted body as one WebSocket message, as it arrives.
+
+        Args:
+            request (HttpRequest): The request, its body still unread.
+            reader (asyncio.StreamReader): The incoming side of the connection.
+            writer (asyncio.StreamWriter): The outgoing side of the connection.
+            stats (ConnectionStats): The statistics of the connection.
+
+        Raises:
+            HttpError: If the request is not a POST to HTTP_INGEST_PATH or its body is malformed.
+        """
+        if request.path.partition("?")[0] != HTTP_INGEST_PATH:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Danmakus are posted to {HTTP_INGEST_PATH}")
+        if request.method != "POST":
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Only POST is supported")
+        if request.headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        lines = 0
+        async for line in split_lines(read_body(reader, request)):
+            self.handle_message(line, stats)
+            lines += 1
+            if lines % HTTP_YIELD_LINES == 0:
+                await asyncio.sleep(0) # Lines already buffered are handled without awaiting otherwise
+
+    def _reply(self, websocket: ServerConnection, text: str) -> None:
+        """
+        Sends a message to a client from any thread; dropped if the client or the server is gone.
+
+        Args:
+            websocket (ServerConnection): The connection of the client.
+            text (str): The message.
+        """
+        try:
+            asyncio.run_coroutine_threadsafe(self._send(websocket, text), self._loop)
+        except RuntimeError: # The event loop has been closed
+            pass
+
+    async def _send(self, websocket: ServerConnection, text: str) -> None:
+        try:
+            await websocket.send(text)
+        except ConnectionClosed:
+            pass
@@ -0,0 +1,195 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPaintEvent, QPainter # Added for type hinting
+import time
+from typing import TYPE_CHECKING
+from .danmaku_model import DanmakuModel # Added for type hinting
+
+if TYPE_CHECKING: # Only needed for type hinting, avoids a circular import
+    from .danmaku_manager import DanmakuManager
+
+# How a screen displays danmakus.
+# "mirror" paints the layout of the first screen, laid out once for every mirroring screen,
+# "separate" gives the screen a DanmakuManager of its own, laid out for its size.
+VIEW_MIRROR: str = "mirror"
+VIEW_SEPARATE: str = "separate"
+VIEW_MODES: tuple[str, ...] = (VIEW_MIRROR, VIEW_SEPARATE)
+
+# Danmaku IDs are hashed onto this many buckets to pick the share of a subset view
+SHARE_BUCKETS: int = 1 << 16
+# Fibonacci hashing spreads consecutive IDs evenly over the buckets
+_SHARE_MULTIPLIER: int = 0x9E3779B97F4A7C15
+_SHARE_MASK: int = (1 << 64) - 1
+
+
+class ScreenView:
+    """
+    Describes what one screen shows: the shared layout or a layout of its own,
+    which share of the danmakus, and how many of them at most.
+    """
+    __slots__ = ("mode", "share", "max_active")
+
+    def __init__(self, mode: str = VIEW_MIRROR, share: float = 1.0, max_active: int | None = None) -> None:
+        """
+        Initializes a ScreenView.
+
+        Args:
+            mode (str, optional): VIEW_MIRROR or VIEW_SEPARATE. Defaults to VIEW_MIRROR.
+            share (float, optional): Share of the danmakus shown, in (0, 1]. Every screen with the same share shows
+                the same danmakus. Defaults to 1.0.
+            max_active (int | None, optional): Danmakus shown at most at once; a danmaku arriving beyond it is skipped
+                on this screen only. None shows every danmaku. Defaults to None.
+
+        Raises:
+            ValueError: If mode is not supported, share is not in (0, 1] or max_active is not positive.
+        """
+        if mode not in VIEW_MODES:
+            raise ValueError(f"Unsupported view mode: {mode}")
+        if not 0 < share <= 1: # Also rejects NaN
+            raise ValueError(f"share must be in (0, 1], got {share}")
+        if max_active is not None and max_active <= 0:
+            raise ValueError("max_active must be a positive integer.")
+        self.mode: str = mode
+        self.share: float = share
+        self.max_active: int | None = max_active
+
+    @property
+    def shows_all(self) -> bool:
+        """
+        Whether the view shows every danmaku of the layout, so it can blit the frame composed for all such views.
+        """
+        return self.share >= 1 and self.max_active is None
+
+    def accepts(self, model: DanmakuModel) -> bool:
+        """
+        Checks whether a danmaku falls into the share of this view.
+
+        Args:
+            model (DanmakuModel): The danmaku.
+
+        Returns:
+            bool: True if the danmaku is part of the share.
+        """
+        if self.share >= 1:
+            return True
+        bucket = ((model.danmaku_id * _SHARE_MULTIPLIER) & _SHARE_MASK) >> 48
+        return bucket < self.share * SHARE_BUCKETS
+
+
+def parse_screen_views(spec: str) -> dict[int, ScreenView]:
+    """
+    Parses per-screen view settings such as "1:share=0.5,max=200;2:separate".
+    Entries are separated by semicolons; each names a screen index, a colon and comma-separated options:
+    "mirror" or "separate", "share=<fraction>" and "max=<count>".
+
+    Args:
+        spec (str): The settings, empty for none.
+
+    Returns:
+        dict[int, ScreenView]: The view of every screen named, keyed by screen index.
+
+    Raises:
+        ValueError: If an entry cannot be parsed or screen 0, whose layout is the shared one, is made separate.
+    """
+    views: dict[int, ScreenView] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        index, _, options = entry.partition(":")
+        screen_index = int(index)
+        if screen_index < 0:
+            raise ValueError("Screen index must be a non-negative integer.")
+        mode, share, max_active = VIEW_MIRROR, 1.0, None
+        for option in filter(None, (part.strip() for part in options.split(","))):
+            key, _, value = option.partition("=")
+            if key in VIEW_MODES and not value:
+                mode = key
+            elif key == "share":
+                share = float(value)
+            elif key == "max":
+                max_active = int(value)
+            else:
+                raise ValueError(f"Unknown screen view option: {option}")
+        if screen_index == 0 and mode == VIEW_SEPARATE:
+            raise ValueError("Screen 0 lays out the shared danmakus and cannot be separate.")
+        views[screen_index] = ScreenView(mode, share, max_active)
+    return views
+
+
+class DanmakuView(QWidget):
+    """
+    Paints the danmakus of a DanmakuManager that lays them out for another screen.
+    The view keeps no state of its own: the manager places, moves and expires the danmakus once per frame
+    and repaints every view. A view showing every danmaku blits the frame the manager composed once for all
+    such views; a subset view blits the cached pixmaps of the danmakus it shows.
+    A view narrower or wider than the manager scales the layout to its width.
+    """
+    def __init__(self, manager: "DanmakuManager", screen_view: ScreenView) -> None:
+        """
+        Initializes the DanmakuView and attaches it to the manager.
+
+        Args:
+            manager (DanmakuManager): The canvas mode manager whose layout is painted.
+            screen_view (ScreenView): The share and density cap of this view.
+
+        Raises:
+            ValueError: If the manager does not render in canvas mode.
+        """
+        super().__init__()
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setStyleSheet("background: transparent;")
+        self.manager: "DanmakuManager" = manager
+        self.screen_view: ScreenView = screen_view
+        # Bit of this view in the view mask of every DanmakuItem
+        self.view_bit: int = manager.attach_view(self)
+
+    @property
+    def uses_composed_frame(self) -> bool:
+        """
+        Whether the manager has to compose a shared frame for this view.
+        """
+        return self.screen_view.shows_all and self.isVisible()
+
+    @property
+    def shown_count(self) -> int:
+        """
+        The number of danmakus currently shown by this view.
+        """
+        return self.manager.shown_count(self.view_bit)
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """
+        Draws the danmakus of the manager that this view shows.
+
+        Args:
+            event (QPaintEvent): The paint event.
+        """
+        manager = self.manager
+        items = manager.active_items
+        if not items:
+            return
+        painter = QPainter(self)
+        if manager.width() and self.width() != manager.width():
+            scale = self.width() / manager.width()
+            painter.scale(scale, scale)
+        if manager.composed_frame is not None and self.screen_view.shows_all:
+            painter.drawImage(0, 0, manager.composed_frame, 0, 0, manager.width(), manager.frame_height)
+            painter.end()
+            return
+        now = time.monotonic()
+        bit = self.view_bit
+        for item in items:
+            if item.recalled or not item.view_mask & bit:
+                continue
+            painter.drawPixmap(int(item.x_at(now)) - item.padding, item.y - item.padding, item.pixmap)
+        painter.end()
+
+    def update_rows(self, height: int) -> None:
+        """
+        Schedules a repaint of the top rows of the layout, where the manager has danmakus.
+
+        Args:
+            height (int): The number of rows of the manager to repaint.
+        """
+        manager_width = self.manager.width()
+        if manager_width and self.width() != manager_width:
+            height = -(-height * self.width() // manager_width)
+        self.update(0, 0, self.width(), height)
@@ -1,14 +1,21 @@
-from PyQt5.QtWidgets import QLabel, QGraphicsDropShadowEffect, QWidget # Added QWidget for parent type hint
-from PyQt5.QtCore import QPoint, QPropertyAnimation, QAbstractAnimation, pyqtBoundSignal
-from PyQt5.QtGui import QFont, QColor, QShowEvent # Added QShowEvent for type hinting
-from .danmaku_signal import danmaku_signal
+from PyQt5.QtWidgets import QLabel, QWidget # Added QWidget for parent type hint
+from PyQt5.QtCore import QPoint, QPropertyAnimation, QAbstractAnimation, pyqtBoundSignal, pyqtSignal
+from PyQt5.QtGui import QShowEvent # Added QShowEvent for type hinting
 from .danmaku_model import DanmakuModel # Added for type hinting
+from .danmaku_pixmap_cache import danmaku_pixmap_cache
+from .danmaku_item import effective_speed
+from .danmaku_metrics import danmaku_metrics
+import time
 
 class DanmakuWidget(QLabel):
     """
     Represents a single danmaku message as a QLabel widget.
-    Handles its appearance, animation, and deletion.
+    Handles its appearance and animation. Widgets are pooled by their manager:
+    bind() points a hidden widget at a new danmaku and showing it starts the animation again.
     """
+    # Signal emitted with the widget itself when its animation has finished.
+    expired: pyqtSignal = pyqtSignal(object)
+
     def __init__(self, model: DanmakuModel, parent: QWidget, start_pos: QPoint, end_pos: QPoint) -> None:
         """
         Initializes a DanmakuWidget.
@@ -19,34 +26,33 @@ class DanmakuWidget(QLabel):
             start_pos (QPoint): The starting position for the animation.
             end_pos (QPoint): The ending position for the animation.
         """
-        super().__init__(model.text, parent)
-        self.model: DanmakuModel = model
-        self.danmaku_id: str = model.danmaku_id
-        self.start_pos: QPoint = start_pos
-        self.end_pos: QPoint = end_pos
-        self.animation: QPropertyAnimation | None = None # Initialize animation attribute
-        
-
-        font = QFont(model.font_family)
-        font.setPointSize(model.size)
-        font.setWeight(model.font_weight)
-        # QFont.Style is an enum, ensure model.font_style is compatible or cast
-        font.setStyle(QFont.Style(model.font_style) if isinstance(model.font_style, int) else model.font_style)
-        self.setFont(font)
+        super().__init__(parent)
+        # One animation per widget, reconfigured every time the widget is shown
+        self.animation: QPropertyAnimation = QPropertyAnimation(self, b"pos")
+        self.animation.finished.connect(self.on_animation_finished)
+        self.bind(model, start_pos, end_pos)
+        if danmaku_metrics.enabled:
+            danmaku_metrics.items_created.inc(kind="widget")
 
-        style_sheet = f"color: {model.color};"
-        if model.text_decoration:
-             style_sheet += f" text-decoration: {model.text_decoration};" # Added space before text-decoration
-        self.setStyleSheet(style_sheet)
+    def bind(self, model: DanmakuModel, start_pos: QPoint, end_pos: QPoint) -> None:
+        """
+        Makes the widget display a danmaku, replacing whatever it displayed before.
+        Call it while the widget is hidden; the animation starts when it is shown.
 
-        # Add shadow effect
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(15)
-        shadow.setXOffset(0)
-        shadow.setYOffset(0)
-        shadow.setColor(QColor(0, 0, 0, 200)) # Black shadow with some transparency
-        self.setGraphicsEffect(shadow)
+        Args:
+            model (DanmakuModel): The data model for the danmaku.
+            start_pos (QPoint): The starting position for the animation.
+            end_pos (QPoint): The ending position for the animation.
+        """
+        self.model: DanmakuModel = model
+        self.danmaku_id: int = model.danmaku_id
+        # The cached pixmap carries a margin for the shadow, shift the label so the text stays in place
+        padding = danmaku_pixmap_cache.padding
+        self.start_pos: QPoint = start_pos - QPoint(padding, padding)
+        self.end_pos: QPoint = end_pos - QPoint(padding, padding)
 
+        # Text and shadow are rasterized once and shared, instead of blurring on every frame
+        self.setPixmap(danmaku_pixmap_cache.get(model))
         self.adjustSize()
 
     def showEvent(self, event: QShowEvent) -> None:
@@ -59,53 +65,38 @@ class DanmakuWidget(QLabel):
         """
         super().showEvent(event)
         self.move(self.start_pos)
-        self.animation = QPropertyAnimation(self, b"pos")
-        # Ensure speed is not zero to avoid division by zero
-        duration = int(1000 * self.parent().width() / self.model.speed) if self.model.speed > 0 else 10000
+        # Move at model.speed pixels per second over the whole path, like the canvas renderer
+        distance = self.start_pos.x() - self.end_pos.x()
+        duration = int(1000 * distance / effective_speed(self.model.speed, distance))
         self.animation.setDuration(duration)
         self.animation.setStartValue(self.start_pos)
         self.animation.setEndValue(self.end_pos)
-        self.animation.finished.connect(self.on_animation_finished)
         self.animation.start()
-        
-        # Connect to delete signal
-        danmaku_signal.danmaku_signal_delete.connect(self.check_delete)
+        if danmaku_metrics.enabled:
+            danmaku_metrics.signal_to_paint.observe(time.monotonic() - self.model.received_at)
         
     def on_animation_finished(self) -> None:
         """
         Called when the danmaku animation finishes.
-        Disconnects the delete signal, emits a signal that this danmaku is finished,
-        and schedules the widget for deletion.
+        Hides the widget and notifies the owning manager through the expired signal, which keeps it for reuse.
         """
-        try:
-            # Disconnect signal to prevent memory leaks
-            danmaku_signal.danmaku_signal_delete.disconnect(self.check_delete)
-        except TypeError: # Signal might have already been disconnected
-            pass 
-        danmaku_signal.danmaku_signal_delete.emit(self.danmaku_id) # Emit signal that this danmaku is done
-        self.deleteLater()
+        self.hide()
+        self.expired.emit(self)
         
-    def check_delete(self, danmaku_id: str) -> None:
+    def refresh(self) -> None:
         """
-        Checks if this danmaku instance needs to be deleted based on the provided ID.
-        If the ID matches, it stops the animation (if running), disconnects the signal,
-        hides the widget, and schedules it for deletion.
+        Re-rasterizes the danmaku after its model has changed, keeping its animation running.
+        """
+        self.setPixmap(danmaku_pixmap_cache.get(self.model))
+        self.adjustSize()
 
-        Args:
-            danmaku_id (str): The ID of the danmaku to check for deletion.
+    def recall(self) -> None:
+        """
+        Removes the danmaku from view immediately.
+        Stops the animation (if running) and hides the widget; the owning manager keeps it for reuse.
         """
-        # Check if this is the danmaku to be deleted
-        if danmaku_id == self.danmaku_id:
-            # Stop animation if it's running
-            if self.animation and self.animation.state() == QAbstractAnimation.Running:
-                self.animation.stop()
-            
-            try:
-                # Disconnect signal to prevent memory leaks
-                danmaku_signal.danmaku_signal_delete.disconnect(self.check_delete)
-            except TypeError: # Signal might have already been disconnected
-                pass
-            # Hide to remove immediately from view
-            self.hide()
-            # Delete self
-            self.deleteLater()
\ No newline at end of file
+        # Stop animation if it's running
+        if self.animation.state() == QAbstractAnimation.Running:
+            self.animation.stop()
+        # Hide to remove immediately from view
+        self.hide()
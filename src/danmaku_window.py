@@ -1,26 +1,35 @@
 from PyQt5.QtWidgets import QMainWindow
 from PyQt5.QtCore import Qt, QRect  # Added QRect for type hinting
-from PyQt5.QtGui import QGuiApplication, QScreen  # Added QScreen for type hinting
+from PyQt5.QtGui import QCloseEvent, QGuiApplication, QScreen  # Added QScreen for type hinting
 
-from .danmaku_manager import DanmakuManager
+from .danmaku_manager import DanmakuManager, RENDER_MODE_CANVAS
 from .danmaku_model import DanmakuModel  # Added for type hinting
+from .danmaku_view import DanmakuView, ScreenView
 
 
 class DanmakuWindow(QMainWindow):
     """
     A QMainWindow that serves as a transparent overlay for displaying danmakus on a specific screen.
     It is frameless, stays on top, and allows mouse events to pass through.
+    A window either owns a DanmakuManager laying danmakus out for its screen, or shows the layout
+    of another window's manager through a DanmakuView.
     """
 
-    def __init__(self, screen_index: int) -> None:  # Changed: index to screen_index for clarity
+    def __init__(self, screen_index: int, render_mode: str = RENDER_MODE_CANVAS,
+                 screen_view: ScreenView | None = None,
+                 shared_manager: DanmakuManager | None = None) -> None:  # Changed: index to screen_index for clarity
         """
         Initializes the DanmakuWindow on the specified screen.
 
         Args:
             screen_index (int): The index of the screen on which this window will be displayed.
+            render_mode (str, optional): The render mode passed to the DanmakuManager. Defaults to RENDER_MODE_CANVAS.
+            screen_view (ScreenView | None, optional): The share and density cap of this screen. Defaults to showing every danmaku.
+            shared_manager (DanmakuManager | None, optional): A canvas mode manager of another window whose layout this window
+                shows; None creates a manager for this window. Defaults to None.
 
         Raises:
-            ValueError: If screen_index is negative or invalid.
+            ValueError: If screen_index is negative or invalid, or shared_manager does not render in canvas mode.
         """
         super().__init__()
 
@@ -58,14 +67,60 @@ class DanmakuWindow(QMainWindow):
         # Force the window to be positioned correctly, especially for multi-monitor setups
         self.move(screen_geometry.x(), screen_geometry.y())
 
-        self.danmaku_manager: DanmakuManager = DanmakuManager()
-        self.setCentralWidget(self.danmaku_manager)
+        # The manager laying out the danmakus of this window, shared with other windows when danmaku_view is set
+        self.danmaku_view: DanmakuView | None = None
+        if shared_manager is None:
+            self.danmaku_manager: DanmakuManager = DanmakuManager(render_mode, screen_view=screen_view)
+            self.setCentralWidget(self.danmaku_manager)
+        else:
+            self.danmaku_manager = shared_manager
+            self.danmaku_view = DanmakuView(shared_manager, screen_view or ScreenView())
+            self.setCentralWidget(self.danmaku_view)
+
+    @property
+    def owns_manager(self) -> bool:
+        """
+        Whether this window lays out its own danmakus rather than showing those of a shared manager.
+        """
+        return self.danmaku_view is None
 
     def add_danmaku(self, model: DanmakuModel) -> None:
         """
         Adds a danmaku to the DanmakuManager associated with this window.
+        A window showing a shared manager adds nothing, the window owning the manager does.
 
         Args:
             model (DanmakuModel): The danmaku data model to add.
         """
-        self.danmaku_manager.add_danmaku(model)
\ No newline at end of file
+        self.add_danmaku_batch([model])
+
+    def add_danmaku_batch(self, models: list[DanmakuModel]) -> None:
+        """
+        Adds several danmakus to the DanmakuManager associated with this window in one pass.
+        A window showing a shared manager adds nothing, the window owning the manager does.
+
+        Args:
+            models (list[DanmakuModel]): The danmaku data models to add.
+        """
+        if self.owns_manager:
+            self.danmaku_manager.add_danmaku_batch(models)
+
+    @property
+    def active_count(self) -> int:
+        """
+        The number of danmakus currently displayed in this window.
+        """
+        if self.danmaku_view is not None:
+            return self.danmaku_view.shown_count
+        return self.danmaku_manager.active_count
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """
+        Clears the danmakus of the manager this window owns, so recalls never reach a window that is gone.
+
+        Args:
+            event (QCloseEvent): The close event.
+        """
+        if self.owns_manager:
+            self.danmaku_manager.clear()
+        super().closeEvent(event)
@@ -0,0 +1,225 @@
+"""
+Ingest worker process: accepts WebSocket clients, parses and validates their messages
+and streams compact danmaku records to the GUI process over its standard output.
+Started by DanmakuSource when it runs with workers; it does not import Qt.
+
+Frames written to standard output are a little-endian uint32 length followed by a batch:
+a BATCH_HEADER (records, messages received, JSON rejections, content rejections) and the
+records packed by src.danmaku_record. A bulk recall asked for by a client is forwarded in order with the
+danmakus as a batch of CONTROL_RECORDS records, followed by the JSON of the control message.
+The worker stops when its standard input is closed.
+A frozen build cannot run `-m`, so it starts itself again with WORKER_ARGUMENT, which main.py dispatches here.
+"""
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import threading
+from typing import Any, BinaryIO
+
+from websockets.asyncio.server import serve, ServerConnection
+from websockets.exceptions import ConnectionClosed
+from websockets.http11 import Request, Response
+from http import HTTPStatus
+
+from .danmaku_model import DanmakuModel
+from .danmaku_record import pack_danmaku
+from .danmaku_recall import RecallPredicate, RECALL_MESSAGE_TYPE
+
+FRAME_LENGTH: struct.Struct = struct.Struct("<I")
+BATCH_HEADER: struct.Struct = struct.Struct("<IIII")
+# First argument making a frozen build of the application run as an ingest worker; main.py spells it out
+WORKER_ARGUMENT: str = "--danmaku-ingest-worker"
+# Record count of a batch carrying a control message instead of records
+CONTROL_RECORDS: int = 0xFFFFFFFF
+
+
+class DanmakuWorker:
+    """
+    Serves WebSocket clients in a worker process and batches validated danmakus as records.
+    Several workers listen on the same port with SO_REUSEPORT; the kernel spreads connections among them.
+    """
+    def __init__(self,
+                 output: BinaryIO,
+                 host: str,
+                 port: int,
+                 max_connections: int,
+                 ping_interval: float | None,
+                 ping_timeout: float | None,
+                 idle_timeout: float | None,
+                 flush_interval: float,
+                 reuse_port: bool) -> None:
+        """
+        Initializes the DanmakuWorker. The settings mirror those of DanmakuSource.
+
+        Args:
+            output (BinaryIO): The stream batches are written to.
+            host (str): The interface to listen on.
+            port (int): The port to listen on.
+            max_connections (int): Maximum number of concurrent clients of this worker.
+            ping_interval (float | None): Seconds between keepalive pings, None disables them.
+            ping_timeout (float | None): Seconds to wait for a pong, None waits forever.
+            idle_timeout (float | None): Seconds without a message before a client is closed, None disables it.
+            flush_interval (float): Seconds between two batches.
+            reuse_port (bool): Whether to share the port with other workers.
+        """
+        self.output: BinaryIO = output
+        self.host: str = host
+        self.port: int = port
+        self.max_connections: int = max_connections
+        self.ping_interval: float | None = ping_interval
+        self.ping_timeout: float | None = ping_timeout
+        self.idle_timeout: float | None = idle_timeout
+        self.flush_interval: float = flush_interval
+        self.reuse_port: bool = reuse_port
+        self.connections: int = 0
+
+        self._records: list[bytes] = []
+        self._received: int = 0
+        self._rejected_json: int = 0
+        self._rejected_content: int = 0
+
+    def handle_message(self, message: str | bytes) -> str | None:
+        """
+        Validates one WebSocket message, single danmaku or bulk frame, and queues its records.
+        A recall control message is validated and forwarded to the GUI process at once;
+        the client is answered {"type": "recall", "removed": null}, as the count removed is not known here.
+
+        Args:
+            message (str | bytes): The received message.
+
+        Returns:
+            str | None: The reply to send to the client, None for danmakus.
+        """
+        self._received += 1
+        try:
+            parsed: Any = json.loads(message)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._rejected_json += 1
+            return None
+        if isinstance(parsed, dict) and parsed.get("type") == RECALL_MESSAGE_TYPE:
+            try:
+                RecallPredicate.from_dict(parsed)
+            except (TypeError, ValueError) as e:
+                self._rejected_content += 1
+                return json.dumps({"type": RECALL_MESSAGE_TYPE, "error": str(e)})
+            self.flush() # Danmakus received before the recall reach the GUI process first
+            self._write_frame(BATCH_HEADER.pack(CONTROL_RECORDS, 0, 0, 0), json.dumps(parsed).encode("utf-8"))
+            # The GUI process does not answer its workers, so the count removed stays unknown here; the reply
+            # keeps the shape of the single-process one
+            return json.dumps({"type": RECALL_MESSAGE_TYPE, "removed": None})
+        for entry in parsed if isinstance(parsed, list) else (parsed,):
+            try:
+                self._records.append(pack_danmaku(DanmakuModel.from_dict(entry)))
+            except (TypeError, ValueError):
+                self._rejected_content += 1
+        return None
+
+    def flush(self) -> None:
+        """
+        Writes the queued records and counters as one frame, if there is anything to report.
+        """
+        if not (self._records or self._received):
+            return
+        batch = BATCH_HEADER.pack(len(self._records), self._received, self._rejected_json, self._rejected_content)
+        self._write_frame(batch, b"".join(self._records))
+        self._records.clear()
+        self._received = self._rejected_json = self._rejected_content = 0
+
+    def _write_frame(self, batch: bytes, payload: bytes) -> None:
+        self.output.write(FRAME_LENGTH.pack(len(batch) + len(payload)))
+        self.output.write(batch)
+        self.output.write(payload)
+        self.output.flush()
+
+    async def serve(self, stop_event: asyncio.Event) -> None:
+        """
+        Serves clients and flushes batches until the stop event is set.
+
+        Args:
+            stop_event (asyncio.Event): Set when the worker should shut down.
+        """
+        async with serve(self._handle_connection, self.host, self.port,
+                         process_request=self._check_capacity,
+                         ping_interval=self.ping_interval,
+                         ping_timeout=self.ping_timeout,
+                         reuse_port=self.reuse_port or None):
+            flusher = asyncio.create_task(self._flush_loop())
+            await stop_event.wait()
+            flusher.cancel()
+        self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def _check_capacity(self, connection: ServerConnection, request: Request) -> Response | None:
+        if self.connections >= self.max_connections:
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "Too many connections\n")
+        return None
+
+    async def _handle_connection(self, websocket: ServerConnection) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(self.idle_timeout):
+                        message = await websocket.recv()
+                except TimeoutError:
+                    await websocket.close(1000, "Idle timeout")
+                    break
+                reply = self.handle_message(message)
+                if reply is not None:
+                    await websocket.send(reply)
+        except ConnectionClosed:
+            pass
+        finally:
+            self.connections -= 1
+
+
+def _optional_float(value: str) -> float | None:
+    return None if value == "none" else float(value)
+
+
+async def _main(args: argparse.Namespace, output: BinaryIO) -> None:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def wait_for_parent() -> None:
+        # The parent closes our standard input to stop us, or dies and closes it implicitly
+        sys.stdin.buffer.read()
+        loop.call_soon_threadsafe(stop_event.set)
+
+    threading.Thread(target=wait_for_parent, daemon=True).start()
+    worker = DanmakuWorker(output, args.host, args.port, args.max_connections, args.ping_interval,
+                           args.ping_timeout, args.idle_timeout, args.flush_interval, args.reuse_port)
+    await worker.serve(stop_event)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Runs an ingest worker until its standard input is closed.
+
+    Args:
+        argv (list[str] | None, optional): The worker arguments; None reads them from the command line. Defaults to None.
+    """
+    parser = argparse.ArgumentParser(description="Danmaku ingest worker, started by DanmakuSource.")
+    parser.add_argument("--host", required=True)
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--max-connections", type=int, required=True)
+    parser.add_argument("--ping-interval", type=_optional_float, required=True)
+    parser.add_argument("--ping-timeout", type=_optional_float, required=True)
+    parser.add_argument("--idle-timeout", type=_optional_float, required=True)
+    parser.add_argument("--flush-interval", type=float, required=True)
+    parser.add_argument("--reuse-port", action="store_true")
+    args = parser.parse_args(argv)
+    # Standard output carries the frames, anything printed goes to standard error instead
+    output = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    asyncio.run(_main(args, output))
+
+
+if __name__ == '__main__':
+    main()